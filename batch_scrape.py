@@ -0,0 +1,99 @@
+"""
+AI 工具包 - 批量抓取入口
+一次抓取频道列表文件中的所有频道，每个频道输出一个文件，并生成汇总清单 manifest.json
+
+用法：
+    python3 batch_scrape.py channels.txt --concurrency 4 --include-date
+    python3 batch_scrape.py channels.txt --date-precision month   # 近似发布时间（取自频道列表，快得多）
+    python3 batch_scrape.py channels.txt --since 90d              # 只抓取最近 90 天发布的视频
+"""
+import argparse
+import sys
+
+from modules.youtube.batch import BatchScraper, load_channel_list
+from modules.youtube.date_window import parse_date_bound
+from modules.youtube.writers import FORMAT_EXTENSIONS
+from core import metrics
+from core.logger import setup_logger
+
+logger = setup_logger("batch")
+
+
+def _date_bound(value: str) -> str:
+    """argparse 类型：时间窗口边界（相对日期换算为 YYYYMMDD）"""
+    try:
+        return parse_date_bound(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="YouTube 频道批量抓取工具")
+    parser.add_argument("channel_list", help="频道列表文件（每行一个频道 URL，# 开头为注释）")
+    parser.add_argument("--concurrency", type=int, default=None, help="同时抓取的频道数（默认见配置文件）")
+    parser.add_argument("--include-date", action="store_true", help="包含发布时间（较慢）")
+    parser.add_argument("--date-precision", choices=["day", "week", "month", "year"], default=None,
+                        help="近似发布时间：取自频道列表，只有精度达不到该值的视频才逐个获取精确日期（隐含 --include-date）")
+    parser.add_argument("--since", type=_date_bound, default=None,
+                        help="只抓取该日期及之后发布的视频：YYYYMMDD、YYYY-MM-DD 或相对今天的 90d、12w、6m、1y（隐含 --include-date）")
+    parser.add_argument("--until", type=_date_bound, default=None, help="只抓取该日期及之前发布的视频（格式同 --since）")
+    parser.add_argument("--format", dest="file_format", choices=list(FORMAT_EXTENSIONS), default="excel", help="输出格式")
+    parser.add_argument("--output-dir", default=None, help="输出目录（默认 output/batch_<时间>）")
+    parser.add_argument("--exclude-file", default=None, help="已存在视频的排重文件（Excel、CSV、TXT 或 JSONL）")
+    parser.add_argument("--incremental", action="store_true", help="增量模式，只抓取上次运行之后的新视频")
+    parser.add_argument("--exclude-seen", choices=["channel", "global"], default=None,
+                        help="排除之前保存过的视频（channel：按频道；global：按所有频道），无需排重文件")
+    parser.add_argument("--max-videos", type=int, default=None, help="每个频道最多抓取的视频数")
+    parser.add_argument("--min-videos", type=int, default=None, help="每个频道最少抓取的视频数")
+    parser.add_argument("--date-workers", type=int, default=None, help="每个频道获取发布时间的并发数")
+    parser.add_argument("--shard-processes", type=int, default=None,
+                        help="分片模式：获取发布时间时按列表位置分段，在多个进程中并行处理（适合上万个视频的频道）")
+    parser.add_argument("--shard-size", type=int, default=None, help="分片模式每段的视频数")
+    parser.add_argument("--metrics", default=None, metavar="FILE",
+                        help="结束时把性能指标写入 Prometheus 文本文件（可配合 node_exporter textfile 采集）")
+    args = parser.parse_args(argv)
+    if args.since and args.until and args.since > args.until:
+        parser.error(f"--since（{args.since}）不能晚于 --until（{args.until}）")
+    return args
+
+
+def main(argv=None):
+    """主函数"""
+    args = parse_args(argv)
+
+    channels = load_channel_list(args.channel_list)
+    if not channels:
+        logger.error(f"频道列表为空：{args.channel_list}")
+        return 1
+
+    batch = BatchScraper(
+        concurrency=args.concurrency,
+        include_date=args.include_date,
+        file_format=args.file_format,
+        output_dir=args.output_dir,
+        exclude_file=args.exclude_file,
+        incremental=args.incremental,
+        exclude_seen=args.exclude_seen,
+        date_precision=args.date_precision,
+        since=args.since,
+        until=args.until,
+        max_videos=args.max_videos,
+        min_videos=args.min_videos,
+        date_workers=args.date_workers,
+        shard_processes=args.shard_processes,
+        shard_size=args.shard_size
+    )
+    manifest = batch.run(channels)
+
+    for line in metrics.summary_lines():
+        logger.info(line)
+    if args.metrics:
+        logger.info(f"性能指标已写入：{metrics.write_textfile(args.metrics)}")
+
+    # 有频道失败时返回非零退出码，方便在定时任务中发现问题
+    return 1 if manifest['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,329 @@
+"""
+抓取性能基准测试（离线，不访问 YouTube）
+用录制 / 合成的磁带回放 yt-dlp 响应（见 modules/youtube/replay.py），测量各抓取模式的吞吐量、单个视频延迟和峰值内存，
+并与保存的基准结果比较
+
+场景：
+    flat      极速模式（只获取 URL）
+    date      两阶段模式（并发获取发布时间）
+    fallback  列表提前结束，使用备用方法补充
+    small     频道视频数少于 min_videos（列表已经完整，不需要备用方法）
+    approx    近似日期模式（date_precision='month'，最新视频为当前时间，一年以前的视频逐个获取精确日期）
+    sharded   分片模式获取发布时间（4 个进程，每段 size/8 个视频；工作进程的内存和回放统计不计入）
+    window    时间窗口（since='30d'，最新视频为当前时间，每 6 小时一个视频，窗口内约 120 个）
+    exclude   读取排重文件（Excel）
+
+用法：
+    python benchmarks/scraper.py                                  # 全部场景 × 50/300/5000 个视频，与 benchmarks/baseline.json 比较
+    python benchmarks/scraper.py --modes flat date --sizes 50 300
+    python benchmarks/scraper.py --video-latency 0.2 --throttle-rate 0.02
+    python benchmarks/scraper.py --save-baseline                  # 把本次结果保存为基准
+    python benchmarks/scraper.py --record https://www.youtube.com/@频道 --cassette cassettes/频道.json.gz --include-date
+    python benchmarks/scraper.py --cassette cassettes/频道.json.gz --modes flat date   # 回放录制的真实频道
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+MODES = ['flat', 'date', 'fallback', 'small', 'approx', 'sharded', 'window', 'exclude']
+SIZES = [50, 300, 5000]
+CHANNEL_URL = 'https://www.youtube.com/@benchmark'
+RESULT_MARKER = 'BENCHMARK_RESULT '
+
+
+def _peak_rss_mb() -> float:
+    """当前进程的峰值常驻内存（MB）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 上单位为 KB，macOS 上为字节
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _write_exclude_file(path: Path, size: int) -> None:
+    """生成包含 size 个视频 URL 的排重 Excel 文件"""
+    from modules.youtube.records import VideoRecord
+    from modules.youtube.replay import synthetic_video_id
+    from modules.youtube.writers import open_writer
+
+    with open_writer(path, 'excel', include_date=False) as writer:
+        for i in range(size):
+            writer.write(VideoRecord(synthetic_video_id(i)))
+
+
+def run_scenario(spec: dict) -> dict:
+    """
+    在当前进程中运行一个场景（由子进程调用，峰值内存互不影响）
+
+    Args:
+        spec: 场景参数（mode、size、cassette、延迟和错误注入等）
+
+    Returns:
+        测量结果
+    """
+    from modules.youtube.exclude import load_exclude_ids
+    from modules.youtube.replay import Cassette
+    from modules.youtube.scraper import YouTubeScraper
+
+    mode, size = spec['mode'], spec['size']
+    if mode == 'exclude':
+        rss_before = _peak_rss_mb()
+        start_time = time.perf_counter()
+        count = len(load_exclude_ids(spec['exclude_file'], use_cache=False))
+        elapsed = time.perf_counter() - start_time
+        return {
+            'count': count,
+            'wall_ms': round(elapsed * 1000, 1),
+            'throughput': round(count / elapsed, 1) if elapsed else 0.0,
+            'first_ms': None,
+            'latency_p50_ms': round(elapsed * 1000 / max(count, 1), 3),
+            'latency_p95_ms': None,
+            'peak_rss_mb': round(_peak_rss_mb(), 1),
+            'rss_growth_mb': round(_peak_rss_mb() - rss_before, 1),
+            'requests': {},
+        }
+
+    upload_url = YouTubeScraper._get_channel_upload_url(spec['channel_url'])
+    if spec.get('cassette'):
+        cassette = Cassette.load(spec['cassette'])
+    else:
+        cassette = Cassette.synthetic(upload_url, size // 2 if mode == 'small' else size,
+                                      listed=size // 2 if mode in ('fallback', 'small') else size,
+                                      newest=datetime.now() if mode in ('approx', 'window') else None)
+    scraper = YouTubeScraper(
+        max_videos=size,
+        min_videos=size,
+        use_cache=False,
+        use_rate_limit=spec['rate_limit'],
+        use_seen_index=False,
+        ydl_factory=cassette.replayer(
+            page_latency=spec['page_latency'],
+            video_latency=spec['video_latency'],
+            error_rate=spec['error_rate'],
+            throttle_rate=spec['throttle_rate'],
+            seed=spec['seed'],
+        ),
+        shard_processes=4 if mode == 'sharded' else 0,
+        shard_size=max(1, size // 8),
+    )
+
+    rss_before = _peak_rss_mb()
+    arrivals = []
+    start_time = time.perf_counter()
+    for _ in scraper.iter_channel(spec['channel_url'], include_date=mode in ('date', 'sharded'),
+                                  date_precision='month' if mode == 'approx' else None,
+                                  since='30d' if mode == 'window' else None):
+        arrivals.append(time.perf_counter())
+    elapsed = time.perf_counter() - start_time
+    gaps = [(b - a) * 1000 for a, b in zip([start_time] + arrivals, arrivals)]
+    return {
+        'count': len(arrivals),
+        'wall_ms': round(elapsed * 1000, 1),
+        'throughput': round(len(arrivals) / elapsed, 1) if elapsed else 0.0,
+        'first_ms': round(gaps[0], 1) if gaps else None,
+        'latency_p50_ms': round(statistics.median(gaps), 3) if gaps else None,
+        'latency_p95_ms': round(_percentile(gaps, 0.95), 3) if gaps else None,
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+        'rss_growth_mb': round(_peak_rss_mb() - rss_before, 1),
+        'requests': dict(cassette.requests),
+    }
+
+
+def _run_in_subprocess(spec: dict, env: dict) -> dict:
+    """在独立子进程中运行场景，解析输出的结果行"""
+    proc = subprocess.run(
+        [sys.executable, __file__, '--run-scenario', json.dumps(spec)],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True
+    )
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+    raise RuntimeError(f"场景 {spec['mode']}-{spec['size']} 运行失败：\n{proc.stderr[-2000:]}")
+
+
+def record(channel_url: str, cassette_path: str, include_date: bool, max_videos: int) -> None:
+    """
+    真实抓取一次频道并录制为磁带
+
+    Args:
+        channel_url: 频道 URL
+        cassette_path: 磁带保存路径
+        include_date: 是否同时录制单个视频的请求（date 模式回放需要）
+        max_videos: 最多抓取的视频数
+    """
+    from modules.youtube.replay import Cassette
+    from modules.youtube.scraper import YouTubeScraper
+
+    cassette = Cassette(meta={
+        'channel_url': channel_url,
+        'recorded_at': datetime.now().isoformat(timespec='seconds'),
+        'include_date': include_date,
+    })
+    scraper = YouTubeScraper(max_videos=max_videos, use_cache=False, use_seen_index=False,
+                             ydl_factory=cassette.recorder())
+    count = sum(1 for _ in scraper.iter_channel(channel_url, include_date=include_date))
+    cassette.meta['n_videos'] = count
+    cassette.save(cassette_path)
+    print(f"已录制 {count} 个视频：{cassette_path}")
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    与基准结果比较
+
+    Args:
+        results: 本次结果（场景名 -> 测量结果）
+        baseline: 基准文件内容
+        threshold: 耗时增加超过该比例视为性能退化
+
+    Returns:
+        性能退化的场景名列表
+    """
+    regressions = []
+    base_results = baseline.get('results', {})
+    print("-" * 78)
+    print(f"与基准比较（{baseline.get('timestamp', '未知时间')}，耗时增加超过 {threshold:.0%} 视为退化）：")
+    print(f"  {'场景':<16}{'耗时':>20}{'吞吐量（条/秒）':>24}{'峰值内存 MB':>18}")
+    for name, current in results.items():
+        base = base_results.get(name)
+        if not base:
+            print(f"  {name:<16}{'（基准中没有该场景）':>20}")
+            continue
+        change = (current['wall_ms'] - base['wall_ms']) / base['wall_ms'] if base['wall_ms'] else 0.0
+        flag = ''
+        if change > threshold:
+            flag = '  ⚠️ 退化'
+            regressions.append(name)
+        elif change < -threshold:
+            flag = '  ✅ 提升'
+        print(
+            f"  {name:<16}{base['wall_ms']:>9.0f} -> {current['wall_ms']:<7.0f}{change:>+6.0%}"
+            f"{base['throughput']:>11.0f} -> {current['throughput']:<9.0f}"
+            f"{base['peak_rss_mb']:>7.0f} -> {current['peak_rss_mb']:<6.0f}{flag}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='抓取性能基准测试（离线回放，不访问 YouTube）')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES, help='测试场景（默认全部）')
+    parser.add_argument('--sizes', nargs='+', type=int, default=SIZES, help='频道视频数（默认 50 300 5000）')
+    parser.add_argument('--cassette', help='回放的磁带文件（默认使用合成频道）；与 --record 一起使用时为保存路径')
+    parser.add_argument('--page-latency', type=float, default=0.02, help='每个列表分页的延迟秒数（默认 0.02）')
+    parser.add_argument('--video-latency', type=float, default=0.005, help='每个视频请求的延迟秒数（默认 0.005）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='视频请求返回提取错误的概率')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='视频请求返回 HTTP 429 的概率')
+    parser.add_argument('--seed', type=int, default=42, help='错误注入的随机种子')
+    parser.add_argument('--rate-limit', action='store_true', help='启用自适应限速（默认关闭，只测量抓取器本身）')
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='基准结果文件')
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果保存为基准')
+    parser.add_argument('--threshold', type=float, default=0.2, help='耗时增加超过该比例视为退化（默认 0.2）')
+    parser.add_argument('--output', help='把本次结果保存为 JSON 文件')
+    parser.add_argument('--record', metavar='CHANNEL_URL', help='真实抓取频道并录制为磁带（需要 --cassette）')
+    parser.add_argument('--include-date', action='store_true', help='录制时同时录制获取发布时间的请求')
+    parser.add_argument('--max-videos', type=int, default=300, help='录制时最多抓取的视频数（默认 300）')
+    parser.add_argument('--run-scenario', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_scenario:
+        print(RESULT_MARKER + json.dumps(run_scenario(json.loads(args.run_scenario))))
+        return
+
+    if args.record:
+        if not args.cassette:
+            parser.error('--record 需要同时指定 --cassette 保存路径')
+        record(args.record, args.cassette, args.include_date, args.max_videos)
+        return
+
+    settings = {
+        'page_latency': args.page_latency,
+        'video_latency': args.video_latency,
+        'error_rate': args.error_rate,
+        'throttle_rate': args.throttle_rate,
+        'rate_limit': args.rate_limit,
+        'cassette': str(Path(args.cassette).resolve()) if args.cassette else None,
+    }
+    channel_url = CHANNEL_URL
+    sizes = args.sizes
+    modes = args.modes
+    if args.cassette:
+        from modules.youtube.replay import Cassette
+
+        meta = Cassette.load(args.cassette).meta
+        channel_url = meta.get('channel_url') or meta.get('upload_url') or CHANNEL_URL
+        sizes = [meta.get('n_videos') or args.max_videos]
+        modes = [m for m in modes if m in ('flat', 'date')]
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='tube2lm-bench-') as tmp_dir:
+        # 子进程使用临时缓存目录，元数据缓存、水位等不影响测量，也不污染本地数据
+        env = {**os.environ, 'TUBE2LM_CACHE_DIR': tmp_dir, 'TUBE2LM_SEEN_INDEX': '0'}
+        print("=" * 78)
+        print(f"抓取性能基准测试（分页延迟 {args.page_latency}s，视频延迟 {args.video_latency}s，"
+              f"错误率 {args.error_rate}，限流率 {args.throttle_rate}，限速{'开' if args.rate_limit else '关'}）")
+        print("=" * 78)
+        print(f"  {'场景':<16}{'视频数':>8}{'耗时 ms':>11}{'条/秒':>10}{'首条 ms':>10}"
+              f"{'p50 ms':>9}{'p95 ms':>9}{'峰值 MB':>9}")
+        for mode in modes:
+            for size in sizes:
+                spec = {**settings, 'mode': mode, 'size': size, 'channel_url': channel_url, 'seed': args.seed}
+                if mode == 'exclude':
+                    spec['exclude_file'] = str(Path(tmp_dir) / f"exclude_{size}.xlsx")
+                    _write_exclude_file(Path(spec['exclude_file']), size)
+                name = f"{mode}-{size}"
+                result = _run_in_subprocess(spec, env)
+                results[name] = result
+                print(
+                    f"  {name:<16}{result['count']:>8}{result['wall_ms']:>11.0f}{result['throughput']:>10.0f}"
+                    f"{result['first_ms'] if result['first_ms'] is not None else '-':>10}"
+                    f"{result['latency_p50_ms'] if result['latency_p50_ms'] is not None else '-':>9}"
+                    f"{result['latency_p95_ms'] if result['latency_p95_ms'] is not None else '-':>9}"
+                    f"{result['peak_rss_mb']:>9.0f}"
+                )
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'settings': settings,
+        'results': results,
+    }
+
+    regressions = []
+    baseline_path = Path(args.baseline)
+    if baseline_path.exists() and not args.save_baseline:
+        baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+        if baseline.get('settings') != settings:
+            print(f"⚠️  基准的测试参数与本次不同，比较结果仅供参考：{baseline.get('settings')}")
+        regressions = compare(results, baseline, args.threshold)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"\n结果已保存到：{args.output}")
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"\n已保存基准：{baseline_path}")
+
+    if regressions:
+        print(f"\n❌ 性能退化：{', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
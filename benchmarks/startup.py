@@ -0,0 +1,174 @@
+"""
+启动性能基准测试
+测量 Web 服务的冷启动开销：各模块的导入耗时、yt-dlp 预加载耗时、从启动进程到首页可访问的时间
+
+用法：
+    python benchmarks/startup.py                     # Flask 单进程模式，运行 3 次取中位数
+    python benchmarks/startup.py --server gunicorn   # gunicorn 模式（读取 gunicorn.conf.py）
+    python benchmarks/startup.py --runs 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    """获取一个空闲端口"""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def measure_imports(module: str = 'web_app') -> dict:
+    """
+    用 python -X importtime 测量导入模块的耗时
+
+    Args:
+        module: 要导入的模块
+
+    Returns:
+        {'total_ms': 总耗时, 'packages': {顶层包: 自身耗时合计}, 'direct': {直接导入的模块: 累计耗时}}
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=BASE_DIR, capture_output=True, text=True, env={**os.environ, 'TUBE2LM_WARM_UP': '0'}
+    )
+    # importtime 先输出子模块再输出父模块：缩进为 0 的一行结束一棵导入树，只统计 module 这一棵
+    packages, direct = defaultdict(float), {}
+    subtree_packages, subtree_direct = defaultdict(float), {}
+    total_ms = 0.0
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        name = name.strip()
+        subtree_packages[name.split('.')[0]] += int(self_us) / 1000
+        if depth == 1:
+            subtree_direct[name] = int(cumulative_us) / 1000
+        elif depth == 0:
+            if name == module:
+                total_ms = int(cumulative_us) / 1000
+                packages, direct = subtree_packages, subtree_direct
+            subtree_packages, subtree_direct = defaultdict(float), {}
+    return {
+        'total_ms': round(total_ms, 1),
+        'packages': {k: round(v, 1) for k, v in sorted(packages.items(), key=lambda kv: -kv[1])},
+        'direct': {k: round(v, 1) for k, v in sorted(direct.items(), key=lambda kv: -kv[1])},
+    }
+
+
+def measure_warm_up() -> float:
+    """
+    在新进程中测量 warm_up()（导入 yt-dlp 并初始化 YouTube 提取器）的耗时
+
+    Returns:
+        耗时（毫秒）
+    """
+    proc = subprocess.run(
+        [sys.executable, '-c', 'from modules.youtube.scraper import warm_up; print(warm_up())'],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True
+    )
+    return round(float(proc.stdout.strip().splitlines()[-1]) * 1000, 1)
+
+
+def measure_first_request(server: str = 'flask', timeout: float = 30.0) -> float:
+    """
+    启动 Web 服务并轮询首页，测量从启动进程到首页返回 200 的时间
+
+    Args:
+        server: 'flask'（python web_app.py）或 'gunicorn'
+        timeout: 最长等待秒数
+
+    Returns:
+        耗时（毫秒）
+    """
+    port = _free_port()
+    if server == 'gunicorn':
+        cmd = ['gunicorn', '--bind', f'127.0.0.1:{port}', '--workers', '2', '--threads', '4', 'web_app:app']
+    else:
+        cmd = [sys.executable, 'web_app.py']
+    env = {**os.environ, 'PORT': str(port)}
+    url = f'http://127.0.0.1:{port}/'
+
+    start_time = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start_time < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"服务进程提前退出（返回码 {proc.returncode}）：{' '.join(cmd)}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return round((time.perf_counter() - start_time) * 1000, 1)
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"{timeout} 秒内首页仍不可访问")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Web 服务启动性能基准测试')
+    parser.add_argument('--server', choices=['flask', 'gunicorn'], default='flask', help='启动方式（默认 flask）')
+    parser.add_argument('--runs', type=int, default=3, help='重复次数，结果取中位数（默认 3）')
+    parser.add_argument('--top', type=int, default=10, help='显示导入耗时最多的前 N 个包（默认 10）')
+    parser.add_argument('--output', help='把结果保存为 JSON 文件')
+    args = parser.parse_args()
+
+    imports = [measure_imports() for _ in range(args.runs)]
+    warm_ups = [measure_warm_up() for _ in range(args.runs)]
+    first_requests = [measure_first_request(args.server) for _ in range(args.runs)]
+
+    # 各包耗时取 import 总耗时为中位数的那一次
+    median_imports = sorted(imports, key=lambda r: r['total_ms'])[len(imports) // 2]
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'server': args.server,
+        'runs': args.runs,
+        'import_web_app_ms': statistics.median(r['total_ms'] for r in imports),
+        'warm_up_ms': statistics.median(warm_ups),
+        'time_to_first_request_ms': statistics.median(first_requests),
+        'time_to_first_request_runs_ms': first_requests,
+        'direct_imports_ms': median_imports['direct'],
+        'package_imports_ms': median_imports['packages'],
+    }
+
+    print("=" * 60)
+    print(f"启动性能（{args.server}，{args.runs} 次中位数）")
+    print("=" * 60)
+    print(f"导入 web_app：       {report['import_web_app_ms']:>8.1f} ms")
+    print(f"预加载 yt-dlp：      {report['warm_up_ms']:>8.1f} ms")
+    print(f"启动到首页可访问：   {report['time_to_first_request_ms']:>8.1f} ms")
+    print("-" * 60)
+    print("web_app 直接导入的模块（累计耗时）：")
+    for name, ms in list(report['direct_imports_ms'].items())[:args.top]:
+        print(f"  {name:<40} {ms:>8.1f} ms")
+    print("各包自身导入耗时合计：")
+    for name, ms in list(report['package_imports_ms'].items())[:args.top]:
+        print(f"  {name:<40} {ms:>8.1f} ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到：{args.output}")
+
+
+if __name__ == '__main__':
+    main()
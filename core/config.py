@@ -11,6 +11,10 @@ BASE_DIR = Path(__file__).parent.parent
 OUTPUT_DIR = BASE_DIR / "output"
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# 缓存目录（元数据缓存等持久化数据，可通过环境变量指定到持久磁盘）
+CACHE_DIR = Path(os.environ.get("TUBE2LM_CACHE_DIR", OUTPUT_DIR / "cache"))
+CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
 # 日志配置
 LOG_DIR = BASE_DIR / "logs"
 LOG_DIR.mkdir(exist_ok=True)
@@ -20,5 +24,95 @@ YOUTUBE_CONFIG = {
     "max_videos": 300,  # 默认抓取最新 300 条视频（从新到旧排序）
     "min_videos": 200,  # 最少抓取 200 条
     "extract_flat": True,  # 只提取元数据，不下载视频（极速模式）
+    # 获取发布时间时的并发线程数（两阶段模式的第二阶段；启用限速器时线程池不小于限速器的最高并发数，实际并发由限速器调整）
+    "date_workers": int(os.environ.get("YOUTUBE_DATE_WORKERS", 8)),
+    # 批量抓取时同时抓取的频道数
+    "batch_concurrency": int(os.environ.get("YOUTUBE_BATCH_CONCURRENCY", 4)),
+    # 超过多少秒没有任何进展（翻页、列表条目、获取到发布时间、产出结果）判定为停滞并终止，0 表示不检查
+    "stall_timeout": float(os.environ.get("YOUTUBE_STALL_TIMEOUT", 180)),
+    # 分片模式：获取发布时间时把频道列表按位置分段，在多个进程中并行处理（0 或 1 表示不使用，适合上万个视频的频道）
+    "shard_processes": int(os.environ.get("YOUTUBE_SHARD_PROCESSES", 0)),
+    "shard_size": int(os.environ.get("YOUTUBE_SHARD_SIZE", 500)),  # 每段的视频数
+}
+
+# 缓存配置
+CACHE_CONFIG = {
+    # 视频元数据缓存（按视频 ID 缓存发布时间，发布时间不会变化，可长期复用）
+    "metadata_enabled": os.environ.get("TUBE2LM_METADATA_CACHE", "1") != "0",
+    "metadata_path": Path(os.environ.get("TUBE2LM_METADATA_CACHE_PATH", CACHE_DIR / "video_metadata.db")),
+    "metadata_max_entries": int(os.environ.get("TUBE2LM_METADATA_CACHE_MAX", 0)),  # 0 表示不限制
+    # 增量同步水位（每个频道最近抓取到的最新视频 ID）
+    "watermark_path": Path(os.environ.get("TUBE2LM_WATERMARK_PATH", CACHE_DIR / "channel_state.db")),
+    "watermark_history": 20,  # 每个频道保留的最新视频 ID 数量
+    # 断点续传任务日志目录
+    "journal_dir": Path(os.environ.get("TUBE2LM_JOURNAL_DIR", CACHE_DIR / "journals")),
+    # 排重文件解析结果缓存（按文件内容哈希保存提取出的视频 ID，重复上传同一文件无需重新解析）
+    "exclude_dir": Path(os.environ.get("TUBE2LM_EXCLUDE_CACHE_DIR", CACHE_DIR / "exclude")),
+    "exclude_max_files": int(os.environ.get("TUBE2LM_EXCLUDE_CACHE_MAX", 200)),  # 最多保留的文件数，0 表示不限制
+    "exclude_max_age": int(os.environ.get("TUBE2LM_EXCLUDE_CACHE_MAX_AGE", 30 * 86400)),  # 超过多少秒未使用即删除
+    # 已抓取视频索引（保存结果时自动记录，之后的抓取可直接排除，无需上传排重文件）
+    "seen_enabled": os.environ.get("TUBE2LM_SEEN_INDEX", "1") != "0",
+    "seen_dir": Path(os.environ.get("TUBE2LM_SEEN_INDEX_DIR", CACHE_DIR / "seen")),
+    "seen_delta_max": int(os.environ.get("TUBE2LM_SEEN_DELTA_MAX", 65536)),  # 增量文件超过该条数时合并进主索引
+    # 抓取结果缓存（相同频道和参数在有效期内直接返回已生成的文件，不再访问 YouTube）
+    "result_enabled": os.environ.get("TUBE2LM_RESULT_CACHE", "1") != "0",
+    "result_path": Path(os.environ.get("TUBE2LM_RESULT_CACHE_PATH", CACHE_DIR / "results.db")),
+    "result_ttl": int(os.environ.get("TUBE2LM_RESULT_CACHE_TTL", 600)),  # 有效期（秒）
+}
+
+# 自适应限速配置（进程内所有抓取共享）
+RATE_LIMIT_CONFIG = {
+    "enabled": os.environ.get("TUBE2LM_RATE_LIMIT", "1") != "0",
+    "requests_per_second": float(os.environ.get("TUBE2LM_RATE_LIMIT_RPS", 10)),  # 初始请求速率
+    "burst": 20,  # 令牌桶容量
+    "min_requests_per_second": 0.5,
+    "max_requests_per_second": float(os.environ.get("TUBE2LM_RATE_LIMIT_MAX_RPS", 50)),
+    "concurrency": 8,  # 初始并发提取数
+    "min_concurrency": 1,
+    "max_concurrency": 32,
+    "backoff_base": 2.0,  # 被限流后暂停的基础秒数（连续限流时指数增长）
+    "backoff_max": 120.0,
+    "decrease_cooldown": 5.0,  # 两次降低速率或并发数之间至少间隔的秒数（一批同时返回的 429 只降一次）
 }
 
+# YoutubeDL 实例池（进程内按 yt-dlp 配置复用实例，保留已初始化的提取器和 HTTP 连接）
+YDL_POOL_CONFIG = {
+    "enabled": os.environ.get("TUBE2LM_YDL_POOL", "1") != "0",
+    "max_size": int(os.environ.get("TUBE2LM_YDL_POOL_SIZE", 32)),  # 每种配置最多的实例数（使用中 + 空闲）
+    "wait_timeout": float(os.environ.get("TUBE2LM_YDL_POOL_WAIT", 5)),  # 实例全部在使用时最多等待的秒数，超时后临时创建
+    "idle_timeout": 300,  # 空闲超过多少秒的实例关闭重建（服务端可能已断开连接）
+    "max_uses": 1000,  # 单个实例借出多少次后关闭重建（限制 yt-dlp 内部状态增长）
+}
+
+# Web 任务调度配置
+WEB_CONFIG = {
+    # 只获取 URL 的快速任务与获取发布时间的慢任务分开排队，互不阻塞
+    "fast_workers": int(os.environ.get("TUBE2LM_FAST_WORKERS", 4)),
+    "slow_workers": int(os.environ.get("TUBE2LM_SLOW_WORKERS", 2)),
+    "max_queue": int(os.environ.get("TUBE2LM_MAX_QUEUE", 20)),  # 每个通道最多排队的任务数
+    # gunicorn（gthread）的 worker 数和每个 worker 的线程数（见 gunicorn.conf.py），每个进行中的请求占用一个线程
+    "workers": int(os.environ.get("TUBE2LM_WEB_WORKERS", 2)),
+    "threads": int(os.environ.get("TUBE2LM_WEB_THREADS", 4)),
+    # SSE 进度推送：最短推送间隔（秒，间隔内的多次变化合并推送）；每个连接只保持几秒，到时断开后
+    # 浏览器按 sse_retry_ms 重连，不会长期占用线程；每个 worker 同时保持的连接数有上限（应小于 threads），
+    # 超过时返回 503，前端改用轮询
+    "sse_interval": 0.5,
+    "sse_max_seconds": float(os.environ.get("TUBE2LM_SSE_MAX_SECONDS", 10)),
+    "sse_retry_ms": 1000,
+    "sse_max_streams": int(os.environ.get("TUBE2LM_SSE_MAX_STREAMS", 2)),
+    # 任务状态存储（进度和部分结果）：sqlite 供多个 gunicorn worker 共享，memory 仅限单进程（测试用）
+    "task_store": os.environ.get("TUBE2LM_TASK_STORE", "sqlite"),
+    "task_store_path": Path(os.environ.get("TUBE2LM_TASK_STORE_PATH", CACHE_DIR / "tasks.db")),
+    "task_ttl": int(os.environ.get("TUBE2LM_TASK_TTL", 3600)),  # 任务最后一次更新后保留的秒数
+    "task_poll_interval": 0.25,  # 等待其他 worker 更新进度时的轮询间隔（秒）
+    # 启动时预加载 yt-dlp（gunicorn 在 fork worker 之前加载，单进程模式在后台线程加载），第一次抓取不再等待导入
+    "warm_up": os.environ.get("TUBE2LM_WARM_UP", "1") != "0",
+}
+
+# 性能指标配置（Web 的 /metrics 为 Prometheus 文本格式）
+METRICS_CONFIG = {
+    "enabled": os.environ.get("TUBE2LM_METRICS", "1") != "0",
+    # 多个 gunicorn worker 各自把指标快照写入此目录，/metrics 汇总所有 worker
+    "dir": Path(os.environ.get("TUBE2LM_METRICS_DIR", CACHE_DIR / "metrics")),
+    "flush_interval": float(os.environ.get("TUBE2LM_METRICS_FLUSH_INTERVAL", 5)),  # 写入间隔（秒）
+}
@@ -0,0 +1,182 @@
+"""
+任务调度模块
+固定数量的工作线程 + 有界队列；按通道（lane）隔离快慢任务，相同任务在执行期间合并为一个
+
+调度器在进程内：多个 gunicorn worker 之间的任务合并由调用方通过共享的任务状态存储完成
+（见 core.task_store.TaskStore.claim），排队位置通过 on_queue_change 回调写入共享存储
+"""
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from .logger import setup_logger
+
+logger = setup_logger("job_scheduler")
+
+
+class QueueFullError(Exception):
+    """任务队列已满"""
+
+    def __init__(self, lane: str, retry_after: int = 30):
+        super().__init__(f"任务队列已满（{lane}）")
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+class Job:
+    """调度中的任务"""
+
+    def __init__(self, job_id: str, key: Optional[str], lane: str, fn: Callable[[], None]):
+        self.job_id = job_id
+        self.key = key
+        self.lane = lane
+        self.fn = fn
+        self.status = 'queued'  # queued -> running -> done / failed
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+
+class JobScheduler:
+    """任务调度器（线程安全）"""
+
+    def __init__(self, lanes: Dict[str, int], max_queue: int,
+                 on_queue_change: Optional[Callable[[str, List[str]], None]] = None):
+        """
+        初始化调度器（工作线程在第一次提交任务时才启动，兼容 gunicorn preload/fork）
+
+        Args:
+            lanes: 通道名 -> 工作线程数，例如 {'fast': 4, 'slow': 2}
+            max_queue: 每个通道最多排队的任务数
+            on_queue_change: 通道的排队任务变化（提交、开始执行）时以 (通道名, 排队中的任务 ID 列表) 调用，
+                用于把排队位置写入其他 worker 也能读取的存储；在调度器的锁内按变化顺序调用，需尽快返回
+        """
+        self.lanes = dict(lanes)
+        self.max_queue = max_queue
+        self._queues = {lane: queue.Queue(maxsize=max_queue) for lane in self.lanes}
+        self._waiting = {lane: [] for lane in self.lanes}  # 排队中的任务（按提交顺序）
+        self._jobs = {}      # job_id -> Job
+        self._inflight = {}  # 合并键 -> Job（排队中或执行中）
+        self._lock = threading.Lock()
+        self._on_queue_change = on_queue_change
+        self._started = False
+        self.counters = {'submitted': 0, 'coalesced': 0, 'rejected': 0, 'completed': 0, 'failed': 0}
+
+    def _start(self) -> None:
+        """启动工作线程（调用方需持有锁）"""
+        if self._started:
+            return
+        for lane, workers in self.lanes.items():
+            for i in range(max(1, workers)):
+                thread = threading.Thread(
+                    target=self._worker, args=(lane,), name=f"job-{lane}-{i}", daemon=True
+                )
+                thread.start()
+        self._started = True
+        logger.info(f"任务调度器已启动：{self.lanes}，每个通道最多排队 {self.max_queue} 个任务")
+
+    def _notify_queue_change(self, lane: str) -> None:
+        """通知排队任务变化（调用方需持有锁）"""
+        if self._on_queue_change is None:
+            return
+        try:
+            self._on_queue_change(lane, [job.job_id for job in self._waiting[lane]])
+        except Exception as e:
+            logger.warning(f"排队位置更新失败（{lane}）：{str(e)}")
+
+    def submit(self, job_id: str, fn: Callable[[], None], lane: str, key: Optional[str] = None):
+        """
+        提交任务
+
+        Args:
+            job_id: 任务 ID
+            fn: 任务函数（在工作线程中执行，需自行处理异常和进度）
+            lane: 通道名
+            key: 合并键；相同键的任务排队或执行期间，新的提交直接合并到已有任务
+
+        Returns:
+            (Job, 是否合并到已有任务)
+
+        Raises:
+            QueueFullError: 通道队列已满
+        """
+        with self._lock:
+            self._start()
+            if key is not None and key in self._inflight:
+                self.counters['coalesced'] += 1
+                return self._inflight[key], True
+
+            job = Job(job_id, key, lane, fn)
+            try:
+                self._queues[lane].put_nowait(job)
+            except queue.Full:
+                self.counters['rejected'] += 1
+                raise QueueFullError(lane)
+
+            self._jobs[job_id] = job
+            self._waiting[lane].append(job)
+            if key is not None:
+                self._inflight[key] = job
+            self.counters['submitted'] += 1
+            self._notify_queue_change(lane)
+            return job, False
+
+    def note_coalesced(self) -> None:
+        """记录一次在调度器之外完成的合并（例如合并到其他 worker 正在执行的相同任务）"""
+        with self._lock:
+            self.counters['coalesced'] += 1
+
+    def _worker(self, lane: str) -> None:
+        """工作线程：依次执行通道中的任务"""
+        while True:
+            job = self._queues[lane].get()
+            with self._lock:
+                self._waiting[lane].remove(job)
+                job.status = 'running'
+                job.started_at = time.time()
+                self._notify_queue_change(lane)
+            try:
+                job.fn()
+                status = 'done'
+            except Exception as e:
+                logger.error(f"任务执行失败 [{job.job_id[:8]}...]：{str(e)}", exc_info=True)
+                status = 'failed'
+            with self._lock:
+                job.status = status
+                job.finished_at = time.time()
+                self.counters['completed' if status == 'done' else 'failed'] += 1
+                if job.key is not None and self._inflight.get(job.key) is job:
+                    del self._inflight[job.key]
+                self._jobs.pop(job.job_id, None)
+            self._queues[lane].task_done()
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """
+        查询任务的排队位置（只限本进程提交的任务；其他 worker 提交的任务从共享存储读取）
+
+        Args:
+            job_id: 任务 ID
+
+        Returns:
+            前面还有几个任务（0 表示下一个执行）；任务不在排队中时返回 None
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != 'queued':
+                return None
+            return self._waiting[job.lane].index(job)
+
+    def stats(self) -> dict:
+        """
+        获取调度统计信息
+
+        Returns:
+            每个通道的排队数、执行数，以及提交、合并、拒绝等计数
+        """
+        with self._lock:
+            lanes = {}
+            for lane, workers in self.lanes.items():
+                running = sum(1 for j in self._jobs.values() if j.lane == lane and j.status == 'running')
+                lanes[lane] = {'workers': workers, 'queued': len(self._waiting[lane]), 'running': running}
+            return {'lanes': lanes, **self.counters}
@@ -0,0 +1,453 @@
+"""
+性能指标模块
+进程内的计数器、仪表和直方图（线程安全，无外部依赖），可输出为 Prometheus 文本格式（Web 的 /metrics）
+或字典快照（命令行）。
+
+gunicorn 多 worker 时，每个 worker 定期把自己的快照写入 METRICS_CONFIG["dir"]，
+/metrics 汇总所有 worker：计数器和直方图累加（已退出 worker 的计数保留），仪表只累加仍在运行的 worker。
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .config import METRICS_CONFIG
+from .logger import setup_logger
+
+logger = setup_logger("metrics")
+
+# 默认直方图分桶（秒）：覆盖单个视频请求（百毫秒级）到整个频道抓取（分钟级）
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """指标基类：按标签值保存样本"""
+
+    type = ''
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._function = None
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"指标 {self.name} 的标签应为 {self.labelnames}，实际为 {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def set_function(self, fn: Callable[[], Dict[Tuple, float]]) -> None:
+        """
+        采集时调用 fn 获取样本（用于调度器队列长度等已有统计），fn 返回 {标签值元组: 数值}
+        """
+        self._function = fn
+
+    def samples(self) -> List[Tuple[Tuple, object]]:
+        """当前样本列表 [(标签值元组, 值)]"""
+        if self._function is not None:
+            try:
+                return [(tuple(str(v) for v in k), float(v)) for k, v in self._function().items()]
+            except Exception as e:
+                logger.warning(f"采集指标 {self.name} 失败：{str(e)}")
+                return []
+        with self._lock:
+            return [(k, self._copy(v)) for k, v in self._values.items()]
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    """计数器（只增不减）"""
+
+    type = 'counter'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    """仪表（可增可减的当前值）"""
+
+    type = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Histogram(Metric):
+    """直方图（分桶计数、总和、次数）"""
+
+    type = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            sample = self._values.get(key)
+            if sample is None:
+                sample = self._values[key] = {'buckets': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            sample['buckets'][index] += 1
+            sample['sum'] += value
+            sample['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """计时上下文：退出时记录耗时（秒）"""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start_time, **labels)
+
+    @staticmethod
+    def _copy(value):
+        return {'buckets': list(value['buckets']), 'sum': value['sum'], 'count': value['count']}
+
+    def summary(self, **labels) -> Optional[dict]:
+        """
+        Returns:
+            {'count': 次数, 'sum': 总和, 'avg': 平均值}，没有样本时返回 None
+        """
+        with self._lock:
+            sample = self._values.get(self._key(labels))
+            if not sample:
+                return None
+            return {'count': sample['count'], 'sum': sample['sum'], 'avg': sample['sum'] / sample['count']}
+
+
+class Registry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, help: str, labelnames: Sequence[str], **kwargs) -> Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"指标 {name} 已以不同的类型或标签注册")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def snapshot(self) -> dict:
+        """
+        导出所有指标的快照（可 JSON 序列化，可与其他进程的快照合并）
+
+        Returns:
+            {指标名: {'type', 'help', 'labelnames', 'buckets', 'samples': [[标签值列表, 值]]}}
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        data = {}
+        for metric in metrics:
+            data[metric.name] = {
+                'type': metric.type,
+                'help': metric.help,
+                'labelnames': list(metric.labelnames),
+                'buckets': list(getattr(metric, 'buckets', ())),
+                'samples': [[list(k), v] for k, v in metric.samples()],
+            }
+        return data
+
+    def reset(self) -> None:
+        """清空所有样本（测试和基准测试用）"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear()
+
+
+def merge_snapshots(snapshots: Iterable[dict], include_gauges: Iterable[bool] = None) -> dict:
+    """
+    合并多个进程的快照：同名同标签的样本相加
+
+    Args:
+        snapshots: 快照列表
+        include_gauges: 与 snapshots 一一对应，False 表示该快照的仪表不计入（进程已退出）
+
+    Returns:
+        合并后的快照
+    """
+    snapshots = list(snapshots)
+    include_gauges = list(include_gauges) if include_gauges is not None else [True] * len(snapshots)
+    merged = {}
+    for snapshot, with_gauges in zip(snapshots, include_gauges):
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, {**metric, 'samples': {}})
+            if metric['type'] == 'gauge' and not with_gauges:
+                continue
+            for labels, value in metric['samples']:
+                key = tuple(labels)
+                current = target['samples'].get(key)
+                if metric['type'] == 'histogram':
+                    if current is None:
+                        current = target['samples'][key] = {
+                            'buckets': [0] * len(value['buckets']), 'sum': 0.0, 'count': 0
+                        }
+                    current['buckets'] = [a + b for a, b in zip(current['buckets'], value['buckets'])]
+                    current['sum'] += value['sum']
+                    current['count'] += value['count']
+                else:
+                    target['samples'][key] = (current or 0) + value
+    for metric in merged.values():
+        metric['samples'] = [[list(k), v] for k, v in metric['samples'].items()]
+    return merged
+
+
+def render_prometheus(snapshot: dict) -> str:
+    """
+    快照 -> Prometheus 文本格式（0.0.4）
+
+    Args:
+        snapshot: Registry.snapshot() 或 merge_snapshots() 的结果
+
+    Returns:
+        文本
+    """
+    lines = []
+    for name in sorted(snapshot):
+        metric = snapshot[name]
+        labelnames = metric['labelnames']
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for labels, value in sorted(metric['samples'], key=lambda s: s[0]):
+            if metric['type'] == 'histogram':
+                cumulative = 0
+                bounds = list(metric['buckets']) + [float('inf')]
+                for bound, count in zip(bounds, value['buckets']):
+                    cumulative += count
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{name}_bucket{_format_labels(labelnames, labels, le)} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labelnames, labels)} {_format_value(value['sum'])}")
+                lines.append(f"{name}_count{_format_labels(labelnames, labels)} {value['count']}")
+            else:
+                lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}")
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsExporter:
+    """多进程汇总：每个进程定期把快照写入共享目录（先写临时文件再改名）"""
+
+    def __init__(self, registry: Registry, metrics_dir: Optional[str] = None, interval: Optional[float] = None):
+        """
+        Args:
+            registry: 指标注册表
+            metrics_dir: 快照目录，默认使用配置文件中的值
+            interval: 写入间隔（秒），默认使用配置文件中的值
+        """
+        self.registry = registry
+        self.metrics_dir = Path(metrics_dir or METRICS_CONFIG["dir"])
+        self.interval = interval if interval is not None else METRICS_CONFIG["flush_interval"]
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self) -> None:
+        """在当前进程中启动写入线程（fork 之后的子进程会重新启动自己的线程）"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self.metrics_dir.mkdir(parents=True, exist_ok=True)
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name="metrics-exporter", daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"写入指标快照失败：{str(e)}")
+            time.sleep(self.interval)
+
+    def flush(self) -> None:
+        """立即写入当前进程的快照"""
+        path = self.metrics_dir / f"{os.getpid()}.json"
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.registry.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def collect(self) -> dict:
+        """
+        汇总所有进程的指标（当前进程使用实时数据）
+
+        Returns:
+            合并后的快照
+        """
+        snapshots, alive = [self.registry.snapshot()], [True]
+        own = f"{os.getpid()}.json"
+        if self.metrics_dir.exists():
+            for path in self.metrics_dir.glob('*.json'):
+                if path.name == own:
+                    continue
+                try:
+                    snapshots.append(json.loads(path.read_text(encoding='utf-8')))
+                except (OSError, ValueError):
+                    continue
+                alive.append(_pid_alive(int(path.stem)) if path.stem.isdigit() else False)
+        return merge_snapshots(snapshots, alive)
+
+    def clear(self) -> None:
+        """删除所有快照文件（服务启动时调用，避免累加上一次运行的计数）"""
+        if self.metrics_dir.exists():
+            for path in self.metrics_dir.glob('*.json'):
+                path.unlink(missing_ok=True)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def write_textfile(path, snapshot: Optional[dict] = None) -> Path:
+    """
+    把指标写入 Prometheus 文本文件（命令行使用，可配合 node_exporter 的 textfile 采集）
+
+    Args:
+        path: 文件路径
+        snapshot: 指标快照，默认为当前进程的全部指标
+
+    Returns:
+        文件路径
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(render_prometheus(snapshot or registry.snapshot()), encoding='utf-8')
+    os.replace(tmp_path, path)
+    return path
+
+
+def summary_lines() -> List[str]:
+    """
+    当前进程的耗时摘要（命令行结束时输出到日志）
+
+    Returns:
+        每行一项：各阶段耗时、extract_info 调用、缓存命中率、写入量
+    """
+    lines = []
+    snapshot = registry.snapshot()
+    for labels, value in snapshot['tube2lm_stage_duration_seconds']['samples']:
+        lines.append(f"阶段 {labels[0]}：{value['count']} 次，共 {value['sum']:.2f} 秒")
+    for labels, value in snapshot['tube2lm_extract_info_seconds']['samples']:
+        avg = value['sum'] / value['count'] if value['count'] else 0.0
+        lines.append(f"extract_info[{labels[0]}]：{value['count']} 次，平均 {avg:.2f} 秒")
+    caches = {}
+    for (cache, result), value in snapshot['tube2lm_cache_requests_total']['samples']:
+        caches.setdefault(cache, {})[result] = value
+    for cache, counts in caches.items():
+        total = counts.get('hit', 0) + counts.get('miss', 0)
+        if total:
+            lines.append(f"缓存 {cache}：命中率 {counts.get('hit', 0) / total:.0%}（{int(total)} 次查询）")
+    for labels, value in snapshot['tube2lm_output_bytes_total']['samples']:
+        lines.append(f"写入 {labels[0]}：{int(value)} 字节")
+    return lines
+
+
+# 进程内共享的注册表和抓取相关的指标
+registry = Registry()
+exporter = MetricsExporter(registry)
+
+STAGE_SECONDS = registry.histogram(
+    'tube2lm_stage_duration_seconds',
+    '各阶段耗时（流式抓取时 listing 与 extraction 相互重叠）',
+    ['stage']
+)
+EXTRACT_INFO_CALLS = registry.counter(
+    'tube2lm_extract_info_total', 'yt-dlp extract_info 调用次数', ['kind', 'outcome']
+)
+EXTRACT_INFO_SECONDS = registry.histogram(
+    'tube2lm_extract_info_seconds',
+    'yt-dlp extract_info 耗时（kind="video" 即单个视频的获取延迟）',
+    ['kind'],
+    buckets=(0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 30.0, 60.0)
+)
+CACHE_REQUESTS = registry.counter(
+    'tube2lm_cache_requests_total', '缓存查询次数', ['cache', 'result']
+)
+VIDEOS_SCRAPED = registry.counter(
+    'tube2lm_videos_scraped_total', '抓取产出的视频数', ['mode']
+)
+VIDEOS_EXCLUDED = registry.counter(
+    'tube2lm_videos_excluded_total', '因排重跳过的视频数'
+)
+BYTES_WRITTEN = registry.counter(
+    'tube2lm_output_bytes_total', 'save_urls 写入的字节数', ['format']
+)
+RECORDS_WRITTEN = registry.counter(
+    'tube2lm_output_records_total', 'save_urls 写入的记录数', ['format']
+)
@@ -0,0 +1,412 @@
+"""
+任务状态存储模块
+保存 Web 任务的进度和部分结果，多个 gunicorn worker 共享；超过 TTL 未更新的任务自动过期。
+相同任务的合并（claim）也通过存储进行，不同 worker 收到的相同请求只执行一次抓取
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .config import WEB_CONFIG
+from .logger import setup_logger
+
+logger = setup_logger("task_store")
+
+
+class TaskStore(ABC):
+    """
+    任务状态存储接口（缺少任一方法的实现在创建时即报错）
+
+    每个任务保存一份进度信息（字典）和按顺序追加的部分结果；每次更新进度时版本号加一，
+    调用方通过 wait_for_change() 等待版本变化（SSE 推送使用）。
+    合并键由 claim() 登记到执行它的任务，所有 worker 看到同一个登记，相同任务只执行一次。
+    """
+
+    def __init__(self, ttl: Optional[int] = None):
+        """
+        Args:
+            ttl: 任务最后一次更新后保留的秒数，默认使用配置文件中的值
+        """
+        self.ttl = ttl if ttl is not None else WEB_CONFIG["task_ttl"]
+
+    @abstractmethod
+    def set_progress(self, task_id: str, info: dict) -> None:
+        """写入任务进度（整体替换），版本号加一"""
+
+    @abstractmethod
+    def get_progress(self, task_id: str) -> Optional[Tuple[dict, int]]:
+        """
+        读取任务进度
+
+        Returns:
+            (进度信息, 版本号)；任务不存在或已过期时返回 None
+        """
+
+    @abstractmethod
+    def append_results(self, task_id: str, records: List[dict]) -> None:
+        """追加部分结果"""
+
+    @abstractmethod
+    def get_results(self, task_id: str, offset: int = 0, limit: int = 500) -> Optional[Tuple[List[dict], int]]:
+        """
+        读取部分结果
+
+        Returns:
+            (结果列表, 结果总数)；任务不存在或已过期时返回 None
+        """
+
+    @abstractmethod
+    def delete(self, task_id: str) -> None:
+        """删除任务"""
+
+    @abstractmethod
+    def wait_for_change(self, task_id: str, last_version: Optional[int], timeout: float) -> Optional[Tuple[dict, int]]:
+        """
+        等待任务进度变化（版本号不等于 last_version）或超时
+
+        Returns:
+            当前的 (进度信息, 版本号)；任务不存在或已过期时返回 None
+        """
+
+    @abstractmethod
+    def claim(self, key: str, task_id: str) -> str:
+        """
+        登记合并键（原子操作）：已有未过期的任务登记了该键时返回那个任务，否则登记为 task_id
+
+        登记该键的任务过期或被删除后登记自动失效（worker 异常退出时不会一直占用）。
+
+        Args:
+            key: 合并键
+            task_id: 本次请求的任务 ID（需已写入进度）
+
+        Returns:
+            执行该键的任务 ID（等于 task_id 表示由本次请求执行）
+        """
+
+    @abstractmethod
+    def release(self, key: str, task_id: str) -> None:
+        """撤销合并键的登记（只撤销 task_id 自己的登记）"""
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        """
+        删除过期任务
+
+        Returns:
+            删除的任务数
+        """
+
+
+class MemoryTaskStore(TaskStore):
+    """进程内任务状态存储（不能跨 worker 共享，用于测试和单进程运行）"""
+
+    def __init__(self, ttl: Optional[int] = None):
+        super().__init__(ttl)
+        self._cond = threading.Condition()
+        self._tasks = {}  # 任务ID -> {'info', 'version', 'results', 'expires_at'}
+        self._claims = {}  # 合并键 -> 任务ID
+
+    def _get(self, task_id: str) -> Optional[dict]:
+        """读取未过期的任务（调用方需持有锁）"""
+        task = self._tasks.get(task_id)
+        if task is not None and task['expires_at'] < time.time():
+            del self._tasks[task_id]
+            return None
+        return task
+
+    def set_progress(self, task_id: str, info: dict) -> None:
+        with self._cond:
+            task = self._get(task_id)
+            if task is None:
+                self.purge_expired()
+                task = self._tasks[task_id] = {'version': 0, 'results': []}
+            task['info'] = dict(info)
+            task['version'] += 1
+            task['expires_at'] = time.time() + self.ttl
+            self._cond.notify_all()
+
+    def get_progress(self, task_id: str) -> Optional[Tuple[dict, int]]:
+        with self._cond:
+            task = self._get(task_id)
+            if task is None:
+                return None
+            return dict(task['info']), task['version']
+
+    def append_results(self, task_id: str, records: List[dict]) -> None:
+        with self._cond:
+            task = self._get(task_id)
+            if task is not None:
+                task['results'].extend(records)
+
+    def get_results(self, task_id: str, offset: int = 0, limit: int = 500) -> Optional[Tuple[List[dict], int]]:
+        with self._cond:
+            task = self._get(task_id)
+            if task is None:
+                return None
+            return task['results'][offset:offset + limit], len(task['results'])
+
+    def delete(self, task_id: str) -> None:
+        with self._cond:
+            self._tasks.pop(task_id, None)
+            self._cond.notify_all()
+
+    def wait_for_change(self, task_id: str, last_version: Optional[int], timeout: float) -> Optional[Tuple[dict, int]]:
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._get(task_id) is None or self._tasks[task_id]['version'] != last_version,
+                timeout=timeout
+            )
+            task = self._get(task_id)
+            if task is None:
+                return None
+            return dict(task['info']), task['version']
+
+    def claim(self, key: str, task_id: str) -> str:
+        with self._cond:
+            owner = self._claims.get(key)
+            if owner is not None and owner != task_id and self._get(owner) is not None:
+                return owner
+            self._claims[key] = task_id
+            return task_id
+
+    def release(self, key: str, task_id: str) -> None:
+        with self._cond:
+            if self._claims.get(key) == task_id:
+                del self._claims[key]
+
+    def purge_expired(self) -> int:
+        with self._cond:
+            now = time.time()
+            expired = [task_id for task_id, task in self._tasks.items() if task['expires_at'] < now]
+            for task_id in expired:
+                del self._tasks[task_id]
+            for key in [key for key, owner in self._claims.items() if owner not in self._tasks]:
+                del self._claims[key]
+            return len(expired)
+
+
+class SQLiteTaskStore(TaskStore):
+    """
+    SQLite 任务状态存储（多线程 / 多进程安全）
+
+    同一进程内的更新通过条件变量立即唤醒等待者；其他 worker 写入的更新通过定期查询版本号发现。
+    """
+
+    # 两次清理过期任务之间的最短间隔（秒）
+    PURGE_INTERVAL = 60
+
+    def __init__(self, db_path: Optional[str] = None, ttl: Optional[int] = None,
+                 poll_interval: Optional[float] = None):
+        """
+        Args:
+            db_path: SQLite 文件路径，默认使用配置文件中的值
+            ttl: 任务最后一次更新后保留的秒数
+            poll_interval: 等待其他 worker 更新进度时的轮询间隔（秒）
+        """
+        super().__init__(ttl)
+        self.db_path = Path(db_path or WEB_CONFIG["task_store_path"])
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.poll_interval = poll_interval or WEB_CONFIG["task_poll_interval"]
+
+        self._cond = threading.Condition()
+        self._last_purge = 0.0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _db(self) -> sqlite3.Connection:
+        """
+        获取当前进程的数据库连接（调用方需持有锁）
+
+        连接在第一次使用时创建；gunicorn preload 后 fork 出的 worker 会重新创建自己的连接
+        """
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+            self._pid = os.getpid()
+            # WAL 模式允许多个 gunicorn worker 同时读写
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS tasks (
+                    task_id TEXT PRIMARY KEY,
+                    info TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS task_results (
+                    task_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    record TEXT NOT NULL,
+                    PRIMARY KEY (task_id, seq)
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS task_claims (
+                    claim_key TEXT PRIMARY KEY,
+                    task_id TEXT NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_expires ON tasks (expires_at)")
+            self._conn.commit()
+        return self._conn
+
+    def _read(self, task_id: str) -> Optional[Tuple[dict, int]]:
+        with self._lock:
+            row = self._db().execute(
+                "SELECT info, version FROM tasks WHERE task_id = ? AND expires_at >= ?",
+                (task_id, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set_progress(self, task_id: str, info: dict) -> None:
+        now = time.time()
+        if now - self._last_purge > self.PURGE_INTERVAL:
+            self.purge_expired()
+        with self._lock:
+            self._db().execute(
+                """
+                INSERT INTO tasks (task_id, info, version, expires_at) VALUES (?, ?, 1, ?)
+                ON CONFLICT(task_id) DO UPDATE SET
+                    info = excluded.info, version = tasks.version + 1, expires_at = excluded.expires_at
+                """,
+                (task_id, json.dumps(info, ensure_ascii=False), now + self.ttl)
+            )
+            self._db().commit()
+        with self._cond:
+            self._cond.notify_all()
+
+    def get_progress(self, task_id: str) -> Optional[Tuple[dict, int]]:
+        return self._read(task_id)
+
+    def append_results(self, task_id: str, records: List[dict]) -> None:
+        if not records:
+            return
+        with self._lock:
+            start = self._db().execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM task_results WHERE task_id = ?", (task_id,)
+            ).fetchone()[0]
+            self._db().executemany(
+                "INSERT INTO task_results (task_id, seq, record) VALUES (?, ?, ?)",
+                [(task_id, start + i, json.dumps(record, ensure_ascii=False)) for i, record in enumerate(records)]
+            )
+            self._db().commit()
+
+    def get_results(self, task_id: str, offset: int = 0, limit: int = 500) -> Optional[Tuple[List[dict], int]]:
+        if self._read(task_id) is None:
+            return None
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT record FROM task_results WHERE task_id = ? AND seq >= ? ORDER BY seq LIMIT ?",
+                (task_id, offset, limit)
+            ).fetchall()
+            total = self._db().execute(
+                "SELECT COUNT(*) FROM task_results WHERE task_id = ?", (task_id,)
+            ).fetchone()[0]
+        return [json.loads(row[0]) for row in rows], total
+
+    def delete(self, task_id: str) -> None:
+        with self._lock:
+            self._db().execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+            self._db().execute("DELETE FROM task_results WHERE task_id = ?", (task_id,))
+            self._db().execute("DELETE FROM task_claims WHERE task_id = ?", (task_id,))
+            self._db().commit()
+        with self._cond:
+            self._cond.notify_all()
+
+    def wait_for_change(self, task_id: str, last_version: Optional[int], timeout: float) -> Optional[Tuple[dict, int]]:
+        deadline = time.monotonic() + timeout
+        while True:
+            current = self._read(task_id)
+            remaining = deadline - time.monotonic()
+            if current is None or current[1] != last_version or remaining <= 0:
+                return current
+            # 本进程内的更新会立即唤醒；其他 worker 的更新最多延迟 poll_interval 秒发现
+            with self._cond:
+                self._cond.wait(min(self.poll_interval, remaining))
+
+    def claim(self, key: str, task_id: str) -> str:
+        with self._lock:
+            conn = self._db()
+            # IMMEDIATE 事务先取得写锁：多个 worker 同时登记同一个键时只有一个成功
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    """
+                    SELECT c.task_id FROM task_claims c JOIN tasks t ON t.task_id = c.task_id
+                    WHERE c.claim_key = ? AND t.expires_at >= ?
+                    """,
+                    (key, time.time())
+                ).fetchone()
+                if row is None or row[0] == task_id:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO task_claims (claim_key, task_id) VALUES (?, ?)", (key, task_id)
+                    )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return row[0] if row is not None else task_id
+
+    def release(self, key: str, task_id: str) -> None:
+        with self._lock:
+            self._db().execute("DELETE FROM task_claims WHERE claim_key = ? AND task_id = ?", (key, task_id))
+            self._db().commit()
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        self._last_purge = now
+        with self._lock:
+            expired = [row[0] for row in self._db().execute(
+                "SELECT task_id FROM tasks WHERE expires_at < ?", (now,)
+            ).fetchall()]
+            if expired:
+                self._db().executemany("DELETE FROM tasks WHERE task_id = ?", [(t,) for t in expired])
+                self._db().executemany("DELETE FROM task_results WHERE task_id = ?", [(t,) for t in expired])
+                self._db().executemany("DELETE FROM task_claims WHERE task_id = ?", [(t,) for t in expired])
+                self._db().commit()
+        if expired:
+            logger.info(f"已清理 {len(expired)} 个过期任务")
+        return len(expired)
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def create_task_store(backend: Optional[str] = None) -> TaskStore:
+    """
+    按配置创建任务状态存储
+
+    Args:
+        backend: 'sqlite' 或 'memory'，默认使用配置文件中的值
+
+    Returns:
+        任务状态存储实例
+    """
+    backend = (backend or WEB_CONFIG["task_store"]).lower()
+    if backend == 'memory':
+        logger.info("使用进程内任务状态存储（多个 worker 之间不共享）")
+        return MemoryTaskStore()
+    if backend == 'sqlite':
+        store = SQLiteTaskStore()
+        logger.info(f"使用 SQLite 任务状态存储：{store.db_path}")
+        return store
+    raise ValueError(f"不支持的任务状态存储：{backend}")
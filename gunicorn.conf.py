@@ -0,0 +1,42 @@
+"""
+gunicorn 配置文件（gunicorn 启动时自动读取当前目录下的 gunicorn.conf.py，命令行参数优先）
+
+preload_app：主进程先导入应用并预加载 yt-dlp，再 fork 出 worker，worker 共享已导入的模块，
+缩短缩容到零后冷启动的等待时间。设置 TUBE2LM_PRELOAD=0 可关闭（每个 worker 各自导入应用）。
+
+gthread：每个进行中的请求占用一个线程。SSE 进度推送的连接只保持几秒、每个 worker 的连接数有上限
+（见 WEB_CONFIG 的 sse_max_seconds、sse_max_streams），不会占满线程而阻塞轮询和新的抓取请求。
+"""
+import os
+import threading
+
+from core.config import WEB_CONFIG
+
+preload_app = os.environ.get("TUBE2LM_PRELOAD", "1") != "0"
+worker_class = "gthread"
+workers = WEB_CONFIG["workers"]
+threads = WEB_CONFIG["threads"]
+timeout = 300
+
+
+def on_starting(server):
+    """主进程启动时：清除上一次运行留下的指标快照（各 worker 的计数从零开始汇总）"""
+    from core.metrics import exporter
+
+    exporter.clear()
+
+
+def when_ready(server):
+    """主进程开始监听后、fork worker 之前：预加载 yt-dlp（仅 preload_app 模式）"""
+    if preload_app and WEB_CONFIG["warm_up"]:
+        from modules.youtube.scraper import warm_up
+
+        warm_up()
+
+
+def post_worker_init(worker):
+    """worker 加载应用后：未启用 preload_app 时在后台线程预加载 yt-dlp，不阻塞首页请求"""
+    if not preload_app and WEB_CONFIG["warm_up"]:
+        from modules.youtube.scraper import warm_up
+
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
@@ -1,15 +1,35 @@
 """
 AI 工具包 - 主入口文件
 """
+from pathlib import Path
+
+from modules.youtube.date_window import DateWindow
+from modules.youtube.exclude import file_sha1
 from modules.youtube.scraper import YouTubeScraper
+from core import metrics
 from core.logger import setup_logger
 
 # ==================== 配置区域 ====================
 # 在这里填入你要抓取的 YouTube 频道 URL
 CHANNEL_URL = "https://www.youtube.com/@thefutur/videos"  # The Futur 频道
 
-# 排重文件（可选）：如果提供了已抓取的 Excel 文件路径，将自动排除这些视频
+# 排重文件（可选）：如果提供了已抓取的 Excel（或 CSV、TXT、JSONL）文件路径，将自动排除这些视频
 EXCLUDE_FILE = None  # 例如："/path/to/existing_videos.xlsx" 或 None
+
+# 增量模式：只抓取上次运行之后的新视频（遇到上次抓取的最新视频即停止翻页）
+INCREMENTAL = False
+
+# 排除之前保存过的视频（无需排重文件）："channel" 按频道，"global" 按所有频道，None 表示不排除
+EXCLUDE_SEEN = None
+
+# 发布时间精度：None 表示逐个获取精确日期；"day"、"week"、"month"、"year" 表示使用频道列表中的近似日期，
+# 只有精度达不到该值的视频才逐个获取（快得多，结果多一列日期精度）
+DATE_PRECISION = None
+
+# 发布时间窗口：只抓取 SINCE ~ UNTIL 之间发布的视频（"YYYYMMDD"、"YYYY-MM-DD" 或相对今天的 "90d"、"12w"、"6m"、"1y"），
+# None 表示不限制；早于 SINCE 的视频不再翻页和获取发布时间
+SINCE = None  # 例如："90d" 表示最近 90 天
+UNTIL = None
 # ==================================================
 
 logger = setup_logger("main")
@@ -30,6 +50,8 @@ def main():
     try:
         # 创建抓取器实例
         scraper = YouTubeScraper()
+        # 相对日期（如 90d）换算为具体日期，任务标识按具体日期区分
+        window = DateWindow(SINCE, UNTIL)
         
         # 抓取视频 URL 和发布时间
         logger.info("开始抓取视频链接和发布时间...")
@@ -38,7 +60,19 @@ def main():
         video_data = scraper.scrape_channel(
             CHANNEL_URL, 
             include_date=True,
-            exclude_file=EXCLUDE_FILE
+            exclude_file=EXCLUDE_FILE,
+            incremental=INCREMENTAL,
+            exclude_seen=EXCLUDE_SEEN,
+            # 中断后使用相同参数重新运行会从断点继续
+            job_key=scraper.make_job_key(
+                CHANNEL_URL, include_date=True, date_precision=DATE_PRECISION,
+                since=window.since, until=window.until,
+                exclude_hash=file_sha1(EXCLUDE_FILE) if EXCLUDE_FILE and Path(EXCLUDE_FILE).exists() else '',
+                exclude_seen=EXCLUDE_SEEN, incremental=INCREMENTAL, file_format='excel'
+            ),
+            date_precision=DATE_PRECISION,
+            since=window.since,
+            until=window.until
         )
         
         if not video_data:
@@ -52,6 +86,8 @@ def main():
         logger.info(f"抓取完成！共抓取 {len(video_data)} 条视频链接")
         logger.info(f"结果已保存到：{output_file}")
         logger.info("文件格式：Excel（包含 URL、发布时间、视频ID）")
+        for line in metrics.summary_lines():
+            logger.info(line)
         logger.info("=" * 60)
         
     except Exception as e:
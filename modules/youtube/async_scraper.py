@@ -0,0 +1,197 @@
+"""
+异步抓取接口
+在 asyncio 程序中使用：抓取在有界线程池中执行（yt-dlp 是阻塞的），结果通过异步生成器逐条返回，
+支持并发上限、截止时间和取消（取消后抓取线程在 yt-dlp 的下一次网络请求处终止）
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Optional, Set
+
+from core.config import YOUTUBE_CONFIG
+from core.logger import setup_logger
+from .records import VideoRecord
+from .scraper import YouTubeScraper
+
+logger = setup_logger("youtube_async")
+
+# 取消或超时后等待抓取线程退出的最长秒数（线程可能正在等待一次网络请求返回）
+CANCEL_GRACE = 10.0
+
+
+class ScrapeTimeoutError(TimeoutError):
+    """抓取超过截止时间（等待并发名额的时间也计算在内）"""
+
+
+class AsyncYouTubeScraper:
+    """
+    异步 YouTube 抓取器
+
+    与 YouTubeScraper 使用同一套抓取逻辑（iter_channel）：每个频道的抓取占用线程池中的一个线程，
+    产出的结果经有界缓冲交给事件循环，调用方消费慢时抓取线程等待（背压）。
+    异步生成器被关闭（async for 中途 break、任务被取消、超过截止时间）时通知抓取线程停止，
+    已在获取的发布时间不再等待，断点续传的任务日志保留。
+
+    示例：
+        async with AsyncYouTubeScraper(max_concurrency=4, timeout=600) as scraper:
+            async for record in scraper.scrape_channel(url, include_date=True):
+                ...
+    """
+
+    def __init__(self, scraper: Optional[YouTubeScraper] = None, max_concurrency: Optional[int] = None,
+                 timeout: Optional[float] = None, buffer_size: int = 200, **scraper_options):
+        """
+        Args:
+            scraper: 同步抓取器，默认按 scraper_options 创建（所有频道共用，共享缓存、限速器和实例池）
+            max_concurrency: 同时抓取的频道数（线程池大小），默认使用配置文件中的 batch_concurrency
+            timeout: 默认的单次抓取截止时间（秒），None 表示不限制
+            buffer_size: 每次抓取缓冲的最大结果数（超过时抓取线程等待调用方消费）
+            **scraper_options: 传给 YouTubeScraper 的参数（max_videos、min_videos、date_workers 等）
+        """
+        self.scraper = scraper if scraper is not None else YouTubeScraper(**scraper_options)
+        self.max_concurrency = max(1, max_concurrency or YOUTUBE_CONFIG["batch_concurrency"])
+        self.timeout = timeout
+        self.buffer_size = max(1, buffer_size)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='yt-async')
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._cancel_events: Set[threading.Event] = set()
+
+    @staticmethod
+    def _remaining(loop: asyncio.AbstractEventLoop, deadline: Optional[float]) -> Optional[float]:
+        return None if deadline is None else max(0.0, deadline - loop.time())
+
+    async def scrape_channel(self, channel_url: str, include_date: bool = False, exclude_file: Optional[str] = None,
+                             progress_callback: Optional[Callable] = None, incremental: bool = False,
+                             job_key: Optional[str] = None, exclude_seen: Optional[str] = None,
+                             date_precision: Optional[str] = None, since: Optional[str] = None,
+                             until: Optional[str] = None, timeout: Optional[float] = None) -> AsyncIterator[VideoRecord]:
+        """
+        异步抓取频道视频，按频道顺序（从新到旧）逐条产出
+
+        参数与 YouTubeScraper.iter_channel 相同，另外：
+
+        Args:
+            progress_callback: 进度回调 (stage, progress, message, current, total, estimated_time[, stats])，
+                在事件循环线程中调用
+            timeout: 截止时间（秒，从调用开始计算），默认使用构造时的 timeout
+
+        Raises:
+            ScrapeTimeoutError: 超过截止时间（在等待下一条结果时检查）
+            ScrapeStalledError: 超过 stall_timeout 秒没有任何进展（见 YOUTUBE_CONFIG）
+
+        Yields:
+            视频信息 VideoRecord（见 YouTubeScraper.iter_channel）
+        """
+        loop = asyncio.get_running_loop()
+        timeout = self.timeout if timeout is None else timeout
+        deadline = loop.time() + timeout if timeout else None
+
+        # 等待并发名额（计入截止时间）
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self._remaining(loop, deadline))
+        except asyncio.TimeoutError:
+            raise ScrapeTimeoutError(f"等待抓取名额超过截止时间（{timeout} 秒）：{channel_url}") from None
+
+        queue = asyncio.Queue()
+        room = threading.Semaphore(self.buffer_size)
+        cancel_event = threading.Event()
+        self._cancel_events.add(cancel_event)
+
+        def post(kind: str, value=None) -> None:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, (kind, value))
+            except RuntimeError:
+                # 事件循环已关闭，没有人再接收结果
+                cancel_event.set()
+
+        def produce() -> None:
+            records = self.scraper.iter_channel(
+                channel_url,
+                include_date=include_date,
+                exclude_file=exclude_file,
+                progress_callback=(lambda *args: post('progress', args)) if progress_callback else None,
+                incremental=incremental,
+                job_key=job_key,
+                exclude_seen=exclude_seen,
+                date_precision=date_precision,
+                since=since,
+                until=until,
+                cancel_event=cancel_event
+            )
+            try:
+                for record in records:
+                    # 缓冲已满时等待调用方消费，期间检查是否已取消
+                    while not room.acquire(timeout=0.2):
+                        if cancel_event.is_set():
+                            return
+                    if cancel_event.is_set():
+                        return
+                    post('record', record)
+            except BaseException as e:
+                post('error', e)
+                return
+            finally:
+                records.close()
+            post('done')
+
+        try:
+            future = loop.run_in_executor(self._executor, produce)
+        except BaseException:
+            self._cancel_events.discard(cancel_event)
+            self._slots.release()
+            raise
+        # 名额在抓取线程真正退出后才归还（线程池不会被已取消但仍在运行的抓取占满）
+        future.add_done_callback(lambda _: self._slots.release())
+
+        finished = False
+        try:
+            while True:
+                if queue.empty():
+                    try:
+                        kind, value = await asyncio.wait_for(queue.get(), self._remaining(loop, deadline))
+                    except asyncio.TimeoutError:
+                        raise ScrapeTimeoutError(f"抓取超过截止时间（{timeout} 秒）：{channel_url}") from None
+                else:
+                    if deadline is not None and loop.time() > deadline:
+                        raise ScrapeTimeoutError(f"抓取超过截止时间（{timeout} 秒）：{channel_url}")
+                    kind, value = queue.get_nowait()
+
+                if kind == 'record':
+                    room.release()
+                    yield value
+                elif kind == 'progress':
+                    try:
+                        progress_callback(*value)
+                    except Exception:
+                        pass
+                elif kind == 'error':
+                    finished = True
+                    raise value
+                else:
+                    finished = True
+                    return
+        finally:
+            self._cancel_events.discard(cancel_event)
+            if not finished:
+                cancel_event.set()
+                await self._join(future, channel_url)
+
+    @staticmethod
+    async def _join(future: asyncio.Future, channel_url: str) -> None:
+        """等待已取消的抓取线程退出（最多 CANCEL_GRACE 秒，之后线程在后台结束）"""
+        done, _ = await asyncio.wait({future}, timeout=CANCEL_GRACE)
+        if not done:
+            logger.warning(f"抓取线程在 {CANCEL_GRACE:.0f} 秒内没有退出，将在后台结束：{channel_url}")
+
+    async def aclose(self) -> None:
+        """取消所有进行中的抓取并关闭线程池"""
+        for cancel_event in list(self._cancel_events):
+            cancel_event.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
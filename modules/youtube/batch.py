@@ -0,0 +1,198 @@
+"""
+批量频道抓取模块
+在一个进程内并发抓取多个频道，每个频道输出一个文件，并生成汇总清单
+"""
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from core.config import OUTPUT_DIR, YOUTUBE_CONFIG
+from core.logger import setup_logger
+from .date_window import DateWindow
+from .exclude import file_sha1
+from .scraper import YouTubeScraper
+
+logger = setup_logger("youtube_batch")
+
+
+def load_channel_list(list_file: str) -> List[str]:
+    """
+    读取频道列表文件（每行一个频道 URL，# 开头为注释，重复的频道只保留一个）
+
+    Args:
+        list_file: 频道列表文件路径
+
+    Returns:
+        频道 URL 列表
+    """
+    channels = []
+    with open(list_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                channels.append(line)
+    return list(dict.fromkeys(channels))
+
+
+class BatchScraper:
+    """批量频道抓取器"""
+
+    def __init__(self, concurrency: int = None, include_date: bool = False, file_format: str = 'excel',
+                 output_dir: Optional[str] = None, exclude_file: Optional[str] = None,
+                 incremental: bool = False, exclude_seen: Optional[str] = None,
+                 date_precision: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+                 **scraper_options):
+        """
+        初始化批量抓取器
+
+        Args:
+            concurrency: 同时抓取的频道数（全局上限），默认使用配置文件中的值
+            include_date: 是否包含发布时间
+            file_format: 输出格式，'excel'、'txt'、'csv'、'tsv'、'jsonl' 或 'parquet'
+            output_dir: 输出目录，默认在 OUTPUT_DIR 下按时间创建子目录
+            exclude_file: 已存在视频的排重文件路径（Excel、CSV、TXT 或 JSONL，对所有频道生效）
+            incremental: 增量模式，只抓取上次运行之后的新视频
+            exclude_seen: 排除之前保存过的视频：'channel' 按频道，'global' 按所有频道
+            date_precision: 近似日期模式可接受的最粗精度（'day'、'week'、'month'、'year'），隐含 include_date
+            since: 只抓取该日期及之后发布的视频（'YYYYMMDD'、'YYYY-MM-DD' 或 '90d' 等，见 parse_date_bound），隐含 include_date
+            until: 只抓取该日期及之前发布的视频
+            **scraper_options: 传给 YouTubeScraper 的参数（max_videos、min_videos、date_workers 等）
+        """
+        self.concurrency = concurrency or YOUTUBE_CONFIG["batch_concurrency"]
+        self.date_precision = date_precision
+        # 相对日期在开始时换算一次，所有频道使用同一个时间窗口
+        window = DateWindow(since, until)
+        self.since, self.until = window.since, window.until
+        self.include_date = include_date or date_precision not in (None, 'exact') or bool(window)
+        self.file_format = file_format
+        self.exclude_file = exclude_file
+        # 排重文件的内容计入任务标识（断点续传），文件改变后不会续传按旧文件排重的记录
+        self.exclude_hash = file_sha1(exclude_file) if exclude_file and Path(exclude_file).exists() else ''
+        self.incremental = incremental
+        self.exclude_seen = exclude_seen
+        if output_dir:
+            self.output_dir = Path(output_dir)
+        else:
+            self.output_dir = OUTPUT_DIR / f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        # 所有频道共用一个抓取器（共享元数据缓存等资源）
+        self.scraper = YouTubeScraper(**scraper_options)
+
+    def _scrape_one(self, channel_url: str) -> dict:
+        """
+        抓取单个频道并保存结果
+
+        Args:
+            channel_url: 频道 URL
+
+        Returns:
+            该频道的汇总信息
+        """
+        summary = {
+            'channel_url': channel_url,
+            'status': 'ok',
+            'count': 0,
+            'output_file': None,
+            'error': None,
+        }
+        start_time = time.time()
+        try:
+            def stream_records():
+                # 边抓取边写入文件，不在内存中保留整个频道的结果
+                for record in self.scraper.iter_channel(
+                    channel_url,
+                    include_date=self.include_date,
+                    exclude_file=self.exclude_file,
+                    incremental=self.incremental,
+                    exclude_seen=self.exclude_seen,
+                    job_key=self.scraper.make_job_key(
+                        channel_url, self.include_date, self.date_precision, self.since, self.until,
+                        self.exclude_hash, self.exclude_seen, self.incremental, self.file_format
+                    ),
+                    date_precision=self.date_precision,
+                    since=self.since,
+                    until=self.until
+                ):
+                    summary['count'] += 1
+                    yield record
+            
+            output_file = self.scraper.save_urls(
+                stream_records(),
+                channel_url=channel_url,
+                file_format=self.file_format,
+                output_dir=self.output_dir,
+                include_date=self.include_date,
+                include_precision=self.date_precision not in (None, 'exact')
+            )
+            if output_file is not None:
+                summary['output_file'] = output_file.name
+            else:
+                summary['status'] = 'empty'
+        except Exception as e:
+            logger.error(f"频道抓取失败：{channel_url}：{str(e)}", exc_info=True)
+            summary['status'] = 'failed'
+            summary['error'] = str(e)
+        summary['elapsed_seconds'] = round(time.time() - start_time, 2)
+        return summary
+
+    def run(self, channel_urls: List[str]) -> dict:
+        """
+        并发抓取所有频道，并写入汇总清单 manifest.json
+
+        Args:
+            channel_urls: 频道 URL 列表
+
+        Returns:
+            汇总清单（包含每个频道的耗时、数量和失败原因）
+        """
+        started_at = datetime.now()
+        start_time = time.time()
+        total = len(channel_urls)
+        logger.info(f"开始批量抓取 {total} 个频道（并发数：{self.concurrency}），输出目录：{self.output_dir}")
+
+        results = {}
+        finished = 0
+        with ThreadPoolExecutor(max_workers=max(1, self.concurrency), thread_name_prefix='yt-channel') as executor:
+            futures = {executor.submit(self._scrape_one, url): url for url in channel_urls}
+            for future in as_completed(futures):
+                summary = future.result()
+                results[summary['channel_url']] = summary
+                finished += 1
+                logger.info(
+                    f"[{finished}/{total}] {summary['channel_url']}：{summary['status']}，"
+                    f"{summary['count']} 条，耗时 {summary['elapsed_seconds']} 秒"
+                )
+
+        # 清单按输入顺序排列
+        channels = [results[url] for url in channel_urls]
+        manifest = {
+            'started_at': started_at.isoformat(timespec='seconds'),
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+            'elapsed_seconds': round(time.time() - start_time, 2),
+            'concurrency': self.concurrency,
+            'include_date': self.include_date,
+            'date_precision': self.date_precision or 'exact',
+            'since': self.since,
+            'until': self.until,
+            'file_format': self.file_format,
+            'total_channels': total,
+            'succeeded': sum(1 for c in channels if c['status'] == 'ok'),
+            'empty': sum(1 for c in channels if c['status'] == 'empty'),
+            'failed': sum(1 for c in channels if c['status'] == 'failed'),
+            'total_videos': sum(c['count'] for c in channels),
+            'channels': channels,
+        }
+
+        manifest_path = self.output_dir / 'manifest.json'
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        logger.info(
+            f"批量抓取完成：成功 {manifest['succeeded']}，无结果 {manifest['empty']}，失败 {manifest['failed']}，"
+            f"共 {manifest['total_videos']} 条视频，耗时 {manifest['elapsed_seconds']} 秒，清单：{manifest_path}"
+        )
+        manifest['manifest_path'] = str(manifest_path)
+        return manifest
@@ -0,0 +1,212 @@
+"""
+视频元数据缓存模块
+按视频 ID 将发布时间等字段持久化到 SQLite，避免重复获取
+"""
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from core.config import CACHE_CONFIG
+from core.logger import setup_logger
+
+logger = setup_logger("youtube_cache")
+
+
+class VideoMetadataCache:
+    """视频元数据缓存（SQLite，多线程 / 多进程安全）"""
+
+    def __init__(self, db_path: Optional[str] = None, max_entries: Optional[int] = None):
+        """
+        初始化缓存
+
+        Args:
+            db_path: SQLite 文件路径，默认使用配置文件中的值
+            max_entries: 最多保留的条目数（超出时淘汰最久未访问的条目），0 或 None 表示不限制
+        """
+        self.db_path = Path(db_path or CACHE_CONFIG["metadata_path"])
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries if max_entries is not None else CACHE_CONFIG["metadata_max_entries"]
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+        with self._lock:
+            # WAL 模式允许多个 gunicorn worker 同时读写
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS video_metadata (
+                    video_id TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    upload_date TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_video_metadata_access ON video_metadata (last_access)"
+            )
+            self._conn.commit()
+
+    def get(self, video_id: str) -> Optional[dict]:
+        """
+        查询单个视频的缓存
+
+        Args:
+            video_id: 视频 ID
+
+        Returns:
+            缓存的视频信息，未命中时返回 None
+        """
+        return self.get_many([video_id]).get(video_id)
+
+    def get_many(self, video_ids: Iterable[str]) -> Dict[str, dict]:
+        """
+        批量查询缓存
+
+        Args:
+            video_ids: 视频 ID 列表
+
+        Returns:
+            命中的视频信息（视频 ID -> {'url', 'upload_date', 'video_id'}）
+        """
+        ids = [vid for vid in dict.fromkeys(video_ids) if vid]
+        found = {}
+        if not ids:
+            return found
+
+        now = time.time()
+        with self._lock:
+            # SQLite 默认最多 999 个绑定参数，分批查询
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT video_id, url, upload_date FROM video_metadata WHERE video_id IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                for video_id, url, upload_date in rows:
+                    found[video_id] = {'url': url, 'upload_date': upload_date, 'video_id': video_id}
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE video_metadata SET last_access = ? WHERE video_id = ?",
+                        [(now, row[0]) for row in rows]
+                    )
+            self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(ids) - len(found)
+
+        return found
+
+    def put(self, record: dict) -> None:
+        """
+        写入单个视频信息
+
+        Args:
+            record: 视频信息（需包含 video_id、url、upload_date）
+        """
+        self.put_many([record])
+
+    def put_many(self, records: Iterable[dict]) -> int:
+        """
+        批量写入视频信息（没有有效发布时间的记录不会被缓存）
+
+        Args:
+            records: 视频信息列表
+
+        Returns:
+            实际写入的条目数
+        """
+        now = time.time()
+        rows = [
+            (r['video_id'], r['url'], r['upload_date'], now, now)
+            for r in records
+            if r.get('video_id') and r.get('video_id') != 'N/A'
+            and r.get('upload_date') and r.get('upload_date') != 'N/A'
+        ]
+        if not rows:
+            return 0
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO video_metadata (video_id, url, upload_date, fetched_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._evict()
+            self._conn.commit()
+        return len(rows)
+
+    def _evict(self) -> None:
+        """超出容量时淘汰最久未访问的条目（调用方需持有锁）"""
+        if not self.max_entries:
+            return
+        size = self._conn.execute("SELECT COUNT(*) FROM video_metadata").fetchone()[0]
+        overflow = size - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM video_metadata WHERE video_id IN "
+                "(SELECT video_id FROM video_metadata ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            )
+            self.evictions += overflow
+            logger.info(f"元数据缓存已满，淘汰 {overflow} 条最久未访问的记录")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM video_metadata").fetchone()[0]
+
+    def stats(self) -> dict:
+        """
+        获取缓存统计信息
+
+        Returns:
+            包含命中数、未命中数、命中率、条目数和淘汰数的字典
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'size': len(self),
+            'evictions': self.evictions,
+        }
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._conn.execute("DELETE FROM video_metadata")
+            self._conn.commit()
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_metadata_cache() -> Optional[VideoMetadataCache]:
+    """
+    获取进程内共享的默认元数据缓存
+
+    Returns:
+        缓存实例；配置中禁用缓存时返回 None
+    """
+    global _default_cache
+    if not CACHE_CONFIG["metadata_enabled"]:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = VideoMetadataCache()
+            logger.info(f"已启用视频元数据缓存：{_default_cache.db_path}")
+        return _default_cache
@@ -0,0 +1,111 @@
+"""
+发布时间窗口
+只抓取 since ~ until 之间发布的视频：频道列表从新到旧排列，列表条目的近似日期（加上精度误差）
+已经比 since 早时停止翻页，比 until 晚的条目直接跳过，都不再单独获取发布时间
+"""
+import re
+from datetime import date, timedelta
+from typing import Optional
+
+from .records import NO_DATE, date_to_days
+
+# 条目相对于时间窗口的位置
+NEWER = 'newer'
+INSIDE = 'inside'
+OLDER = 'older'
+
+# 各精度近似日期的最大误差（天）：列表中的 "3 weeks ago" 实际可能是 3 到 4 周之前，再加 1 天时区误差
+PRECISION_SLACK_DAYS = {'exact': 0, 'day': 2, 'week': 8, 'month': 32, 'year': 367}
+
+# 连续多少个条目早于 since 时停止（个别视频的位置可能与发布时间不一致，例如首映）
+WINDOW_STOP_AFTER = 3
+
+# 相对日期：90d、12w、6m、1y（距今天数、周数、月数（按 30 天）、年数（按 365 天））
+_RELATIVE_PATTERN = re.compile(r'^(\d+)\s*([dwmy])$')
+_DATE_PATTERN = re.compile(r'^(\d{4})-?(\d{2})-?(\d{2})$')
+_RELATIVE_DAYS = {'d': 1, 'w': 7, 'm': 30, 'y': 365}
+
+
+def parse_date_bound(value: Optional[str], today: Optional[date] = None) -> Optional[str]:
+    """
+    解析时间窗口的边界
+
+    Args:
+        value: 'YYYYMMDD'、'YYYY-MM-DD'，或相对今天的 '90d'、'12w'、'6m'、'1y'；为空时返回 None
+        today: 相对日期的基准（默认为今天）
+
+    Returns:
+        'YYYYMMDD' 格式的日期
+
+    Raises:
+        ValueError: 无法解析
+    """
+    if value is None:
+        return None
+    text = str(value).strip().lower()
+    if not text:
+        return None
+    match = _RELATIVE_PATTERN.match(text)
+    if match:
+        day = (today or date.today()) - timedelta(days=int(match.group(1)) * _RELATIVE_DAYS[match.group(2)])
+        return day.strftime('%Y%m%d')
+    match = _DATE_PATTERN.match(text)
+    upload_date = ''.join(match.groups()) if match else None
+    if upload_date is None or date_to_days(upload_date) is None:
+        raise ValueError(f"无法解析日期：{value}（格式：YYYYMMDD、YYYY-MM-DD 或 90d、12w、6m、1y）")
+    return upload_date
+
+
+class DateWindow:
+    """
+    发布时间窗口 [since, until]（两端都包含，任一端可以为空）
+
+    近似日期按精度放宽判断：只有确定在窗口外的条目才跳过，跨越边界的交给精确日期判断。
+    """
+
+    def __init__(self, since: Optional[str] = None, until: Optional[str] = None):
+        """
+        Args:
+            since: 最早发布时间（见 parse_date_bound）
+            until: 最晚发布时间（见 parse_date_bound）
+
+        Raises:
+            ValueError: 日期无法解析，或 since 晚于 until
+        """
+        self.since = parse_date_bound(since)
+        self.until = parse_date_bound(until)
+        if self.since and self.until and self.since > self.until:
+            raise ValueError(f"since（{self.since}）不能晚于 until（{self.until}）")
+        self._since_days = date_to_days(self.since) if self.since else None
+        self._until_days = date_to_days(self.until) if self.until else None
+
+    def __bool__(self) -> bool:
+        return bool(self.since or self.until)
+
+    def classify(self, upload_date: Optional[str], precision: Optional[str] = 'exact') -> Optional[str]:
+        """
+        判断发布时间相对于窗口的位置
+
+        Args:
+            upload_date: 'YYYYMMDD'（近似日期或精确日期）
+            precision: 日期精度（见 PRECISION_SLACK_DAYS），None 视为 exact
+
+        Returns:
+            NEWER（确定晚于 until）、OLDER（确定早于 since）、INSIDE（确定在窗口内），
+            没有日期或近似日期跨越边界时返回 None
+        """
+        days = date_to_days(upload_date)
+        if days is None or days == NO_DATE:
+            return None
+        slack = PRECISION_SLACK_DAYS.get(precision or 'exact', PRECISION_SLACK_DAYS['year'])
+        if self._since_days is not None and days + slack < self._since_days:
+            return OLDER
+        if self._until_days is not None and days - slack > self._until_days:
+            return NEWER
+        if (self._since_days is not None and days - slack < self._since_days) or \
+                (self._until_days is not None and days + slack > self._until_days):
+            return None
+        return INSIDE
+
+    def __str__(self) -> str:
+        return f"{self.since or '最早'} ~ {self.until or '最新'}"
@@ -0,0 +1,448 @@
+"""
+排重文件读取模块
+流式读取 Excel（xlsx）、CSV/TSV、TXT、JSONL 中的视频 URL 或 ID，解析结果按文件内容哈希缓存
+"""
+import csv
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Set
+
+from core.config import CACHE_CONFIG
+from core.logger import setup_logger
+from core.metrics import CACHE_REQUESTS
+
+logger = setup_logger("youtube_exclude")
+
+# 支持的排重文件扩展名
+EXCLUDE_EXTENSIONS = {'xlsx', 'xls', 'csv', 'tsv', 'txt', 'jsonl'}
+
+# URL 中的视频 ID（watch?v=、youtu.be/、/shorts/、/embed/、/live/ 等格式）
+URL_ID_PATTERN = re.compile(
+    r'(?:[?&]v=|youtu\.be/|/shorts/|/embed/|/live/|/v/)([A-Za-z0-9_-]{11})(?![A-Za-z0-9_-])'
+)
+# 单独一行的视频 ID（ID 列或纯文本文件）
+BARE_ID_PATTERN = re.compile(r'^[ \t]*([A-Za-z0-9_-]{11})[ \t]*$', re.MULTILINE)
+ID_CHARS_PATTERN = re.compile(r'[A-Za-z0-9_-]{11}')
+
+# 每批处理的行数：同一列的一批单元格拼接后用一次正则提取，而不是逐行匹配
+BATCH_ROWS = 5000
+
+# 进程内保留最近解析过的 ID 集合数量
+MEMORY_CACHE_SIZE = 8
+
+# xlsx 内部 XML 的命名空间
+XLSX_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+XLSX_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+CELL_COLUMN_PATTERN = re.compile(r'[A-Z]+')
+
+# 直接解析 xlsx 时可能遇到的结构错误（出错时改用 openpyxl 重新读取）
+XLSX_ERRORS = (KeyError, IndexError, ValueError, AttributeError, ET.ParseError, zipfile.BadZipFile)
+
+
+def file_sha1(file_path: str) -> str:
+    """
+    计算文件内容哈希（分块读取，不把整个文件载入内存）
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        SHA1 十六进制字符串
+    """
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def extract_ids(values: Sequence, bare: bool = False) -> List[str]:
+    """
+    批量提取视频 ID
+
+    Args:
+        values: 单元格值列表（URL 或视频 ID）
+        bare: True 表示这些值本身就是视频 ID，False 表示从 URL 中提取
+
+    Returns:
+        视频 ID 列表
+    """
+    text = '\n'.join(str(v) for v in values if v is not None and v != '')
+    if not text:
+        return []
+    pattern = BARE_ID_PATTERN if bare else URL_ID_PATTERN
+    return pattern.findall(text)
+
+
+def _looks_like_id(value) -> bool:
+    """
+    单元格是否像单独的视频 ID：11 个 ID 字符，且至少包含一个数字、- 或 _
+    （"Description"、"publishedAt" 这类 11 个字母的列名不算）
+    """
+    text = str(value).strip() if value is not None else ''
+    return bool(ID_CHARS_PATTERN.fullmatch(text)) and not text.isalpha()
+
+
+def _find_columns(header: Sequence) -> tuple:
+    """
+    根据表头找到 URL 列和视频 ID 列（列名包含 url / id / video）
+
+    Returns:
+        (URL 列下标, 视频 ID 列下标)，找不到时为 None
+    """
+    names = [str(h).lower() if h is not None else '' for h in header]
+    url_col = next((i for i, name in enumerate(names) if 'url' in name), None)
+    id_col = next((i for i, name in enumerate(names) if 'id' in name or 'video' in name), None)
+    return url_col, id_col
+
+
+def _ids_from_rows(rows: Iterator[Sequence]) -> Iterator[str]:
+    """
+    从表格行中提取视频 ID（第一行为表头）
+
+    有 url / id 列时只读取这些列；没有可识别的表头时，把第一行也当作数据，从所有单元格中提取。
+    """
+    header = next(rows, None)
+    if header is None:
+        return
+    # 第一行本身包含视频 URL 或像视频 ID 的单元格时说明没有表头
+    has_header = not extract_ids(header) and not any(_looks_like_id(value) for value in header)
+    url_col, id_col = _find_columns(header) if has_header else (None, None)
+    if url_col is None and id_col is None:
+        # 没有表头：所有单元格都可能是 URL 或 ID
+        batch = list(header)
+        for row in rows:
+            batch.extend(row)
+            if len(batch) >= BATCH_ROWS:
+                yield from extract_ids(batch)
+                yield from extract_ids(batch, bare=True)
+                batch = []
+        yield from extract_ids(batch)
+        yield from extract_ids(batch, bare=True)
+        return
+
+    urls, ids = [], []
+    for row in rows:
+        if url_col is not None and url_col < len(row):
+            urls.append(row[url_col])
+        if id_col is not None and id_col < len(row):
+            ids.append(row[id_col])
+        if len(urls) >= BATCH_ROWS or len(ids) >= BATCH_ROWS:
+            yield from extract_ids(urls)
+            yield from extract_ids(ids, bare=True)
+            urls, ids = [], []
+    yield from extract_ids(urls)
+    yield from extract_ids(ids, bare=True)
+
+
+def _column_index(cell_ref: str) -> int:
+    """单元格坐标（如 "B12"）-> 列下标（从 0 开始）"""
+    index = 0
+    for ch in CELL_COLUMN_PATTERN.match(cell_ref).group():
+        index = index * 26 + ord(ch) - 64
+    return index - 1
+
+
+def _iter_xlsx_rows(file_path: str) -> Iterator[list]:
+    """
+    直接解析 xlsx 中第一个工作表的 XML，逐行产出单元格值
+
+    比 openpyxl 只读模式快数倍：不创建单元格对象，不处理样式和数据类型，只取文本
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        strings = []
+        if 'xl/sharedStrings.xml' in archive.namelist():
+            with archive.open('xl/sharedStrings.xml') as f:
+                for _, element in ET.iterparse(f):
+                    if element.tag == f'{XLSX_NS}si':
+                        strings.append(''.join(element.itertext()))
+                        element.clear()
+
+        workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+        rel_id = workbook.find(f'{XLSX_NS}sheets/{XLSX_NS}sheet').get(f'{XLSX_REL_NS}id')
+        rels = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+        target = next((rel.get('Target') for rel in rels if rel.get('Id') == rel_id), None)
+        if target is None:
+            raise KeyError(rel_id)
+        sheet_path = target.lstrip('/') if target.startswith('/') else f'xl/{target}'
+
+        with archive.open(sheet_path) as f:
+            sheet_data = None
+            for event, element in ET.iterparse(f, events=('start', 'end')):
+                if event == 'start':
+                    if element.tag == f'{XLSX_NS}sheetData':
+                        sheet_data = element
+                    continue
+                if element.tag != f'{XLSX_NS}row':
+                    continue
+                values = []
+                for cell in element:
+                    ref = cell.get('r')
+                    if ref:
+                        # 空单元格不会写入 XML，按坐标补齐
+                        index = _column_index(ref)
+                        if index > len(values):
+                            values.extend([None] * (index - len(values)))
+                    cell_type = cell.get('t')
+                    if cell_type == 'inlineStr':
+                        value = ''.join(cell.itertext())
+                    else:
+                        v = cell.find(f'{XLSX_NS}v')
+                        value = v.text if v is not None else None
+                        if cell_type == 's' and value is not None:
+                            value = strings[int(value)]
+                    values.append(value)
+                # 释放已处理的行，保持内存占用稳定
+                if sheet_data is not None:
+                    sheet_data.clear()
+                yield values
+
+
+def _iter_excel(file_path: str) -> Iterator[str]:
+    """流式读取 Excel 第一个工作表（逐行读取，不构建 DataFrame）"""
+    if zipfile.is_zipfile(file_path):
+        try:
+            yield from _ids_from_rows(_iter_xlsx_rows(file_path))
+            return
+        except XLSX_ERRORS as e:
+            # 出错前已产出的 ID 会被 openpyxl 重新读到，调用方按集合去重
+            logger.debug(f"直接解析 xlsx 失败（{type(e).__name__}: {str(e)}），改用 openpyxl 读取")
+
+    # 非标准结构的文件交给 openpyxl（只读模式）
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        yield from _ids_from_rows(iter(sheet.iter_rows(values_only=True)))
+    finally:
+        workbook.close()
+
+
+def _iter_csv(file_path: str, delimiter: Optional[str] = None) -> Iterator[str]:
+    """流式读取 CSV / TSV（未指定分隔符时自动识别）"""
+    with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+        if delimiter is None:
+            sample = f.read(64 * 1024)
+            f.seek(0)
+            try:
+                delimiter = csv.Sniffer().sniff(sample, delimiters=',\t;').delimiter
+            except csv.Error:
+                delimiter = ','
+        yield from _ids_from_rows(csv.reader(f, delimiter=delimiter))
+
+
+def _iter_text(file_path: str) -> Iterator[str]:
+    """流式读取纯文本（每行一个 URL 或视频 ID）"""
+    with open(file_path, 'r', encoding='utf-8-sig', errors='ignore') as f:
+        while True:
+            lines = f.readlines(4 * 1024 * 1024)
+            if not lines:
+                break
+            yield from extract_ids(lines)
+            yield from extract_ids([line.rstrip('\r\n') for line in lines], bare=True)
+
+
+def _iter_jsonl(file_path: str) -> Iterator[str]:
+    """流式读取 JSONL（每行一个对象，读取 url / id / video 字段；也支持每行一个字符串）"""
+    urls, ids = [], []
+    with open(file_path, 'r', encoding='utf-8-sig', errors='ignore') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(item, str):
+                urls.append(item)
+                ids.append(item)
+            elif isinstance(item, dict):
+                url_col, id_col = _find_columns(list(item.keys()))
+                keys = list(item.keys())
+                if url_col is not None:
+                    urls.append(item[keys[url_col]])
+                if id_col is not None:
+                    ids.append(item[keys[id_col]])
+            if len(urls) >= BATCH_ROWS or len(ids) >= BATCH_ROWS:
+                yield from extract_ids(urls)
+                yield from extract_ids(ids, bare=True)
+                urls, ids = [], []
+    yield from extract_ids(urls)
+    yield from extract_ids(ids, bare=True)
+
+
+def iter_exclude_ids(file_path: str) -> Iterator[str]:
+    """
+    按文件扩展名流式读取排重文件中的视频 ID（可能有重复）
+
+    Args:
+        file_path: 排重文件路径
+
+    Yields:
+        视频 ID
+    """
+    suffix = Path(file_path).suffix.lower().lstrip('.')
+    if suffix in ('xlsx', 'xls', 'xlsm'):
+        return _iter_excel(file_path)
+    if suffix == 'csv':
+        return _iter_csv(file_path)
+    if suffix == 'tsv':
+        return _iter_csv(file_path, delimiter='\t')
+    if suffix == 'jsonl':
+        return _iter_jsonl(file_path)
+    return _iter_text(file_path)
+
+
+class ExcludeSetCache:
+    """
+    排重文件解析结果缓存（按文件内容哈希，磁盘 + 进程内）
+
+    磁盘上每个文件内容一个 .ids 文件，命中时更新修改时间；写入新结果时删除超过 max_age 秒未使用的文件，
+    文件数超过 max_files 时再按最近使用时间删除最旧的。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_files: Optional[int] = None,
+                 max_age: Optional[float] = None):
+        """
+        Args:
+            cache_dir: 缓存目录，默认使用配置文件中的值
+            max_files: 磁盘上最多保留的解析结果数，默认使用配置文件中的值（0 表示不限制）
+            max_age: 解析结果超过多少秒未使用即删除，默认使用配置文件中的值（0 表示不限制）
+        """
+        self.cache_dir = Path(cache_dir or CACHE_CONFIG["exclude_dir"])
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_files = max_files if max_files is not None else CACHE_CONFIG["exclude_max_files"]
+        self.max_age = max_age if max_age is not None else CACHE_CONFIG["exclude_max_age"]
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest: str) -> Optional[Set[str]]:
+        """
+        查询缓存
+
+        Args:
+            digest: 文件内容哈希
+
+        Returns:
+            视频 ID 集合，未命中时返回 None
+        """
+        with self._lock:
+            if digest in self._memory:
+                self._memory.move_to_end(digest)
+                return self._memory[digest]
+        path = self.cache_dir / f"{digest}.ids"
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                ids = set(f.read().split())
+            # 修改时间记录最近使用时间（清理时按此判断）
+            os.utime(path)
+        except FileNotFoundError:
+            # 不存在，或刚被其他 worker 清理
+            return None
+        self._remember(digest, ids)
+        return self._memory.get(digest, ids)
+
+    def put(self, digest: str, ids: Set[str]) -> None:
+        """
+        保存解析结果（先写临时文件再改名，多个 worker 同时写入也不会读到半个文件）
+
+        Args:
+            digest: 文件内容哈希
+            ids: 视频 ID 集合
+        """
+        path = self.cache_dir / f"{digest}.ids"
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(ids))
+        os.replace(tmp_path, path)
+        self._remember(digest, ids)
+        self.prune()
+
+    def prune(self) -> int:
+        """
+        删除超过 max_age 秒未使用的解析结果，文件数超过 max_files 时再删除最旧的
+
+        Returns:
+            删除的文件数
+        """
+        entries = []
+        for path in self.cache_dir.glob('*.ids'):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        entries.sort(reverse=True)
+        expired = []
+        if self.max_age:
+            cutoff = time.time() - self.max_age
+            expired = [path for mtime, path in entries if mtime < cutoff]
+            entries = [(mtime, path) for mtime, path in entries if mtime >= cutoff]
+        if self.max_files and len(entries) > self.max_files:
+            expired.extend(path for _, path in entries[self.max_files:])
+        for path in expired:
+            path.unlink(missing_ok=True)
+        if expired:
+            logger.info(f"已清理 {len(expired)} 个排重文件解析缓存")
+        return len(expired)
+
+    def _remember(self, digest: str, ids: Set[str]) -> None:
+        with self._lock:
+            # 同一个集合会被多个任务共用，保存为不可变集合
+            self._memory[digest] = frozenset(ids)
+            self._memory.move_to_end(digest)
+            while len(self._memory) > MEMORY_CACHE_SIZE:
+                self._memory.popitem(last=False)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_exclude_cache() -> ExcludeSetCache:
+    """
+    获取进程内共享的排重解析缓存
+
+    Returns:
+        缓存实例
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ExcludeSetCache()
+        return _default_cache
+
+
+def load_exclude_ids(file_path: str, use_cache: bool = True) -> Set[str]:
+    """
+    读取排重文件中的全部视频 ID
+
+    Args:
+        file_path: 排重文件路径
+        use_cache: 是否使用解析结果缓存（相同内容的文件只解析一次）
+
+    Returns:
+        视频 ID 集合
+    """
+    cache = get_exclude_cache() if use_cache else None
+    digest = file_sha1(file_path) if cache is not None else None
+    if cache is not None:
+        ids = cache.get(digest)
+        CACHE_REQUESTS.inc(cache='exclude', result='hit' if ids is not None else 'miss')
+        if ids is not None:
+            logger.info(f"排重文件内容未变化，使用缓存的解析结果：{len(ids)} 个视频 ID")
+            return ids
+
+    ids = set(iter_exclude_ids(file_path))
+    if cache is not None:
+        cache.put(digest, ids)
+    return ids
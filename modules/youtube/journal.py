@@ -0,0 +1,101 @@
+"""
+抓取任务日志（断点续传）模块
+每获取完一个视频就追加写入磁盘，任务中断后使用相同的任务标识重新运行即可跳过已完成的视频
+"""
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from core.config import CACHE_CONFIG
+from core.logger import setup_logger
+
+logger = setup_logger("youtube_journal")
+
+
+class ScrapeJournal:
+    """抓取任务日志（JSONL，每行一条已完成的视频信息）"""
+
+    def __init__(self, job_key: str, journal_dir: Optional[str] = None):
+        """
+        初始化任务日志
+
+        Args:
+            job_key: 任务标识（相同标识的任务共享同一份日志）
+            journal_dir: 日志目录，默认使用配置文件中的值
+        """
+        self.job_key = job_key
+        directory = Path(journal_dir or CACHE_CONFIG["journal_dir"])
+        directory.mkdir(parents=True, exist_ok=True)
+        safe_name = hashlib.sha1(job_key.encode('utf-8')).hexdigest()
+        self.path = directory / f"{safe_name}.jsonl"
+        self._lock = threading.Lock()
+        self._file = None
+
+    @staticmethod
+    def make_key(channel_url: str, **options) -> str:
+        """
+        根据频道和抓取参数生成任务标识
+
+        Args:
+            channel_url: 频道上传列表 URL
+            **options: 影响结果的抓取参数（如 include_date、max_videos）
+
+        Returns:
+            任务标识
+        """
+        parts = [channel_url] + [f"{k}={options[k]}" for k in sorted(options)]
+        return '|'.join(parts)
+
+    def load(self) -> Dict[str, dict]:
+        """
+        读取已完成的视频信息
+
+        Returns:
+            视频 ID -> 视频信息
+        """
+        done = {}
+        if not self.path.exists():
+            return done
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 进程被强制终止时最后一行可能不完整，直接忽略
+                    continue
+                if record.get('video_id'):
+                    done[record['video_id']] = record
+        if done:
+            logger.info(f"从任务日志恢复 {len(done)} 条已完成的视频：{self.path.name}")
+        return done
+
+    def append(self, record: dict) -> None:
+        """
+        追加一条已完成的视频信息（立即刷新到磁盘）
+
+        Args:
+            record: 视频信息
+        """
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        """关闭日志文件（保留日志，可用于下次续传）"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def complete(self) -> None:
+        """任务成功完成：关闭并删除日志"""
+        self.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
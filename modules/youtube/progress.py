@@ -0,0 +1,259 @@
+"""
+抓取进度跟踪模块
+根据真实事件（列表翻页、得到列表条目、获取到发布时间、产出结果）计算进度、速率和预计剩余时间，
+长时间没有任何进展时判定为停滞并终止抓取；调用方取消时同样在下一个事件处终止
+"""
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from core.metrics import registry
+
+SCRAPES_STALLED = registry.counter('tube2lm_scrapes_stalled_total', '因停滞被终止的抓取次数')
+
+# 速率按最近多少秒内的事件计算
+RATE_WINDOW = 15.0
+# 两次进度回调之间的最短间隔（秒）
+REPORT_INTERVAL = 0.5
+
+
+class ScrapeStalledError(RuntimeError):
+    """抓取停滞：超过 stall_timeout 秒没有任何进展"""
+
+
+class ScrapeCancelledError(RuntimeError):
+    """抓取被调用方取消（cancel_event 已设置）"""
+
+
+class ProgressTracker:
+    """
+    单次频道抓取的进度跟踪器（线程安全）
+
+    事件：
+        page_requested  yt-dlp 请求列表分页（来自 YtDlpLogger 的 "Downloading ..." 提示）
+        activity        其他网络请求（只用于停滞检查，不算进展）
+        entry           得到一个列表条目
+        enriched        一个视频的发布时间已获取（或来自缓存 / 断点）
+        emitted         产出一条结果
+        skipped         一条结果被排重跳过
+        shard_progress  分片模式下某一段完成了若干个视频（计入 enriched）
+    """
+
+    def __init__(self, report: Callable, target: int, include_date: bool = False,
+                 stall_timeout: Optional[float] = None, cancel_event: Optional[threading.Event] = None):
+        """
+        Args:
+            report: 进度回调 (stage, progress, message, current, total, estimated_time, stats)
+            target: 最多抓取的视频数（列表读完之前用于估算总数）
+            include_date: 是否获取发布时间（影响提示文字）
+            stall_timeout: 超过多少秒没有进展判定为停滞，0 或 None 表示不检查
+            cancel_event: 设置后在下一个事件（包括 yt-dlp 的下一次网络请求）处抛出 ScrapeCancelledError
+        """
+        self.report = report
+        self.target = target
+        self.include_date = include_date
+        self.stall_timeout = stall_timeout or 0
+        self.cancel_event = cancel_event
+        self.started_at = time.monotonic()
+        self.last_progress_at = self.started_at
+        self.counts = {'pages': 0, 'entries': 0, 'enriched': 0, 'emitted': 0, 'skipped': 0}
+        self.listing_done = False
+        self.stalled = False
+        self.shards = None  # 分片模式：段序号 -> [已完成数, 视频数]
+        self._events = {kind: deque() for kind in self.counts}
+        self._last_report = 0.0
+        self._last_page_note = None
+        self._lock = threading.Lock()
+
+    # ---------- 事件 ----------
+
+    def page_requested(self, message: str = '') -> None:
+        """
+        yt-dlp 发起网络请求：列表分页（[youtube:tab]）计为翻页，其余只算活动
+
+        yt-dlp 重试时输出与上一次相同的提示，重复的提示不算进展（一直重试同一页会被判定为停滞）
+        """
+        self.check()
+        if message.startswith('[youtube:tab]') and message != self._last_page_note:
+            self._last_page_note = message
+            self._event('pages')
+            self._maybe_report()
+
+    def activity(self, message: str = '') -> None:
+        """其他网络请求（例如单个视频），只检查是否停滞"""
+        self.check()
+
+    def entry(self) -> None:
+        self._check_cancelled()
+        self._event('entries')
+        self._maybe_report()
+
+    def enriched(self, count: int = 1) -> None:
+        self._event('enriched', count)
+
+    def shard_progress(self, index: int, done: int, total: int) -> None:
+        """
+        分片模式：第 index 段已完成 done 个视频（结果按段的顺序产出，进度按各段的实际完成数计算）
+
+        Args:
+            index: 段序号（从 0 开始）
+            done: 该段已完成的视频数（只增不减，过时的回报被忽略）
+            total: 该段的视频数
+        """
+        with self._lock:
+            if self.shards is None:
+                self.shards = {}
+            previous = self.shards.get(index, [0, total])[0]
+            self.shards[index] = [max(previous, done), total]
+        if done > previous:
+            self.enriched(done - previous)
+            self._maybe_report()
+
+    def emitted(self) -> None:
+        self._event('emitted')
+        self._maybe_report()
+
+    def skipped(self) -> None:
+        self._event('skipped')
+
+    def finish_listing(self) -> None:
+        """列表已完整读取（之后用实际条目数作为总数）"""
+        self.listing_done = True
+
+    def _event(self, kind: str, count: int = 1) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self.counts[kind] += count
+            events = self._events[kind]
+            events.extend(itertools.repeat(now, count))
+            while events and now - events[0] > RATE_WINDOW:
+                events.popleft()
+            self.last_progress_at = now
+
+    # ---------- 停滞检查 ----------
+
+    def idle_seconds(self) -> float:
+        """距离上一次进展的秒数"""
+        return time.monotonic() - self.last_progress_at
+
+    def _check_cancelled(self) -> None:
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ScrapeCancelledError("抓取已取消")
+
+    def check(self) -> None:
+        """
+        检查是否已取消或停滞（之后每次调用都会抛出异常，yt-dlp 吞掉异常后调用方仍能发现）
+
+        Raises:
+            ScrapeCancelledError: cancel_event 已设置
+            ScrapeStalledError: 超过 stall_timeout 秒没有进展
+        """
+        self._check_cancelled()
+        if self.stalled or (self.stall_timeout and self.idle_seconds() > self.stall_timeout):
+            if not self.stalled:
+                self.stalled = True
+                SCRAPES_STALLED.inc()
+            raise ScrapeStalledError(f"抓取停滞：超过 {self.stall_timeout:.0f} 秒没有任何进展，已终止")
+
+    # ---------- 速率和估算 ----------
+
+    def rate(self, kind: str) -> float:
+        """
+        最近 RATE_WINDOW 秒内的事件速率（次/秒）
+
+        Args:
+            kind: 事件类型（pages、entries、enriched、emitted、skipped）
+        """
+        now = time.monotonic()
+        with self._lock:
+            events = self._events[kind]
+            while events and now - events[0] > RATE_WINDOW:
+                events.popleft()
+            window = min(RATE_WINDOW, now - self.started_at)
+            return len(events) / window if window > 0 else 0.0
+
+    @property
+    def processed(self) -> int:
+        """已处理的条目数（产出或已获取发布时间 + 排重跳过；分片模式下各段完成后才按顺序产出）"""
+        return max(self.counts['emitted'], self.counts['enriched']) + self.counts['skipped']
+
+    @property
+    def total(self) -> int:
+        """预计总条目数：列表读完之前按 target 估算"""
+        listed = self.counts['entries']
+        total = listed if self.listing_done else max(listed, self.target)
+        return max(total, self.processed)
+
+    def eta(self) -> Optional[int]:
+        """
+        按最近的处理速率估算剩余秒数
+
+        Returns:
+            秒数；处理的条目太少、无法估算时返回 None
+        """
+        if self.processed < 5:
+            return None
+        rate = max(self.rate('emitted'), self.rate('enriched')) + self.rate('skipped')
+        if rate <= 0:
+            elapsed = time.monotonic() - self.started_at
+            rate = self.processed / elapsed if elapsed > 0 else 0.0
+        if rate <= 0:
+            return None
+        return int((self.total - self.processed) / rate)
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            各事件计数、速率（次/秒）、已用时间和距上次进展的秒数；分片模式下 shards 为各段的 [已完成数, 视频数]
+        """
+        stats = {
+            'pages': self.counts['pages'],
+            'entries': self.counts['entries'],
+            'enriched': self.counts['enriched'],
+            'emitted': self.counts['emitted'],
+            'skipped': self.counts['skipped'],
+            'pages_per_second': round(self.rate('pages'), 2),
+            'videos_per_second': round(max(self.rate('emitted'), self.rate('enriched')) + self.rate('skipped'), 2),
+            'enriched_per_second': round(self.rate('enriched'), 2),
+            'elapsed_seconds': round(time.monotonic() - self.started_at, 1),
+            'idle_seconds': round(self.idle_seconds(), 1),
+            'last_progress_at': time.time() - self.idle_seconds(),
+        }
+        if self.shards is not None:
+            with self._lock:
+                stats['shards'] = [list(self.shards[index]) for index in sorted(self.shards)]
+        return stats
+
+    # ---------- 进度回调 ----------
+
+    def _maybe_report(self, force: bool = False) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_report < REPORT_INTERVAL:
+                return
+            self._last_report = now
+
+        stats = self.stats()
+        if not self.processed:
+            # 还没有结果：处于列表阶段，进度在 15%-25% 之间随翻页增长
+            pages = stats['pages']
+            if pages:
+                message = f"正在获取视频列表：已获取 {pages} 页，{stats['entries']} 个条目（{stats['pages_per_second']:.1f} 页/秒）"
+            else:
+                message = '正在连接 YouTube 服务器...'
+            self.report('fetching', 15 + min(pages, 10), message, 0, 0, None, stats)
+            return
+
+        total = self.total
+        stage_msg = '正在提取视频信息和发布时间' if self.include_date else '正在提取视频链接'
+        self.report(
+            'extracting',
+            30 + int(self.processed / total * 55),
+            f"{stage_msg}... (已抓取 {self.processed}/{total}，{stats['videos_per_second']:.1f} 条/秒)",
+            self.processed,
+            total,
+            self.eta(),
+            stats
+        )
@@ -0,0 +1,332 @@
+"""
+自适应限速模块
+进程内所有抓取共享：令牌桶控制请求速率，AIMD（加性增、乘性减）根据 429/5xx 和网络错误调整速率与并发数
+"""
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from core.config import RATE_LIMIT_CONFIG
+from core.logger import setup_logger
+
+logger = setup_logger("youtube_rate_limiter")
+
+# 被 YouTube 限流的错误特征（429、5xx、人机验证）
+THROTTLE_PATTERN = re.compile(
+    r"HTTP Error (?:429|5\d\d)|Too Many Requests|rate.?limit|confirm you.?re not a bot|Service Unavailable",
+    re.IGNORECASE
+)
+
+# 网络层错误的特征（超时、连接被重置或拒绝等），与限流一样视为拥塞
+TRANSPORT_PATTERN = re.compile(
+    r"timed? ?out|Connection (?:reset|refused|aborted)|Remote end closed|IncompleteRead|"
+    r"Temporary failure in name resolution|urlopen error|SSL: ",
+    re.IGNORECASE
+)
+
+# yt-dlp 发起网络请求前输出的提示（"[youtube:tab] xxx: Downloading API JSON page 2" 等）
+REQUEST_NOTE_PATTERN = re.compile(r"^\[[\w:]+\] .*: Downloading ")
+
+OK = 'ok'
+THROTTLED = 'throttled'
+TRANSPORT = 'transport'
+ERROR = 'error'
+
+# 同一次提取中出现多种错误时取最严重的：限流 > 网络错误 > 普通提取错误
+_SEVERITY = {OK: 0, ERROR: 1, TRANSPORT: 2, THROTTLED: 3}
+
+
+def classify_error(message: str) -> str:
+    """
+    判断错误信息属于限流、网络错误还是普通提取错误（私有、已删除的视频等）
+
+    Args:
+        message: 错误信息
+
+    Returns:
+        THROTTLED、TRANSPORT 或 ERROR
+    """
+    if THROTTLE_PATTERN.search(message or ''):
+        return THROTTLED
+    if TRANSPORT_PATTERN.search(message or ''):
+        return TRANSPORT
+    return ERROR
+
+
+class AdaptiveRateLimiter:
+    """自适应限速器（线程安全）"""
+
+    def __init__(self, rate: float = None, burst: int = None, concurrency: int = None,
+                 min_rate: float = None, max_rate: float = None,
+                 min_concurrency: int = None, max_concurrency: int = None,
+                 backoff_base: float = None, backoff_max: float = None, decrease_cooldown: float = None):
+        """
+        初始化限速器（未指定的参数使用配置文件中的值）
+
+        Args:
+            rate: 初始请求速率（次/秒）
+            burst: 令牌桶容量（允许的突发请求数）
+            concurrency: 初始并发数（同时进行的视频提取数）
+            min_rate: 最低请求速率
+            max_rate: 最高请求速率
+            min_concurrency: 最低并发数
+            max_concurrency: 最高并发数
+            backoff_base: 被限流后暂停的基础秒数（连续限流时指数增长）
+            backoff_max: 最长暂停秒数
+            decrease_cooldown: 两次降低速率或并发数之间至少间隔的秒数（同时返回的一批 429 只降一次）
+        """
+        config = RATE_LIMIT_CONFIG
+        self.rate = rate or config["requests_per_second"]
+        self.burst = burst or config["burst"]
+        self.min_rate = min_rate or config["min_requests_per_second"]
+        self.max_rate = max_rate or config["max_requests_per_second"]
+        self.concurrency = concurrency or config["concurrency"]
+        self.min_concurrency = min_concurrency or config["min_concurrency"]
+        self.max_concurrency = max_concurrency or config["max_concurrency"]
+        self.backoff_base = backoff_base or config["backoff_base"]
+        self.backoff_max = backoff_max or config["backoff_max"]
+        self.decrease_cooldown = decrease_cooldown if decrease_cooldown is not None else config["decrease_cooldown"]
+
+        self._cond = threading.Condition()
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._active = 0
+        self._paused_until = 0.0
+        self._consecutive_throttles = 0
+        self._successes_since_increase = 0
+        self._last_decrease = float('-inf')
+
+        self.counters = {
+            'requests': 0,
+            'successes': 0,
+            'throttled': 0,
+            'transport_errors': 0,
+            'errors': 0,
+            'backoffs': 0,
+            'backoff_seconds': 0.0,
+            'rate_increases': 0,
+            'rate_decreases': 0,
+            'wait_seconds': 0.0,  # 各线程等待令牌和并发名额的累计时间
+        }
+
+    def _refill(self, now: float) -> None:
+        """补充令牌（调用方需持有锁）"""
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def wait_token(self) -> None:
+        """等待一个请求令牌（被限流暂停期间也会在这里等待）"""
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    self._cond.wait(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.counters['requests'] += 1
+                    break
+                self._cond.wait((1 - self._tokens) / self.rate)
+            self.counters['wait_seconds'] += time.monotonic() - start
+
+    def _acquire_slot(self) -> None:
+        """等待一个并发名额"""
+        start = time.monotonic()
+        with self._cond:
+            while self._active >= self.concurrency:
+                self._cond.wait()
+            self._active += 1
+            self.counters['wait_seconds'] += time.monotonic() - start
+
+    def _release_slot(self) -> None:
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def record(self, outcome: str) -> None:
+        """
+        反馈一次请求结果，调整速率和并发数
+
+        Args:
+            outcome: OK、THROTTLED、TRANSPORT 或 ERROR
+        """
+        with self._cond:
+            if outcome == THROTTLED:
+                self.counters['throttled'] += 1
+                self._on_congestion(throttled=True)
+            elif outcome == TRANSPORT:
+                self.counters['transport_errors'] += 1
+                self._on_congestion(throttled=False)
+            elif outcome == ERROR:
+                # 普通提取错误（私有、已删除的视频等）与拥塞无关，不调整速率和并发数
+                self.counters['errors'] += 1
+            else:
+                self.counters['successes'] += 1
+                self._consecutive_throttles = 0
+                self._successes_since_increase += 1
+                # 加性增：每连续成功一个"窗口"（当前并发数个请求）提高一次
+                if self._successes_since_increase >= max(self.concurrency, 10):
+                    self._successes_since_increase = 0
+                    if self.rate < self.max_rate or self.concurrency < self.max_concurrency:
+                        self.rate = min(self.max_rate, self.rate + 1)
+                        self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+                        self.counters['rate_increases'] += 1
+            self._cond.notify_all()
+
+    def _on_congestion(self, throttled: bool) -> None:
+        """
+        拥塞：被限流时速率和并发数减半，并暂停所有请求一段时间；网络错误时并发数减一，不暂停
+        （调用方需持有锁）
+
+        同一波拥塞中的多个失败（例如同时在途的请求一起返回 429）只降一次：暂停期间和上次降低后
+        decrease_cooldown 秒内不再降低。
+        """
+        self._successes_since_increase = 0
+        now = time.monotonic()
+        if now < self._paused_until or now - self._last_decrease < self.decrease_cooldown:
+            return
+        self._last_decrease = now
+        if not throttled:
+            self.concurrency = max(self.min_concurrency, self.concurrency - 1)
+            return
+
+        self._consecutive_throttles += 1
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+        self.counters['rate_decreases'] += 1
+
+        backoff = min(self.backoff_max, self.backoff_base * (2 ** (self._consecutive_throttles - 1)))
+        if now + backoff > self._paused_until:
+            self._paused_until = now + backoff
+            self._tokens = 0
+            self.counters['backoffs'] += 1
+            self.counters['backoff_seconds'] += backoff
+            logger.warning(
+                f"检测到 YouTube 限流，暂停 {backoff:.1f} 秒；"
+                f"速率降为 {self.rate:.1f} 次/秒，并发数降为 {self.concurrency}"
+            )
+
+    @contextmanager
+    def slot(self):
+        """
+        获取一个并发名额执行一次视频提取，结束时根据结果调整速率
+
+        用法：
+            with limiter.slot() as result:
+                ...
+                result['outcome'] = THROTTLED  # 未设置时默认为 OK
+
+        Yields:
+            结果字典，调用方可写入 outcome
+        """
+        self._acquire_slot()
+        result = {'outcome': OK}
+        try:
+            yield result
+        except Exception as e:
+            result['outcome'] = classify_error(str(e))
+            raise
+        finally:
+            self._release_slot()
+            self.record(result['outcome'])
+
+    def stats(self) -> dict:
+        """
+        获取限速统计信息
+
+        Returns:
+            当前速率、并发数及各项计数
+        """
+        with self._cond:
+            return {
+                'rate': round(self.rate, 2),
+                'concurrency': self.concurrency,
+                'active': self._active,
+                'paused_seconds_left': round(max(0.0, self._paused_until - time.monotonic()), 1),
+                **{k: round(v, 2) if isinstance(v, float) else v for k, v in self.counters.items()},
+            }
+
+
+class YtDlpLogger:
+    """
+    传给 yt-dlp 的 logger：转发日志，并把网络请求和错误反馈给限速器
+
+    yt-dlp 在每次网络请求前都会输出 "Downloading ..." 提示，在这里等待令牌即可
+    对所有请求（包括列表翻页）限速。begin()/end() 之间的错误按线程记录，由调用方
+    通过 slot() 反馈；其余时间（如列表翻页）检测到限流时直接反馈给限速器。
+    on_request 在每次网络请求前以提示文字调用（用于统计翻页进度和检查是否停滞）。
+    """
+
+    def __init__(self, limiter: Optional[AdaptiveRateLimiter],
+                 on_request: Optional[Callable[[str], None]] = None):
+        self.limiter = limiter
+        self.on_request = on_request
+        self._local = threading.local()
+
+    def begin(self) -> None:
+        """开始记录当前线程的提取结果"""
+        self._local.tracking = True
+        self._local.outcome = OK
+
+    def end(self) -> str:
+        """
+        结束记录
+
+        Returns:
+            begin() 之后当前线程的提取结果（OK、THROTTLED、TRANSPORT 或 ERROR）
+        """
+        self._local.tracking = False
+        return getattr(self._local, 'outcome', OK)
+
+    def _observe(self, message: str, is_error: bool) -> None:
+        kind = classify_error(message)
+        if kind == ERROR and not is_error:
+            return
+        if getattr(self._local, 'tracking', False):
+            if _SEVERITY[kind] > _SEVERITY[getattr(self._local, 'outcome', OK)]:
+                self._local.outcome = kind
+        elif kind != ERROR and self.limiter is not None:
+            self.limiter.record(kind)
+
+    def debug(self, message: str) -> None:
+        if REQUEST_NOTE_PATTERN.match(message):
+            if self.on_request is not None:
+                self.on_request(message)
+            if self.limiter is not None:
+                self.limiter.wait_token()
+        logger.debug(message)
+
+    def info(self, message: str) -> None:
+        logger.debug(message)
+
+    def warning(self, message: str) -> None:
+        self._observe(message, is_error=False)
+        logger.debug(message)
+
+    def error(self, message: str) -> None:
+        self._observe(message, is_error=True)
+        logger.warning(message)
+
+
+_default_limiter = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> Optional[AdaptiveRateLimiter]:
+    """
+    获取进程内共享的限速器
+
+    Returns:
+        限速器实例；配置中禁用限速时返回 None
+    """
+    global _default_limiter
+    if not RATE_LIMIT_CONFIG["enabled"]:
+        return None
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = AdaptiveRateLimiter()
+        return _default_limiter
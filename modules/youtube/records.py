@@ -0,0 +1,207 @@
+"""
+抓取结果的紧凑表示
+VideoRecord 为单条视频信息（__slots__，URL 按需生成）；VideoRecords 按列保存多条结果：
+视频 ID 为 8 字节整数、发布时间为 int32 天数、日期精度为 1 字节，每条约 13 字节
+"""
+from array import array
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from .exclude import URL_ID_PATTERN
+from .seen_index import decode_video_id, encode_video_id
+
+WATCH_URL_PREFIX = 'https://www.youtube.com/watch?v='
+
+# 发布时间的精度（从精确到粗略）：exact 来自单个视频提取；其余来自列表中的相对时间
+# （"3 days ago"、"2 weeks ago"……），视频越早，YouTube 给出的相对时间越粗略
+DATE_PRECISIONS = ('exact', 'day', 'week', 'month', 'year')
+
+# 发布时间未知（'N/A'）
+NO_DATE = -2 ** 31
+_EPOCH = date(1970, 1, 1).toordinal()
+
+
+def date_to_days(upload_date: Optional[str]) -> Optional[int]:
+    """
+    'YYYYMMDD' -> 1970-01-01 起的天数
+
+    Returns:
+        天数；为空时返回 NO_DATE，不是 YYYYMMDD 格式时返回 None
+    """
+    if not upload_date or upload_date == 'N/A':
+        return NO_DATE
+    if len(upload_date) != 8 or not upload_date.isdigit():
+        return None
+    try:
+        return date(int(upload_date[:4]), int(upload_date[4:6]), int(upload_date[6:])).toordinal() - _EPOCH
+    except ValueError:
+        return None
+
+
+def days_to_date(days: int) -> Optional[str]:
+    """1970-01-01 起的天数 -> 'YYYYMMDD'（NO_DATE 返回 None）"""
+    if days == NO_DATE:
+        return None
+    day = date.fromordinal(days + _EPOCH)
+    return f"{day.year:04d}{day.month:02d}{day.day:02d}"
+
+
+class VideoRecord:
+    """
+    单条视频信息
+
+    Attributes:
+        video_id: 视频 ID（无法确定时为 'N/A'）
+        upload_date: 发布时间 'YYYYMMDD'，未获取或获取失败时为 None
+        date_precision: 日期精度（DATE_PRECISIONS 之一，只有近似日期模式才有），否则为 None
+    """
+
+    __slots__ = ('video_id', 'upload_date', 'date_precision', '_url')
+
+    def __init__(self, video_id: str, upload_date: Optional[str] = None, date_precision: Optional[str] = None,
+                 url: Optional[str] = None):
+        """
+        Args:
+            video_id: 视频 ID
+            upload_date: 发布时间 'YYYYMMDD'（'N/A' 视为未知）
+            date_precision: 日期精度
+            url: 视频 URL，与 WATCH_URL_PREFIX + video_id 相同时不需要传入
+        """
+        self.video_id = video_id
+        self.upload_date = upload_date if upload_date != 'N/A' else None
+        self.date_precision = date_precision
+        self._url = url if url and url != WATCH_URL_PREFIX + video_id else None
+
+    @property
+    def url(self) -> str:
+        return self._url or WATCH_URL_PREFIX + self.video_id
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'VideoRecord':
+        """{'url', 'video_id'[, 'upload_date', 'date_precision']} -> VideoRecord"""
+        return cls(data.get('video_id') or 'N/A', data.get('upload_date'), data.get('date_precision'),
+                   data.get('url'))
+
+    @classmethod
+    def from_url(cls, url: str) -> 'VideoRecord':
+        """视频 URL -> VideoRecord（URL 中没有视频 ID 时为 'N/A'）"""
+        match = URL_ID_PATTERN.search(url)
+        return cls(match.group(1) if match else 'N/A', url=url)
+
+    def to_dict(self, include_date: bool = True, include_precision: bool = False) -> dict:
+        """
+        Args:
+            include_date: 是否包含 upload_date（未知时为 'N/A'）
+            include_precision: 是否包含 date_precision
+
+        Returns:
+            {'url', 'video_id'[, 'upload_date'][, 'date_precision']}
+        """
+        data = {'url': self.url, 'video_id': self.video_id}
+        if include_date:
+            data['upload_date'] = self.upload_date or 'N/A'
+        if include_precision:
+            data['date_precision'] = self.date_precision
+        return data
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, VideoRecord):
+            return NotImplemented
+        return (self.video_id, self.upload_date, self.date_precision, self.url) == \
+            (other.video_id, other.upload_date, other.date_precision, other.url)
+
+    def __repr__(self) -> str:
+        return f"VideoRecord({self.video_id!r}, {self.upload_date!r}, {self.date_precision!r})"
+
+
+def as_record(item: Union[VideoRecord, dict, str]) -> VideoRecord:
+    """VideoRecord、视频信息字典或 URL 字符串 -> VideoRecord"""
+    if isinstance(item, VideoRecord):
+        return item
+    if isinstance(item, dict):
+        return VideoRecord.from_dict(item)
+    return VideoRecord.from_url(str(item))
+
+
+class VideoRecords:
+    """
+    按列保存的抓取结果（scrape_channel 的返回值，可直接传给 save_urls）
+
+    支持 len()、迭代和下标访问（按需生成 VideoRecord）。视频 ID 不是标准的 11 位 ID、
+    URL 不是标准的观看地址或发布时间不是 YYYYMMDD 格式的少数条目另外保存原值。
+    """
+
+    def __init__(self, include_date: bool = False, include_precision: bool = False,
+                 records: Iterable[VideoRecord] = ()):
+        """
+        Args:
+            include_date: 结果是否包含发布时间（决定输出列）
+            include_precision: 结果是否包含日期精度（近似日期模式）
+            records: 初始数据
+        """
+        self.include_date = include_date
+        self.include_precision = include_precision
+        self._ids = array('Q')
+        self._dates = array('i')
+        self._precisions = bytearray()  # 0 表示没有精度，否则为 DATE_PRECISIONS 的下标 + 1
+        self._extras: Dict[int, VideoRecord] = {}
+        self.extend(records)
+
+    def append(self, record: VideoRecord) -> None:
+        """追加一条视频信息"""
+        encoded = encode_video_id(record.video_id)
+        days = date_to_days(record.upload_date)
+        precision = record.date_precision
+        if encoded is None or days is None or record._url is not None or \
+                (precision is not None and precision not in DATE_PRECISIONS):
+            self._extras[len(self._ids)] = record
+            encoded, days, precision = 0, NO_DATE, None
+        self._ids.append(encoded)
+        self._dates.append(days)
+        self._precisions.append(DATE_PRECISIONS.index(precision) + 1 if precision else 0)
+
+    def extend(self, records: Iterable[VideoRecord]) -> None:
+        for record in records:
+            self.append(record)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _get(self, index: int) -> VideoRecord:
+        if self._extras:
+            extra = self._extras.get(index)
+            if extra is not None:
+                return extra
+        precision = self._precisions[index]
+        return VideoRecord(decode_video_id(self._ids[index]), days_to_date(self._dates[index]),
+                           DATE_PRECISIONS[precision - 1] if precision else None)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('VideoRecords index out of range')
+        return self._get(index)
+
+    def __iter__(self) -> Iterator[VideoRecord]:
+        for index in range(len(self)):
+            yield self._get(index)
+
+    def urls(self) -> Iterator[str]:
+        """按顺序产出视频 URL"""
+        for record in self:
+            yield record.url
+
+    def to_dicts(self) -> List[dict]:
+        """转换为字典列表（JSON 序列化用，见 VideoRecord.to_dict）"""
+        return [record.to_dict(self.include_date, self.include_precision) for record in self]
+
+    @property
+    def nbytes(self) -> int:
+        """列数据占用的字节数（不含少数另外保存的条目）"""
+        return self._ids.itemsize * len(self._ids) + self._dates.itemsize * len(self._dates) + len(self._precisions)
+
+    def __repr__(self) -> str:
+        return f"VideoRecords({len(self)} 条, include_date={self.include_date}, include_precision={self.include_precision})"
@@ -0,0 +1,386 @@
+"""
+yt-dlp 录制 / 回放模块
+把 yt-dlp 的提取结果录制为磁带（cassette）文件，离线回放时模拟分页、网络延迟和错误，
+不访问 YouTube 也能测试和比较抓取性能（见 benchmarks/scraper.py）
+
+用法：
+    cassette = Cassette()
+    scraper = YouTubeScraper(ydl_factory=cassette.recorder())     # 录制真实抓取
+    ...
+    cassette.save('channel.json.gz')
+
+    cassette = Cassette.load('channel.json.gz')
+    scraper = YouTubeScraper(ydl_factory=cassette.replayer(page_latency=0.2, video_latency=0.5))
+"""
+import gzip
+import json
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+from core.logger import setup_logger
+from .seen_index import decode_video_id
+
+logger = setup_logger("youtube_replay")
+
+CASSETTE_VERSION = 1
+
+# 录制时丢弃的大字段（格式列表、字幕、缩略图等），抓取器只用到 id / url / 发布时间
+DROP_KEYS = {
+    'formats', 'requested_formats', 'requested_downloads', 'thumbnails', 'automatic_captions',
+    'subtitles', 'heatmap', 'http_headers', 'fragments', '_format_sort_fields',
+}
+
+# yt-dlp 列表每页的条目数
+PAGE_SIZE = 30
+
+
+def _request_key(url: str, process: bool) -> str:
+    """同一 URL 的列表请求（process=False）和完整处理（process=True）分别录制"""
+    return f"{'process' if process else 'raw'}:{url}"
+
+
+def _compact(info: dict) -> dict:
+    """去掉大字段，只保留可 JSON 序列化的元数据"""
+    return {k: v for k, v in info.items() if k not in DROP_KEYS and k != 'entries'}
+
+
+def synthetic_video_id(i: int) -> str:
+    """
+    生成第 i 个合成视频 ID（合法的 11 位 ID，不同 i 互不相同）
+
+    Args:
+        i: 序号
+
+    Returns:
+        视频 ID
+    """
+    return decode_video_id((i * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF)
+
+
+class Cassette:
+    """录制的 yt-dlp 响应（请求 -> 提取结果），可保存为 JSON（.gz 结尾时压缩）"""
+
+    def __init__(self, responses: Optional[dict] = None, meta: Optional[dict] = None):
+        """
+        Args:
+            responses: 请求键 -> 提取结果
+            meta: 附加信息（录制时间、频道等）
+        """
+        self.responses = responses or {}
+        self.meta = meta or {}
+        self.requests = Counter()  # 回放统计：pages、videos、errors、throttled、misses
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # 分片模式下回放工厂随参数传给工作进程（各进程的回放统计互不相通）
+        return {'responses': self.responses, 'meta': self.meta}
+
+    def __setstate__(self, state):
+        self.__init__(state['responses'], state['meta'])
+
+    @classmethod
+    def load(cls, path) -> 'Cassette':
+        """
+        读取磁带文件
+
+        Args:
+            path: 文件路径（.gz 结尾时按 gzip 读取）
+
+        Returns:
+            磁带
+        """
+        path = Path(path)
+        opener = gzip.open if path.suffix == '.gz' else open
+        with opener(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != CASSETTE_VERSION:
+            raise ValueError(f"不支持的磁带版本：{data.get('version')}（当前版本 {CASSETTE_VERSION}）")
+        return cls(data.get('responses'), data.get('meta'))
+
+    def save(self, path) -> Path:
+        """
+        保存磁带文件
+
+        Args:
+            path: 文件路径（.gz 结尾时按 gzip 压缩）
+
+        Returns:
+            文件路径
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        opener = gzip.open if path.suffix == '.gz' else open
+        with self._lock:
+            data = {'version': CASSETTE_VERSION, 'meta': self.meta, 'responses': self.responses}
+            with opener(path, 'wt', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, default=str)
+        logger.info(f"已保存磁带：{path}（{len(self.responses)} 个请求）")
+        return path
+
+    def get(self, url: str, process: bool) -> Optional[dict]:
+        """查询录制的提取结果"""
+        return self.responses.get(_request_key(url, process))
+
+    def put(self, url: str, process: bool, info: dict) -> None:
+        """记录提取结果"""
+        with self._lock:
+            self.responses[_request_key(url, process)] = info
+
+    def count(self, kind: str, n: int = 1) -> None:
+        """累加回放统计"""
+        with self._lock:
+            self.requests[kind] += n
+
+    @classmethod
+    def synthetic(cls, upload_url: str, n_videos: int, listed: Optional[int] = None,
+                  newest: Optional[datetime] = None) -> 'Cassette':
+        """
+        生成合成频道的磁带（从新到旧，每 6 小时一个视频）
+
+        列表条目带有发布时间戳，只在请求开启 approximate_date 时回放（与 yt-dlp 相同）。
+
+        Args:
+            upload_url: 频道上传列表 URL（抓取器实际请求的地址）
+            n_videos: 频道视频总数（完整处理 / 单个视频请求可得到的数量，也是上传播放列表显示的视频数）
+            listed: 列表请求能得到的条目数（小于 n_videos 时模拟列表提前结束，触发备用方法），默认等于 n_videos
+            newest: 最新视频的发布时间，默认 2024-12-31 12:00（近似日期的精度取决于视频距今的时间）
+
+        Returns:
+            磁带
+        """
+        listed = n_videos if listed is None else listed
+        newest = newest or datetime(2024, 12, 31, 12)
+        cassette = cls(meta={'synthetic': True, 'upload_url': upload_url, 'n_videos': n_videos, 'listed': listed})
+        flat_entries, full_entries = [], []
+        for i in range(n_videos):
+            video_id = synthetic_video_id(i)
+            url = f"https://www.youtube.com/watch?v={video_id}"
+            uploaded_at = newest - timedelta(hours=6 * i)
+            upload_date = uploaded_at.strftime('%Y%m%d')
+            if i < listed:
+                flat_entries.append({
+                    '_type': 'url', 'ie_key': 'Youtube', 'id': video_id, 'url': url, 'title': f"Video {i}",
+                    'timestamp': int(uploaded_at.timestamp()),
+                })
+            video = {'id': video_id, 'title': f"Video {i}", 'upload_date': upload_date, 'webpage_url': url}
+            full_entries.append({**video, 'playlist_index': i + 1})
+            cassette.responses[_request_key(url, False)] = video
+        playlist = {
+            '_type': 'playlist', 'id': 'UCsynthetic', 'channel_id': 'UCsynthetic',
+            'title': 'Synthetic - Videos', 'webpage_url': upload_url,
+        }
+        cassette.responses[_request_key(upload_url, False)] = {**playlist, 'entries': flat_entries}
+        cassette.responses[_request_key(upload_url, True)] = {**playlist, 'entries': full_entries}
+        # 频道的上传播放列表（UU...）：只用到其中的视频总数
+        uploads_url = 'https://www.youtube.com/playlist?list=UUsynthetic'
+        cassette.responses[_request_key(uploads_url, False)] = {
+            '_type': 'playlist', 'id': 'UUsynthetic', 'title': 'Uploads from Synthetic',
+            'playlist_count': n_videos, 'webpage_url': uploads_url, 'entries': flat_entries,
+        }
+        return cassette
+
+    def recorder(self) -> Callable[[dict], 'RecordingYoutubeDL']:
+        """
+        Returns:
+            录制用的 ydl_factory（真实访问 YouTube，并把结果记录到本磁带）
+        """
+        return lambda params: RecordingYoutubeDL(self, params)
+
+    def replayer(self, page_latency: float = 0.0, video_latency: float = 0.0, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, page_size: int = PAGE_SIZE,
+                 seed: Optional[int] = None) -> Callable[[dict], 'ReplayYoutubeDL']:
+        """
+        Args:
+            page_latency: 每个列表分页的延迟（秒）
+            video_latency: 每个视频请求的延迟（秒）
+            error_rate: 视频请求返回提取错误的概率
+            throttle_rate: 视频请求返回 HTTP 429 的概率
+            page_size: 每个列表分页的条目数
+            seed: 随机种子（相同种子注入的错误相同）
+
+        Returns:
+            回放用的 ydl_factory
+        """
+        rng = random.Random(seed)
+        options = {
+            'page_latency': page_latency, 'video_latency': video_latency, 'error_rate': error_rate,
+            'throttle_rate': throttle_rate, 'page_size': page_size, 'rng': rng,
+        }
+        return ReplayFactory(self, options)
+
+
+class ReplayFactory:
+    """回放用的 ydl_factory（可以 pickle，分片模式下传给工作进程）"""
+
+    def __init__(self, cassette: Cassette, options: dict):
+        self.cassette = cassette
+        self.options = options
+
+    def __call__(self, params: dict) -> 'ReplayYoutubeDL':
+        return ReplayYoutubeDL(self.cassette, params, **self.options)
+
+
+class RecordingYoutubeDL:
+    """包装真实的 YoutubeDL：提取结果原样返回，同时记录到磁带（列表条目在被读取时才记录）"""
+
+    def __init__(self, cassette: Cassette, params: Optional[dict] = None):
+        import yt_dlp
+
+        self.cassette = cassette
+        self._ydl = yt_dlp.YoutubeDL(params)
+
+    @property
+    def params(self) -> dict:
+        return self._ydl.params
+
+    def extract_info(self, url: str, download: bool = False, process: bool = True):
+        info = self._ydl.extract_info(url, download=download, process=process)
+        if not info:
+            return info
+        if 'entries' not in info:
+            self.cassette.put(url, process, _compact(info))
+            return info
+        recorded = []
+        self.cassette.put(url, process, {**_compact(info), 'entries': recorded})
+        entries = info.get('entries') or []
+        if isinstance(entries, list):
+            recorded.extend(_compact(e) if e else e for e in entries)
+        else:
+            info['entries'] = self._tee(entries, recorded)
+        return info
+
+    @staticmethod
+    def _tee(entries, recorded: List) -> Iterator:
+        for entry in entries:
+            recorded.append(_compact(entry) if entry else entry)
+            yield entry
+
+    def close(self) -> None:
+        self._ydl.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ReplayYoutubeDL:
+    """
+    回放磁带的 YoutubeDL 替身（接口与抓取器用到的 YoutubeDL 部分一致）
+
+    列表请求按分页惰性产出条目，每页前输出与 yt-dlp 相同的 "Downloading ..." 提示（限速器据此等待令牌）；
+    完整处理（process=True）逐个视频计入延迟；注入的错误与 ignoreerrors 下的 yt-dlp 一样
+    通过 logger.error 报告并返回 None。
+    """
+
+    def __init__(self, cassette: Cassette, params: Optional[dict] = None, page_latency: float = 0.0,
+                 video_latency: float = 0.0, error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 page_size: int = PAGE_SIZE, rng: Optional[random.Random] = None):
+        self.cassette = cassette
+        self.params = params or {}
+        self.page_latency = page_latency
+        self.video_latency = video_latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.page_size = max(1, page_size)
+        self.rng = rng or random.Random()
+        extractor_args = self.params.get('extractor_args') or {}
+        self._approximate_date = 'approximate_date' in (extractor_args.get('youtubetab') or {})
+
+    @property
+    def _logger(self):
+        # 与 yt-dlp 一样在输出时才读取 logger（实例池借出时会替换）
+        return self.params.get('logger')
+
+    def _note(self, message: str) -> None:
+        if self._logger is not None:
+            self._logger.debug(message)
+
+    def _fail(self, message: str):
+        """与 ignoreerrors 下的 yt-dlp 一样报告错误；未设置 ignoreerrors 时抛出 DownloadError"""
+        message = f"ERROR: {message}"
+        if not self.params.get('ignoreerrors'):
+            from yt_dlp.utils import DownloadError
+
+            raise DownloadError(message)
+        if self._logger is not None:
+            self._logger.error(message)
+        return None
+
+    def extract_info(self, url: str, download: bool = False, process: bool = True):
+        info = self.cassette.get(url, process)
+        if info is None:
+            self.cassette.count('misses')
+            return self._fail(f"[replay] {url}: 磁带中没有录制该请求")
+        if 'entries' in info:
+            return self._playlist(info, process)
+        return self._video(url, info)
+
+    def _video(self, url: str, info: dict):
+        video_id = info.get('id', url)
+        self._note(f"[youtube] {video_id}: Downloading android player API JSON")
+        self.cassette.count('videos')
+        if self.video_latency:
+            time.sleep(self.video_latency)
+        roll = self.rng.random()
+        if roll < self.throttle_rate:
+            self.cassette.count('throttled')
+            return self._fail(f"[youtube] {video_id}: HTTP Error 429: Too Many Requests")
+        if roll < self.throttle_rate + self.error_rate:
+            self.cassette.count('errors')
+            return self._fail(f"[youtube] {video_id}: Video unavailable")
+        return dict(info)
+
+    def _playlist(self, info: dict, process: bool) -> dict:
+        result = {k: v for k, v in info.items() if k != 'entries'}
+        entries = info.get('entries') or []
+        if process:
+            # 完整处理：按 playliststart / playlistend 选取（位置以条目的 playlist_index 为准，
+            # 与 yt-dlp 一样），翻页到区间末尾为止，只有选中的视频需要单独请求
+            start = self.params.get('playliststart') or 1
+            end = self.params.get('playlistend') or len(entries)
+            for page in range(0, min(end, len(entries)), self.page_size):
+                self._page(info, page // self.page_size + 1)
+            entries = [
+                entry for i, entry in enumerate(entries)
+                if entry and start <= (entry.get('playlist_index') or i + 1) <= end
+            ]
+            for entry in entries:
+                self._note(f"[youtube] {entry.get('id')}: Downloading android player API JSON")
+                self.cassette.count('videos')
+                if self.video_latency:
+                    time.sleep(self.video_latency)
+            result['entries'] = [dict(e) if e else e for e in entries]
+        else:
+            result['entries'] = self._iter_pages(info, entries)
+        return result
+
+    def _page(self, info: dict, page: int) -> None:
+        self._note(f"[youtube:tab] {info.get('id', 'playlist')}: Downloading API JSON page {page}")
+        self.cassette.count('pages')
+        if self.page_latency:
+            time.sleep(self.page_latency)
+
+    def _iter_pages(self, info: dict, entries: List) -> Iterator:
+        for start in range(0, len(entries), self.page_size):
+            self._page(info, start // self.page_size + 1)
+            for entry in entries[start:start + self.page_size]:
+                if entry and entry.get('_type') == 'url' and not self._approximate_date:
+                    # 未开启 approximate_date 时 yt-dlp 的列表条目没有时间戳
+                    entry = {k: v for k, v in entry.items() if k != 'timestamp'}
+                yield dict(entry) if entry else entry
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
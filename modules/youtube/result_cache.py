@@ -0,0 +1,174 @@
+"""
+抓取结果缓存模块
+按频道和抓取参数缓存最近一次的抓取结果，有效期内重复提交直接返回已生成的文件
+"""
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from core.config import CACHE_CONFIG
+from core.logger import setup_logger
+from core.metrics import CACHE_REQUESTS
+
+logger = setup_logger("youtube_result_cache")
+
+
+class ResultCache:
+    """抓取结果缓存（SQLite，多个 gunicorn worker 共享）"""
+
+    def __init__(self, db_path: Optional[str] = None, ttl: Optional[int] = None):
+        """
+        初始化结果缓存
+
+        Args:
+            db_path: SQLite 文件路径，默认使用配置文件中的值
+            ttl: 有效期（秒），默认使用配置文件中的值
+        """
+        self.db_path = Path(db_path or CACHE_CONFIG["result_path"])
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl if ttl is not None else CACHE_CONFIG["result_ttl"]
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scrape_results (
+                    result_key TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    records TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(upload_url: str, include_date: bool, max_videos: int, exclude_hash: str = '',
+                 file_format: str = 'excel', date_precision: str = 'exact', since: Optional[str] = None,
+                 until: Optional[str] = None) -> str:
+        """
+        生成缓存键
+
+        Args:
+            upload_url: 频道上传列表 URL（规范化后的频道地址）
+            include_date: 是否包含发布时间
+            max_videos: 最多抓取的视频数
+            exclude_hash: 排重文件内容的哈希（没有排重文件时为空）
+            file_format: 输出格式
+            date_precision: 发布时间精度（'exact' 或近似日期模式可接受的最粗精度）
+            since: 时间窗口起始日期（YYYYMMDD，相对日期需先换算）
+            until: 时间窗口结束日期（YYYYMMDD）
+
+        Returns:
+            缓存键
+        """
+        parts = [
+            upload_url,
+            f"include_date={include_date}",
+            f"max_videos={max_videos}",
+            f"exclude={exclude_hash}",
+            f"format={file_format}",
+            f"precision={date_precision}",
+        ]
+        if since or until:
+            parts.append(f"window={since or ''}~{until or ''}")
+        return '|'.join(parts)
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        查询有效期内的抓取结果（输出文件已被删除时视为未命中）
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            {'result': 任务结果, 'records': 视频信息列表, 'created_at': 时间戳}，未命中时返回 None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, records, created_at FROM scrape_results WHERE result_key = ? AND created_at >= ?",
+                (key, time.time() - self.ttl)
+            ).fetchone()
+        if row is not None:
+            result = json.loads(row[0])
+            if Path(result.get('filepath', '')).exists():
+                self.hits += 1
+                CACHE_REQUESTS.inc(cache='result', result='hit')
+                return {'result': result, 'records': json.loads(row[1]), 'created_at': row[2]}
+            self.invalidate(key)
+        self.misses += 1
+        CACHE_REQUESTS.inc(cache='result', result='miss')
+        return None
+
+    def put(self, key: str, result: dict, records: List[dict]) -> None:
+        """
+        保存抓取结果
+
+        Args:
+            key: 缓存键
+            result: 任务结果（需包含输出文件路径 filepath）
+            records: 视频信息列表
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO scrape_results (result_key, result, records, created_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(result, ensure_ascii=False), json.dumps(records, ensure_ascii=False), now)
+            )
+            # 顺便清理过期结果，避免数据库无限增长
+            self._conn.execute("DELETE FROM scrape_results WHERE created_at < ?", (now - self.ttl,))
+            self._conn.commit()
+
+    def invalidate(self, key: str) -> None:
+        """
+        删除缓存的抓取结果
+
+        Args:
+            key: 缓存键
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM scrape_results WHERE result_key = ?", (key,))
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """
+        获取缓存统计信息
+
+        Returns:
+            命中数、未命中数
+        """
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """
+    获取进程内共享的结果缓存
+
+    Returns:
+        结果缓存实例；配置中禁用结果缓存时返回 None
+    """
+    global _default_cache
+    if not CACHE_CONFIG["result_enabled"]:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResultCache()
+            logger.info(f"已启用抓取结果缓存：{_default_cache.db_path}（有效期 {_default_cache.ttl} 秒）")
+        return _default_cache
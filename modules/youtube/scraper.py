@@ -2,34 +2,102 @@
 YouTube 视频 URL 抓取模块
 使用 yt-dlp 库抓取指定频道的最新视频链接
 """
-import yt_dlp
-import pandas as pd
+import itertools
+import pickle
 import re
-from typing import List, Optional, Set
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional, Set
 from pathlib import Path
 
 from core.config import OUTPUT_DIR, YOUTUBE_CONFIG
 from core.logger import setup_logger
+from core.metrics import (
+    BYTES_WRITTEN, CACHE_REQUESTS, EXTRACT_INFO_CALLS, EXTRACT_INFO_SECONDS, RECORDS_WRITTEN,
+    STAGE_SECONDS, VIDEOS_EXCLUDED, VIDEOS_SCRAPED,
+)
+from .cache import VideoMetadataCache, get_metadata_cache
+from .date_window import NEWER, OLDER, WINDOW_STOP_AFTER, DateWindow
+from .exclude import load_exclude_ids
+from .journal import ScrapeJournal
+from .progress import ProgressTracker, ScrapeCancelledError, ScrapeStalledError
+from .rate_limiter import AdaptiveRateLimiter, ERROR, OK, YtDlpLogger, get_rate_limiter
+from .records import DATE_PRECISIONS, VideoRecord, VideoRecords, as_record
+from .seen_index import SCOPE_CHANNEL, SCOPE_GLOBAL, SeenVideoIndex, extract_video_ids, get_seen_index
+from .writers import FORMAT_EXTENSIONS, FORMAT_NAMES, open_writer
+from .watermark import get_watermark_store
+from .ydl_pool import YdlPool, get_ydl_pool
 
 logger = setup_logger("youtube_scraper")
 
+# 备用方法补充列表时，从已获取位置向前多请求的条数（按 ID 去重）
+FALLBACK_OVERLAP = 5
+
 
 class YouTubeScraper:
     """YouTube 视频抓取器"""
     
-    def __init__(self, max_videos: int = None, min_videos: int = None):
+    def __init__(self, max_videos: int = None, min_videos: int = None, date_workers: int = None,
+                 metadata_cache: Optional[VideoMetadataCache] = None, use_cache: bool = True,
+                 rate_limiter: Optional[AdaptiveRateLimiter] = None, use_rate_limit: bool = True,
+                 seen_index: Optional[SeenVideoIndex] = None, use_seen_index: bool = True,
+                 ydl_factory: Optional[Callable[[dict], object]] = None,
+                 ydl_pool: Optional[YdlPool] = None, use_ydl_pool: bool = True,
+                 shard_processes: int = None, shard_size: int = None):
         """
         初始化抓取器
         
         Args:
             max_videos: 最大抓取数量，默认使用配置文件中的值
             min_videos: 最少抓取数量，默认使用配置文件中的值
+            date_workers: 并发获取发布时间的线程数，默认使用配置文件中的值（启用限速器时实际并发数由限速器调整，
+                线程池不小于限速器的最高并发数）
+            metadata_cache: 视频元数据缓存，默认使用进程内共享的缓存
+            use_cache: 是否使用元数据缓存
+            rate_limiter: 自适应限速器，默认使用进程内共享的限速器
+            use_rate_limit: 是否限速
+            seen_index: 已抓取视频索引，默认使用进程内共享的索引
+            use_seen_index: 是否使用已抓取视频索引（保存结果时记录，抓取时可用于排重）
+            ydl_factory: 创建 YoutubeDL 的函数（参数为 yt-dlp 配置字典），默认使用 yt_dlp.YoutubeDL；
+                离线测试时可传入录制 / 回放磁带（见 replay.Cassette）
+            ydl_pool: YoutubeDL 实例池，默认使用进程内共享的实例池（传入 ydl_factory 时使用抓取器自己的实例池）
+            use_ydl_pool: 是否复用 YoutubeDL 实例（否则每次提取都创建新实例，用完关闭）
+            shard_processes: 分片模式的进程数（获取发布时间时按列表位置分段并行处理），0 或 1 表示不使用，
+                默认使用配置文件中的值
+            shard_size: 分片模式每段的视频数，默认使用配置文件中的值
         """
         self.max_videos = max_videos or YOUTUBE_CONFIG["max_videos"]
         self.min_videos = min_videos or YOUTUBE_CONFIG["min_videos"]
+        self.date_workers = date_workers or YOUTUBE_CONFIG["date_workers"]
+        self.shard_processes = YOUTUBE_CONFIG["shard_processes"] if shard_processes is None else shard_processes
+        self.shard_size = max(1, shard_size or YOUTUBE_CONFIG["shard_size"])
+        self.metadata_cache = None
+        if use_cache:
+            self.metadata_cache = metadata_cache if metadata_cache is not None else get_metadata_cache()
+        self.rate_limiter = None
+        if use_rate_limit:
+            self.rate_limiter = rate_limiter if rate_limiter is not None else get_rate_limiter()
+        self.seen_index = None
+        if use_seen_index:
+            self.seen_index = seen_index if seen_index is not None else get_seen_index()
+        self.ydl_factory = ydl_factory
+        self.ydl_pool = None
+        if use_ydl_pool:
+            if ydl_pool is not None:
+                self.ydl_pool = ydl_pool
+            elif ydl_factory is not None:
+                self.ydl_pool = YdlPool(factory=ydl_factory)
+            else:
+                self.ydl_pool = get_ydl_pool()
+        self._ydl_logger = YtDlpLogger(self.rate_limiter)
         logger.info(f"初始化 YouTube 抓取器，配置：最多 {self.max_videos} 条，最少 {self.min_videos} 条")
     
-    def _get_channel_upload_url(self, channel_url: str) -> str:
+    @staticmethod
+    def _get_channel_upload_url(channel_url: str) -> str:
         """
         将频道 URL 转换为上传列表 URL
         
@@ -52,6 +120,47 @@ class YouTubeScraper:
         
         return channel_url
     
+    def make_job_key(self, channel_url: str, include_date: bool = False, date_precision: Optional[str] = None,
+                     since: Optional[str] = None, until: Optional[str] = None, exclude_hash: str = '',
+                     exclude_seen: Optional[str] = None, incremental: bool = False,
+                     file_format: Optional[str] = None) -> str:
+        """
+        生成默认的任务标识（用于断点续传）
+        
+        所有影响结果的参数都计入标识（与结果缓存键相同的输入），参数不同的任务使用各自的任务日志，
+        不会续传按其他参数过滤过的记录，也不会在另一个任务仍在追加时删除它的日志。
+        
+        Args:
+            channel_url: YouTube 频道 URL
+            include_date: 是否包含发布时间
+            date_precision: 发布时间精度（None 与 'exact' 相同）
+            since: 时间窗口起始日期（YYYYMMDD，相对日期需先换算）
+            until: 时间窗口结束日期（YYYYMMDD）
+            exclude_hash: 排重文件内容的哈希（没有排重文件时为空）
+            exclude_seen: 排除之前保存过的视频的范围
+            incremental: 是否为增量模式
+            file_format: 输出格式
+            
+        Returns:
+            任务标识（同一频道、相同参数的任务得到相同标识）
+        """
+        options = {
+            'date_precision': date_precision if date_precision != 'exact' else None,
+            'since': since,
+            'until': until,
+            'exclude': exclude_hash,
+            'exclude_seen': exclude_seen,
+            'incremental': incremental,
+            'format': file_format,
+        }
+        # 没有设置的参数不计入标识（只按频道、include_date、max_videos 区分的任务标识保持不变）
+        return ScrapeJournal.make_key(
+            self._get_channel_upload_url(channel_url),
+            include_date=include_date,
+            max_videos=self.max_videos,
+            **{name: value for name, value in options.items() if value}
+        )
+    
     def _extract_channel_name(self, channel_url: str) -> str:
         """
         从频道 URL 中提取频道名称
@@ -97,10 +206,12 @@ class YouTubeScraper:
     
     def load_existing_videos(self, excel_file_path: str) -> Set[str]:
         """
-        从 Excel 文件中加载已存在的视频 ID 列表
+        从排重文件中加载已存在的视频 ID 列表
+        
+        支持 Excel（xlsx）、CSV/TSV、TXT、JSONL，流式读取；相同内容的文件只解析一次
         
         Args:
-            excel_file_path: Excel 文件路径
+            excel_file_path: 排重文件路径
             
         Returns:
             视频 ID 集合（用于快速查找）
@@ -113,71 +224,787 @@ class YouTubeScraper:
                 return existing_ids
             
             logger.info(f"正在读取已存在的视频清单：{excel_file_path}")
+            start_time = time.time()
+            existing_ids = load_exclude_ids(excel_file_path)
+            elapsed = time.time() - start_time
+            STAGE_SECONDS.observe(elapsed, stage='exclude')
+            logger.info(
+                f"从排重文件中提取到 {len(existing_ids)} 个已存在的视频 ID，"
+                f"耗时 {elapsed:.2f} 秒"
+            )
             
-            # 读取 Excel 文件
-            df = pd.read_excel(excel_file_path, engine='openpyxl')
-            
-            # 尝试从不同列中提取视频 ID
-            url_column = None
-            video_id_column = None
-            
-            # 查找 URL 列
-            for col in df.columns:
-                col_lower = str(col).lower()
-                if 'url' in col_lower:
-                    url_column = col
-                    break
+        except Exception as e:
+            logger.error(f"读取排重文件失败：{str(e)}", exc_info=True)
+            logger.warning("将跳过排重功能，继续正常抓取")
+        
+        return existing_ids
+    
+    def _build_flat_opts(self, approximate_date: bool = False, bounded: bool = True) -> dict:
+        """
+        构建极速模式（只获取播放列表结构）的 yt-dlp 配置
+        
+        Args:
+            approximate_date: 是否让 yt-dlp 把列表中的相对时间（"3 days ago"）换算为近似时间戳
+            bounded: 是否按 max_videos 限制列表条目数（时间窗口设置了 until 时，之前跳过的条目不计入，由调用方计数）
+        
+        Returns:
+            yt-dlp 配置字典
+        """
+        opts = {
+            'extract_flat': 'in_playlist',  # 在播放列表中只提取元数据，不处理单个视频
+            'quiet': False,
+            'no_warnings': False,
+            'ignoreerrors': True,
+            'playlistend': self.max_videos if bounded else None,  # 限制抓取数量
+            'playlistreverse': False,  # 确保从最新开始（Newest First）
+            'extractor_args': {
+                'youtube': {
+                    'player_client': ['android', 'web'],  # 使用移动端和网页端客户端
+                    'player_skip': ['webpage', 'configs'],  # 跳过网页和配置解析
+                }
+            }
+        }
+        if approximate_date:
+            opts['extractor_args']['youtubetab'] = {'approximate_date': ['']}
+        return opts
+    
+    def _build_date_opts(self) -> dict:
+        """
+        构建单个视频提取（获取发布时间）的 yt-dlp 配置
+        
+        Returns:
+            yt-dlp 配置字典
+        """
+        return {
+            'quiet': True,  # 并发提取时关闭逐条输出，避免日志刷屏
+            'no_warnings': True,
+            'ignoreerrors': True,
+            'skip_download': True,  # 不下载视频
+            'writesubtitles': False,
+            'writeautomaticsub': False,
+            'writethumbnail': False,
+            'writedescription': False,
+            'writeinfojson': False,
+            'extractor_args': {
+                'youtube': {
+                    'player_client': ['android'],  # 只使用一个客户端，减少50%的API调用
+                    'player_skip': ['webpage', 'configs', 'iframe'],  # 跳过不必要的解析
+                    'skip': ['dash', 'hls'],
+                }
+            }
+        }
+    
+    @contextmanager
+    def _checkout(self, opts: dict, ydl_logger: Optional[YtDlpLogger] = None, name: str = 'default'):
+        """
+        取得一个 YoutubeDL 实例（接入限速器：每次网络请求前等待令牌，并反馈限流错误）
+        
+        使用实例池时从池中借出、用完放回（保留 HTTP 连接），否则创建新实例、用完关闭。
+        
+        Args:
+            opts: yt-dlp 配置字典
+            ydl_logger: 传给 yt-dlp 的 logger，默认使用抓取器共享的 logger
+            name: 配置名称（实例池的统计和指标），与 _observe_extract 的 kind 一致
             
-            # 查找视频ID列
-            for col in df.columns:
-                col_lower = str(col).lower()
-                if 'id' in col_lower or 'video' in col_lower:
-                    video_id_column = col
-                    break
+        Yields:
+            YoutubeDL 实例
+        """
+        ydl_logger = ydl_logger or self._ydl_logger
+        if self.ydl_pool is not None:
+            with self.ydl_pool.checkout(opts, ydl_logger, name) as ydl:
+                yield ydl
+            return
+        
+        params = {**opts, 'logger': ydl_logger}
+        if self.ydl_factory is not None:
+            ydl = self.ydl_factory(params)
+        else:
+            # yt-dlp 导入较慢，只在第一次抓取时导入（Web 服务启动和显示首页都不需要它）
+            import yt_dlp
             
-            # 从 URL 列提取视频 ID
-            if url_column:
-                for url in df[url_column].dropna():
-                    video_id = self._extract_video_id_from_url(str(url))
-                    if video_id:
-                        existing_ids.add(video_id)
+            ydl = yt_dlp.YoutubeDL(params)
+        with ydl:
+            yield ydl
+    
+    @staticmethod
+    def _observe_extract(kind: str, elapsed: float, outcome: str) -> None:
+        """
+        记录一次 extract_info 调用的指标
+        
+        Args:
+            kind: 'listing'（频道列表）、'count'（频道视频数量）、'fallback'（备用方法）或 'video'（单个视频）
+            elapsed: 耗时（秒）
+            outcome: OK、THROTTLED、TRANSPORT 或 ERROR
+        """
+        EXTRACT_INFO_SECONDS.observe(elapsed, kind=kind)
+        EXTRACT_INFO_CALLS.inc(kind=kind, outcome=outcome)
+    
+    @staticmethod
+    def _parse_upload_date(entry: dict) -> Optional[str]:
+        """
+        从视频条目中解析发布时间
+        
+        Args:
+            entry: yt-dlp 返回的视频条目或视频详情
+        
+        Returns:
+            YYYYMMDD 格式的日期，无法获取时返回 None
+        """
+        # 尝试多种方式获取发布时间
+        # 优先从播放列表元数据中获取（如果可用）
+        upload_date = (
+            entry.get('upload_date') or
+            entry.get('release_date') or
+            entry.get('timestamp') or
+            entry.get('published') or  # 播放列表可能包含此字段
+            entry.get('published_time') or
+            None
+        )
+        
+        # 如果 upload_date 是时间戳，转换为日期格式
+        if upload_date and isinstance(upload_date, (int, float)):
+            try:
+                upload_date = datetime.fromtimestamp(upload_date).strftime('%Y%m%d')
+            except:
+                upload_date = None
+        elif upload_date and isinstance(upload_date, str) and len(upload_date) > 8:
+            # 如果是其他格式，尝试提取日期部分
+            try:
+                dt = datetime.fromisoformat(upload_date.replace('Z', '+00:00'))
+                upload_date = dt.strftime('%Y%m%d')
+            except:
+                upload_date = upload_date[:8] if len(upload_date) >= 8 else upload_date
+        
+        return upload_date
+    
+    @staticmethod
+    def _approximate_upload_date(entry: dict, now: Optional[float] = None):
+        """
+        从列表条目中解析发布时间及其精度（不需要单独提取视频）
+        
+        列表条目的时间戳由相对时间换算而来（需开启 approximate_date），按视频的新旧确定精度：
+        7 天内精确到天，30 天内到周，一年内到月，更早的只到年。
+        备用方法完整处理得到的条目和明确的日期字段是精确的。
+        
+        Args:
+            entry: yt-dlp 返回的视频条目
+            now: 当前时间戳（默认为当前时间）
+        
+        Returns:
+            (YYYYMMDD 格式的日期, 精度)，无法获取时返回 (None, None)
+        """
+        if entry.get('_type') != 'url' or entry.get('upload_date') or entry.get('release_date'):
+            upload_date = YouTubeScraper._parse_upload_date(entry)
+            return (upload_date, 'exact') if upload_date else (None, None)
+        
+        timestamp = entry.get('timestamp')
+        if not isinstance(timestamp, (int, float)):
+            return None, None
+        age_days = ((now or time.time()) - timestamp) / 86400
+        if age_days < 7:
+            precision = 'day'
+        elif age_days < 30:
+            precision = 'week'
+        elif age_days < 365:
+            precision = 'month'
+        else:
+            precision = 'year'
+        try:
+            return datetime.fromtimestamp(timestamp).strftime('%Y%m%d'), precision
+        except (OverflowError, OSError, ValueError):
+            return None, None
+    
+    def _build_full_opts(self) -> dict:
+        """
+        构建备用方法（完整处理每个视频）的 yt-dlp 配置
+        
+        Returns:
+            yt-dlp 配置字典
+        """
+        return {
+            'quiet': False,
+            'no_warnings': False,
+            'ignoreerrors': True,
+            'playlistend': self.max_videos,
+            'playlistreverse': False,
+            'skip_download': True,
+            'writesubtitles': False,
+            'writeautomaticsub': False,
+            'writethumbnail': False,
+            'writedescription': False,
+            'writeinfojson': False,
+            'extract_flat': False,
+            'extractor_args': {
+                'youtube': {
+                    'skip': ['dash', 'hls'],
+                }
+            }
+        }
+    
+    @staticmethod
+    def _entry_to_record(entry: dict) -> Optional[dict]:
+        """
+        将 yt-dlp 返回的条目规范化为视频信息
+        
+        Args:
+            entry: 视频条目
+        
+        Returns:
+            {'url': ..., 'video_id': ...}，无法得到 URL 时返回 None
+        """
+        # 优先使用 id 字段构建完整 URL
+        video_id = entry.get('id')
+        video_url = None
+        
+        if video_id:
+            video_url = f"https://www.youtube.com/watch?v={video_id}"
+        else:
+            # 尝试从 url 字段获取
+            url = entry.get('url')
+            if url:
+                video_url = url
+            else:
+                # 尝试从 webpage_url 获取
+                webpage_url = entry.get('webpage_url')
+                if webpage_url:
+                    video_url = webpage_url
+                else:
+                    # 尝试从 video_id 字段获取
+                    vid_id = entry.get('video_id')
+                    if vid_id:
+                        video_url = f"https://www.youtube.com/watch?v={vid_id}"
+        
+        if not video_url:
+            return None
+        
+        return {'url': video_url, 'video_id': video_id or entry.get('video_id', 'N/A')}
+    
+    @classmethod
+    def _window_step(cls, entry: dict, window: DateWindow, state: dict) -> str:
+        """
+        按时间窗口判断列表条目（近似日期按精度放宽，见 DateWindow.classify）
+        
+        Args:
+            entry: yt-dlp 视频条目
+            window: 时间窗口
+            state: 共享状态字典（见 _iter_entries），记录连续早于 since 的条目数
+        
+        Returns:
+            'keep'（在窗口内或无法判断）、'skip'（确定在窗口外）或 'stop'（连续 WINDOW_STOP_AFTER 个条目早于 since，
+            列表从新到旧排列，之后的条目只会更早）
+        """
+        upload_date, precision = cls._approximate_upload_date(entry)
+        position = window.classify(upload_date, precision)
+        if position == OLDER:
+            state['older_streak'] += 1
+            return 'stop' if state['older_streak'] >= WINDOW_STOP_AFTER else 'skip'
+        state['older_streak'] = 0
+        return 'skip' if position == NEWER else 'keep'
+    
+    def _count_uploads(self, info: dict, ydl_logger: YtDlpLogger) -> Optional[int]:
+        """
+        获取频道实际的视频数量
+        
+        频道上传列表页（/videos）通常不包含总数，此时只请求频道上传播放列表（UU...）的第一页，
+        读取其中显示的视频数（不翻页）。上传播放列表还包含 Shorts 和直播，数量可能偏大，
+        这时备用方法只会多翻几页列表，找不到新条目。
+        
+        Args:
+            info: 频道列表的提取结果（process=False）
+            ydl_logger: 传给 yt-dlp 的 logger
+        
+        Returns:
+            视频数量，无法获取时返回 None
+        """
+        count = info.get('playlist_count')
+        if isinstance(count, int):
+            return count
+        
+        channel_id = info.get('channel_id') or info.get('id') or ''
+        if not channel_id.startswith('UC'):
+            return None
+        uploads_url = f"https://www.youtube.com/playlist?list=UU{channel_id[2:]}"
+        uploads = None
+        count_start = time.perf_counter()
+        try:
+            with self._checkout({**self._build_flat_opts(), 'playlistend': 1}, ydl_logger, 'count') as ydl:
+                uploads = ydl.extract_info(uploads_url, download=False, process=False)
+        except ScrapeStalledError:
+            raise
+        except Exception as e:
+            logger.warning(f"获取频道视频数量失败：{str(e)}")
+        finally:
+            self._observe_extract('count', time.perf_counter() - count_start, OK if uploads else ERROR)
+        
+        count = uploads.get('playlist_count') if uploads else None
+        return count if isinstance(count, int) else None
+    
+    def _iter_entries(self, upload_url: str, update_progress, state: dict, tracker: ProgressTracker,
+                      stop_ids: Optional[Set[str]] = None, approximate_date: bool = False,
+                      window: Optional[DateWindow] = None, track_newest: int = 0) -> Iterator[dict]:
+        """
+        按顺序产出频道列表条目（极速模式列表 + 数量不足时的备用方法）
+        
+        yt-dlp 的条目是分页生成器，这里按需读取：达到 max_videos、命中水位或条目已早于时间窗口后
+        不再请求后续分页。读取情况记录在 state 中（position、listed、window_skipped、reached_watermark、
+        reached_window_end、listing_done、newest_ids）。每次翻页和每个条目都反馈给进度跟踪器。
+        
+        Args:
+            upload_url: 频道上传列表 URL
+            update_progress: 进度回调
+            state: 共享状态字典
+            tracker: 进度跟踪器
+            stop_ids: 水位视频 ID 集合（增量模式）
+            approximate_date: 列表条目是否带近似时间戳（见 _approximate_upload_date），设置 window 时需要开启
+            window: 时间窗口，确定在窗口外的条目不产出（不计入 max_videos）
+            track_newest: 按列表顺序记录前多少个条目的视频 ID 到 state['newest_ids']（更新水位用，
+                不受时间窗口跳过的影响），0 表示不记录
+        
+        Yields:
+            yt-dlp 视频条目（可能为 None）
+        """
+        update_progress('fetching', 15, '正在获取频道信息...', 0, 0)
+        
+        # yt-dlp 每请求一页列表都会输出提示，由此得到真实的翻页进度
+        listing_logger = YtDlpLogger(self.rate_limiter, on_request=tracker.page_requested)
+        seen_ids = set()
+        listing_start = time.perf_counter()
+        flat_opts = self._build_flat_opts(approximate_date, bounded=not (window and window.until))
+        with self._checkout(flat_opts, listing_logger, 'listing') as ydl:
+            info = None
+            try:
+                # 使用 process=False 配合 extract_flat，只获取播放列表结构
+                info = ydl.extract_info(upload_url, download=False, process=False)
+            finally:
+                # 连接耗时：到第一页列表返回为止
+                connect_elapsed = time.perf_counter() - listing_start
+                STAGE_SECONDS.observe(connect_elapsed, stage='connect')
+                self._observe_extract('listing', connect_elapsed, OK if info else ERROR)
             
-            # 从视频ID列提取
-            if video_id_column:
-                for vid_id in df[video_id_column].dropna():
-                    vid_id_str = str(vid_id).strip()
-                    if len(vid_id_str) == 11:  # YouTube 视频 ID 通常是 11 位
-                        existing_ids.add(vid_id_str)
+            # 停滞时 yt-dlp 可能吞掉异常只返回 None，这里再检查一次
+            tracker.check()
+            if not info:
+                logger.error("无法获取频道信息")
+                return
             
-            logger.info(f"从 Excel 文件中提取到 {len(existing_ids)} 个已存在的视频 ID")
+            update_progress('parsing', 25, '正在解析视频列表...', 0, 0)
+            for entry in info.get('entries') or []:
+                if state['listed'] >= self.max_videos:
+                    break
+                if stop_ids and entry and entry.get('id') in stop_ids:
+                    state['reached_watermark'] = True
+                    break
+                state['position'] += 1
+                if entry and entry.get('id') and len(state['newest_ids']) < track_newest:
+                    state['newest_ids'].append(entry['id'])
+                if window and entry:
+                    step = self._window_step(entry, window, state)
+                    if step == 'stop':
+                        state['reached_window_end'] = True
+                        break
+                    if step == 'skip':
+                        state['window_skipped'] += 1
+                        tracker.skipped()
+                        continue
+                state['listed'] += 1
+                tracker.entry()
+                if entry and entry.get('id'):
+                    seen_ids.add(entry['id'])
+                yield entry
+        STAGE_SECONDS.observe(time.perf_counter() - listing_start, stage='listing')
+        
+        if state['reached_watermark']:
+            logger.info(f"增量模式：已到达上次抓取位置，共 {state['listed']} 个新视频条目")
+        else:
+            logger.info(f"获取到 {state['listed']} 个视频条目")
+        if state['reached_window_end']:
+            logger.info(f"时间窗口：第 {state['position']} 个条目起早于 {window.since}，停止翻页")
+        if state['window_skipped']:
+            logger.info(f"时间窗口：跳过 {state['window_skipped']} 个窗口外的条目（不获取发布时间）")
+        
+        # 如果数量不足，补充获取（可能是分页问题；增量模式命中水位、条目已早于时间窗口时数量少是正常的）
+        # 按列表中实际读到的位置判断，时间窗口跳过的条目也算已获取
+        if state['position'] < self.min_videos and not (state['reached_watermark'] or state['reached_window_end']):
+            logger.warning(f"⚠️ 只获取到 {state['position']} 条（目标：{self.min_videos}-{self.max_videos} 条）")
+            fallback_start = time.perf_counter()
+            # 先确认频道实际的视频数量：频道本身视频就少时列表已经完整，不需要备用方法
+            upload_count = self._count_uploads(info, listing_logger)
+            tracker.check()
+            if upload_count is not None and upload_count <= state['position']:
+                logger.info(f"频道共有 {upload_count} 个视频，已全部获取，跳过备用方法")
+            else:
+                yield from self._iter_missing(upload_url, state, seen_ids, tracker, listing_logger,
+                                              upload_count, stop_ids, window, track_newest)
+            STAGE_SECONDS.observe(time.perf_counter() - fallback_start, stage='fallback')
+        
+        state['listing_done'] = True
+        tracker.finish_listing()
+    
+    def _iter_missing(self, upload_url: str, state: dict, seen_ids: Set[str], tracker: ProgressTracker,
+                      ydl_logger: YtDlpLogger, upload_count: Optional[int] = None,
+                      stop_ids: Optional[Set[str]] = None, window: Optional[DateWindow] = None,
+                      track_newest: int = 0) -> Iterator[dict]:
+        """
+        备用方法：使用不同的配置（完整处理每个视频）只请求列表中缺少的区间
+        
+        从已获取位置向前多请求 FALLBACK_OVERLAP 条（以防期间有新视频上传、位置后移而漏掉），
+        得到的条目按 ID 去重后接在已有列表之后。
+        
+        Args:
+            upload_url: 频道上传列表 URL
+            state: 共享状态字典（见 _iter_entries）
+            seen_ids: 已得到的视频 ID（会加入新条目）
+            tracker: 进度跟踪器
+            ydl_logger: 传给 yt-dlp 的 logger
+            upload_count: 频道实际的视频数量（未知时为 None，只用于日志）
+            stop_ids: 水位视频 ID 集合（增量模式）
+            window: 时间窗口（见 _iter_entries；备用方法得到的条目带精确日期）
+            track_newest: 见 _iter_entries
+        
+        Yields:
+            之前没有得到的 yt-dlp 视频条目
+        """
+        playlist_start = max(1, state['position'] + 1 - FALLBACK_OVERLAP)
+        # 时间窗口跳过的条目不计入 max_videos，列表位置相应后移
+        playlist_end = self.max_videos + state['window_skipped']
+        count_text = f"频道共有 {upload_count} 个视频，" if upload_count is not None else ''
+        logger.info(f"{count_text}使用备用方法补充第 {playlist_start}-{playlist_end} 条（可能需要更长时间）...")
+        opts = {**self._build_full_opts(), 'playliststart': playlist_start, 'playlistend': playlist_end}
+        
+        extract_start = time.perf_counter()
+        info_full = None
+        with self._checkout(opts, ydl_logger, 'fallback') as ydl_full:
+            try:
+                info_full = ydl_full.extract_info(upload_url, download=False, process=True)
+            finally:
+                self._observe_extract('fallback', time.perf_counter() - extract_start,
+                                      OK if info_full else ERROR)
+        tracker.check()
+        
+        added = 0
+        for entry in (info_full or {}).get('entries') or []:
+            if state['listed'] >= self.max_videos:
+                break
+            if not entry or entry.get('id') in seen_ids:
+                continue
+            if stop_ids and entry.get('id') in stop_ids:
+                state['reached_watermark'] = True
+                break
+            seen_ids.add(entry.get('id'))
+            if entry.get('id') and len(state['newest_ids']) < track_newest:
+                state['newest_ids'].append(entry['id'])
+            if window:
+                step = self._window_step(entry, window, state)
+                if step == 'stop':
+                    state['reached_window_end'] = True
+                    break
+                if step == 'skip':
+                    state['window_skipped'] += 1
+                    tracker.skipped()
+                    continue
+            state['listed'] += 1
+            added += 1
+            tracker.entry()
+            yield entry
+        
+        if added:
+            logger.info(f"✅ 备用方法补充 {added} 个视频条目，共 {state['listed']} 个")
+        else:
+            logger.info("备用方法没有获取到新的视频条目（列表已经完整）")
+    
+    def _iter_with_dates(self, records: Iterator[dict], journal: Optional[ScrapeJournal] = None,
+                         tracker: Optional[ProgressTracker] = None) -> Iterator[dict]:
+        """
+        并发获取发布时间，并按频道顺序产出视频信息
+        
+        列表条目一到达就提交给有界线程池（列表翻页与获取发布时间同时进行），
+        按原顺序依次等待结果产出，同时在途的视频数量有上限，内存占用不随频道大小增长。
+        每次获取从实例池借出一个 YoutubeDL 实例（YoutubeDL 不是线程安全的，借出期间只由一个线程使用）。
+        已在任务日志（断点续传）或元数据缓存中的视频不会重复获取。
+        
+        近似日期模式下（视频信息带 date_precision），只有近似日期的视频在任务日志或元数据缓存中
+        有精确日期时直接升级为精确日期；需要获取的视频失败时退回 approximate_date 中的近似日期。
+        
+        Args:
+            records: 视频信息（列表元数据中已有发布时间的不再获取）
+            journal: 任务日志（断点续传），每完成一个视频追加一条
+            tracker: 进度跟踪器，每完成一个视频反馈一次；工作线程的网络请求用于检查是否停滞
+        
+        Yields:
+            包含 upload_date 的视频信息（获取失败时为 'N/A'）
+        """
+        resumed = journal.load() if journal is not None else {}
+        workers = max(1, self.date_workers)
+        if self.rate_limiter is not None:
+            # 实际并发由限速器的并发名额控制：线程池按限速器的最高并发数创建，加性增提高的并发数才能生效
+            workers = max(workers, self.rate_limiter.max_concurrency)
+        max_inflight = workers * 4
+        
+        date_opts = self._build_date_opts()
+        ydl_logger = self._ydl_logger
+        if tracker is not None:
+            ydl_logger = YtDlpLogger(self.rate_limiter, on_request=tracker.activity)
+        
+        def extract(url):
+            with self._checkout(date_opts, ydl_logger, 'video') as ydl:
+                return ydl.extract_info(url, download=False, process=False)
+        
+        def fetch(item):
+            info = None
+            outcome = ERROR
+            fetch_start = time.perf_counter()
+            try:
+                if self.rate_limiter is None:
+                    info = extract(item['url'])
+                    outcome = OK if info else ERROR
+                else:
+                    # 受限速器控制的并发名额；结果（成功 / 限流 / 提取错误）反馈给限速器
+                    with self.rate_limiter.slot() as result:
+                        ydl_logger.begin()
+                        try:
+                            info = extract(item['url'])
+                        finally:
+                            outcome = ydl_logger.end()
+                        outcome = outcome if (info or outcome != OK) else ERROR
+                        result['outcome'] = outcome
+            finally:
+                self._observe_extract('video', time.perf_counter() - fetch_start, outcome)
+            upload_date = self._parse_upload_date(info) if info else None
+            if upload_date and journal is not None:
+                journal.append({**item, 'upload_date': upload_date})
+            return upload_date
+        
+        stats = {'resumed': 0, 'cached': 0, 'fetched': 0, 'failed': 0, 'approximate': 0}
+        to_cache = []
+        
+        def finish(item, future, approximate):
+            if future is not None:
+                try:
+                    item['upload_date'] = future.result()
+                except Exception as e:
+                    logger.warning(f"获取视频 {item.get('video_id')} 的发布时间失败：{str(e)}")
+                if item.get('upload_date'):
+                    stats['fetched'] += 1
+                    to_cache.append(item)
+                else:
+                    stats['failed'] += 1
+            if 'date_precision' in item:
+                if item.get('upload_date') and not item['date_precision']:
+                    item['date_precision'] = 'exact'
+                elif not item.get('upload_date') and approximate:
+                    # 获取失败时退回列表中的近似日期
+                    item['upload_date'], item['date_precision'] = approximate
+                if item['date_precision'] not in (None, 'exact'):
+                    stats['approximate'] += 1
+            if tracker is not None:
+                tracker.enriched()
+                # 工作线程检测到停滞时异常可能被 yt-dlp 吞掉，在这里终止
+                tracker.check()
+            item['upload_date'] = item.get('upload_date') or 'N/A'
+            return item
+        
+        def flush_cache():
+            if self.metadata_cache is not None and to_cache:
+                self.metadata_cache.put_many(to_cache)
+            to_cache.clear()
+        
+        start_time = time.time()
+        window = deque()  # (视频信息, Future 或 None, 近似日期)，保持频道顺序
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='yt-date')
+        logger.info(f"正在并发获取发布时间（并发数：{workers}）...")
+        try:
+            while True:
+                chunk = list(itertools.islice(records, 50))
+                if not chunk:
+                    break
+                
+                # 断点续传：跳过任务日志中已完成的视频（只有近似日期的视频也查询，命中即得到精确日期）
+                pending = [item for item in chunk
+                           if not item.get('upload_date') or item.get('date_precision') not in (None, 'exact')]
+                for item in pending:
+                    record = resumed.get(item['video_id'])
+                    if record and record.get('upload_date'):
+                        item['upload_date'] = record['upload_date']
+                        if 'date_precision' in item:
+                            item['date_precision'] = 'exact'
+                        stats['resumed'] += 1
+                
+                # 再查询元数据缓存，已缓存的视频不再重复获取
+                pending = [item for item in pending
+                           if not item.get('upload_date') or item.get('date_precision') not in (None, 'exact')]
+                if self.metadata_cache is not None and pending:
+                    cached = self.metadata_cache.get_many(item['video_id'] for item in pending)
+                    hits = 0
+                    for item in pending:
+                        hit = cached.get(item['video_id'])
+                        if hit:
+                            item['upload_date'] = hit['upload_date']
+                            if 'date_precision' in item:
+                                item['date_precision'] = 'exact'
+                            hits += 1
+                    stats['cached'] += hits
+                    CACHE_REQUESTS.inc(hits, cache='metadata', result='hit')
+                    CACHE_REQUESTS.inc(len(pending) - hits, cache='metadata', result='miss')
+                
+                for item in chunk:
+                    approximate = item.pop('approximate_date', None)
+                    future = executor.submit(fetch, item) if not item.get('upload_date') else None
+                    window.append((item, future, approximate))
+                
+                # 产出已完成的队首条目；在途数量超过上限时等待队首完成
+                while window and (window[0][1] is None or window[0][1].done() or len(window) > max_inflight):
+                    yield finish(*window.popleft())
+                
+                if len(to_cache) >= 50:
+                    flush_cache()
             
+            while window:
+                yield finish(*window.popleft())
+        finally:
+            # 调用方提前停止时取消尚未开始的任务
+            executor.shutdown(wait=True, cancel_futures=True)
+            flush_cache()
+        
+        logger.info(
+            f"发布时间获取完成：新获取 {stats['fetched']} 条，缓存命中 {stats['cached']} 条，"
+            f"断点恢复 {stats['resumed']} 条，近似日期 {stats['approximate']} 条，失败 {stats['failed']} 条，"
+            f"耗时 {time.time() - start_time:.1f} 秒"
+        )
+        if self.metadata_cache is not None:
+            logger.info(f"元数据缓存统计：{self.metadata_cache.stats()}")
+        if self.rate_limiter is not None:
+            logger.info(f"限速统计：{self.rate_limiter.stats()}")
+        if self.ydl_pool is not None:
+            logger.info(f"YoutubeDL 实例池统计：{self.ydl_pool.stats()}")
+    
+    def _shard_worker_options(self) -> Optional[dict]:
+        """
+        分片模式工作进程中抓取器的参数
+        
+        每个进程有自己的限速器，速率和并发数按进程数均分，总的请求速率与单进程时相同。
+        
+        Returns:
+            参数字典；ydl_factory 等无法传给其他进程时返回 None
+        """
+        options = {
+            'date_workers': self.date_workers,
+            'metadata_cache_path': str(self.metadata_cache.db_path) if self.metadata_cache is not None else None,
+            'rate_limiter': None,
+            'ydl_factory': self.ydl_factory,
+            'use_ydl_pool': self.ydl_pool is not None,
+        }
+        if self.rate_limiter is not None:
+            limiter = self.rate_limiter
+            share = self.shard_processes
+            options['rate_limiter'] = {
+                'rate': limiter.rate / share,
+                'burst': max(1, limiter.burst // share),
+                'concurrency': max(1, limiter.concurrency // share),
+                'min_rate': limiter.min_rate / share,
+                'max_rate': limiter.max_rate / share,
+                'min_concurrency': 1,
+                'max_concurrency': max(1, limiter.max_concurrency // share),
+                'backoff_base': limiter.backoff_base,
+                'backoff_max': limiter.backoff_max,
+                'decrease_cooldown': limiter.decrease_cooldown,
+            }
+        try:
+            pickle.dumps(options)
         except Exception as e:
-            logger.error(f"读取 Excel 文件失败：{str(e)}", exc_info=True)
-            logger.warning("将跳过排重功能，继续正常抓取")
+            logger.warning(f"分片模式的参数无法传给工作进程（{str(e)}），改为单进程获取发布时间")
+            return None
+        return options
+    
+    def _iter_sharded(self, records: Iterator[dict], journal: Optional[ScrapeJournal] = None,
+                      tracker: Optional[ProgressTracker] = None) -> Iterator[dict]:
+        """
+        分片模式获取发布时间（见 sharding.iter_shards），不足一段时仍在本进程中处理
         
-        return existing_ids
+        Args:
+            records: 视频信息
+            journal: 任务日志（断点续传）
+            tracker: 进度跟踪器
+        
+        Yields:
+            包含 upload_date 的视频信息（获取失败时为 'N/A'）
+        """
+        records = iter(records)
+        first = list(itertools.islice(records, self.shard_size))
+        options = self._shard_worker_options() if len(first) >= self.shard_size else None
+        if options is None:
+            yield from self._iter_with_dates(itertools.chain(first, records), journal, tracker)
+            return
+        
+        from .sharding import iter_shards
+        
+        yield from iter_shards(itertools.chain(first, records), options, self.shard_processes, self.shard_size,
+                               journal, tracker)
     
-    def scrape_channel(self, channel_url: str, include_date: bool = False, exclude_file: Optional[str] = None, progress_callback=None) -> List[dict]:
+    def iter_channel(self, channel_url: str, include_date: bool = False, exclude_file: Optional[str] = None, progress_callback=None,
+                     incremental: bool = False, job_key: Optional[str] = None,
+                     exclude_seen: Optional[str] = None, date_precision: Optional[str] = None,
+                     since: Optional[str] = None, until: Optional[str] = None,
+                     cancel_event: Optional[threading.Event] = None) -> Iterator[VideoRecord]:
         """
-        抓取频道视频 URL 列表
+        流式抓取频道视频：yt-dlp 每产出一条就立即返回一条规范化的视频信息
+        
+        需要发布时间时，列表翻页与并发获取发布时间同时进行（并发数见 date_workers），
+        结果仍按频道顺序（从新到旧）产出。达到 max_videos 后不再读取后续条目。
+        
+        近似日期模式（date_precision 为 'day'、'week'、'month' 或 'year'）：发布时间取自列表中的
+        相对时间，精度不低于 date_precision 的视频不再单独提取，只有列表中没有时间或精度不够的视频
+        才走逐个提取的慢速路径；每条结果带 date_precision 字段说明实际精度。
+        
+        分片模式（shard_processes > 1）下发布时间按列表位置分段在多个进程中获取，各段完成后按顺序产出。
+        
+        时间窗口（since / until）：列表开启近似日期，确定在窗口外的条目不获取发布时间，
+        连续几个条目早于 since 时停止翻页；获取到的精确日期再按窗口过滤，同样连续早于 since 时提前结束。
+        max_videos 只计算窗口内的条目。
         
         Args:
             channel_url: YouTube 频道 URL
             include_date: 是否包含发布时间
-            exclude_file: 已存在视频的 Excel 文件路径（用于排重）
-            
-        Returns:
-            视频信息列表（按发布时间从近到远排序）
-            格式: [{'url': '...', 'upload_date': '20240101'}, ...] 或 ['url1', 'url2', ...]
+            exclude_file: 已存在视频的排重文件路径（Excel、CSV、TXT 或 JSONL）
+            progress_callback: 进度回调函数 (stage, progress, message, current, total, estimated_time[, stats])，
+                stats 为翻页、条目、结果的计数和速率（见 ProgressTracker.stats），只在有速率数据时传入
+            incremental: 增量模式，只返回上次抓取之后的新视频（遇到上次的最新视频即停止翻页）
+            job_key: 任务标识（断点续传），相同标识的任务重新运行时跳过已完成的视频
+            exclude_seen: 排除之前保存过的视频（无需排重文件）：'channel' 只看该频道的记录，'global' 看所有频道
+            date_precision: 可接受的最粗发布时间精度（见 DATE_PRECISIONS），设置且不为 'exact' 时
+                使用近似日期模式（隐含 include_date）
+            since: 只要该日期及之后发布的视频：'YYYYMMDD'、'YYYY-MM-DD' 或相对今天的 '90d'、'12w'、'6m'、'1y'
+                （隐含 include_date）
+            until: 只要该日期及之前发布的视频（格式同 since）
+            cancel_event: 取消信号（可从其他线程设置），设置后在 yt-dlp 的下一次网络请求或下一条结果处终止，
+                已在获取的发布时间不再等待（断点续传的任务日志保留）
+        
+        Raises:
+            ValueError: date_precision、exclude_seen 或时间窗口无效
+            ScrapeStalledError: 超过 stall_timeout 秒没有任何进展（见 YOUTUBE_CONFIG）
+            ScrapeCancelledError: cancel_event 已设置
+        
+        Yields:
+            视频信息 VideoRecord（include_date 时带 upload_date，获取失败时为 None；
+            近似日期模式下还带 date_precision）
         """
+        if date_precision is not None and date_precision not in DATE_PRECISIONS:
+            raise ValueError(f"date_precision 只能是 {', '.join(DATE_PRECISIONS)}：{date_precision}")
+        approximate = date_precision not in (None, 'exact')
+        window = DateWindow(since, until)
+        include_date = include_date or approximate or bool(window)
+        max_rank = DATE_PRECISIONS.index(date_precision) if approximate else 0
+        
         upload_url = self._get_channel_upload_url(channel_url)
         logger.info(f"开始抓取频道：{upload_url}")
         
         # 进度回调函数
-        def update_progress(stage, progress, message, current=0, total=0, estimated_time=None):
+        def update_progress(stage, progress, message, current=0, total=0, estimated_time=None, stats=None):
             if progress_callback:
                 try:
-                    progress_callback(stage, progress, message, current, total, estimated_time)
+                    if stats is None:
+                        progress_callback(stage, progress, message, current, total, estimated_time)
+                    else:
+                        progress_callback(stage, progress, message, current, total, estimated_time, stats)
                 except:
                     pass
         
@@ -190,341 +1017,260 @@ class YouTubeScraper:
                 logger.info(f"已加载 {len(existing_video_ids)} 个已存在的视频，将自动排除")
                 update_progress('reading_exclude', 5, f'已读取 {len(existing_video_ids)} 个已存在的视频', 0, 0)
         
-        video_urls = []
-        video_data = []  # 存储包含日期的完整信息
+        # 已抓取视频索引：排除之前保存过的视频（内存映射的只读快照，按需二分查找）
+        seen_video_ids = None
+        if exclude_seen:
+            if exclude_seen not in (SCOPE_CHANNEL, SCOPE_GLOBAL):
+                raise ValueError(f"exclude_seen 只能是 '{SCOPE_CHANNEL}' 或 '{SCOPE_GLOBAL}'：{exclude_seen}")
+            if self.seen_index is None:
+                logger.warning("已抓取视频索引未启用，忽略 exclude_seen")
+            else:
+                seen_video_ids = self.seen_index.snapshot(upload_url if exclude_seen == SCOPE_CHANNEL else None)
+                scope_name = '该频道' if exclude_seen == SCOPE_CHANNEL else '所有频道'
+                logger.info(f"已抓取视频索引：{scope_name}共有 {len(seen_video_ids)} 个之前保存过的视频，将自动排除")
+        
+        # 增量模式：读取频道水位（上次抓取到的最新视频 ID）
+        watermark_store = get_watermark_store()
+        watermark_ids = set()
+        if incremental:
+            watermark_ids = set(watermark_store.get(upload_url))
+            if watermark_ids:
+                logger.info(f"增量模式：遇到上次抓取的 {len(watermark_ids)} 个最新视频之一即停止")
+            else:
+                logger.info("增量模式：该频道没有抓取记录，将完整抓取")
         
         update_progress('connecting', 10, '正在连接 YouTube 服务器...', 0, 0)
+        if approximate:
+            logger.info(f"正在获取频道视频列表（近似日期模式，精度不低于 {date_precision} 的发布时间直接取自列表）...")
+        elif include_date:
+            logger.info("正在获取频道视频列表（列表翻页与并发获取发布时间同时进行）...")
+        else:
+            logger.info("正在获取频道视频列表（极速模式，避免反爬虫验证）...")
+        if window:
+            logger.info(f"时间窗口：{window}（早于 since 时停止翻页，窗口外的视频不获取发布时间）")
         
-        try:
-            # 如果需要日期，必须处理每个视频来获取发布时间
-            # 注意：这会比只获取URL慢很多，因为需要为每个视频调用API
-            if include_date:
-                # 优化配置：只使用一个客户端，减少API调用
-                ydl_opts_flat = {
-                    'extract_flat': False,  # 必须处理每个视频才能获取日期
-                    'quiet': False,
-                    'no_warnings': False,
-                    'ignoreerrors': True,
-                    'playlistend': self.max_videos,
-                    'playlistreverse': False,
-                    'skip_download': True,  # 不下载视频
-                    'writesubtitles': False,
-                    'writeautomaticsub': False,
-                    'writethumbnail': False,
-                    'writedescription': False,
-                    'writeinfojson': False,
-                    'extractor_args': {
-                        'youtube': {
-                            'player_client': ['android'],  # 只使用一个客户端，减少50%的API调用
-                            'player_skip': ['webpage', 'configs', 'iframe'],  # 跳过不必要的解析
-                            'skip': ['dash', 'hls'],
-                        }
-                    }
-                }
-                logger.info("正在获取频道视频列表（包含发布时间）...")
-                logger.info("⚠️  注意：获取发布时间需要处理每个视频，会比只获取URL慢很多")
-                logger.info(f"预计需要处理 {min(len(entries) if 'entries' in locals() else self.max_videos, self.max_videos)} 个视频，请耐心等待...")
-                process_mode = True  # 必须处理每个视频
-            else:
-                # 不需要日期时，使用极速模式
-                ydl_opts_flat = {
-                    'extract_flat': 'in_playlist',  # 在播放列表中只提取元数据，不处理单个视频
-                    'quiet': False,
-                    'no_warnings': False,
-                    'ignoreerrors': True,
-                    'playlistend': self.max_videos,  # 限制抓取数量
-                    'playlistreverse': False,  # 确保从最新开始（Newest First）
-                    'extractor_args': {
-                        'youtube': {
-                            'player_client': ['android', 'web'],  # 使用移动端和网页端客户端
-                            'player_skip': ['webpage', 'configs'],  # 跳过网页和配置解析
-                        }
-                    }
-                }
-                logger.info("正在获取频道视频列表（极速模式，避免反爬虫验证）...")
-                process_mode = False
-            
-            update_progress('fetching', 15, '正在获取频道信息...', 0, 0)
-            
-            # 在长时间操作期间添加心跳更新（让用户知道还在工作）
-            import threading
-            import time
-            heartbeat_active = [True]
-            
-            def heartbeat():
-                """心跳更新，防止用户以为程序卡住了"""
-                stages = [
-                    '正在连接 YouTube 服务器...',
-                    '正在获取频道数据...',
-                    '正在解析频道信息...',
-                    '正在获取视频列表...',
-                ]
-                stage_idx = 0
-                base_progress = 15  # 基础进度
-                max_progress = 25   # 最大进度（在解析完成前）
-                
-                while heartbeat_active[0]:
-                    time.sleep(3)  # 每3秒更新一次
-                    if heartbeat_active[0]:
-                        # 进度在15-25%之间缓慢递增，不会回退
-                        # 每3秒增加约1%，最多到25%
-                        current_progress = min(base_progress + stage_idx, max_progress)
-                        msg = stages[stage_idx % len(stages)]
-                        update_progress('fetching', current_progress, msg, 0, 0)
-                        stage_idx += 1
-                        # 如果超过最大进度，保持在最大进度，但消息继续循环
-                        # 注意：不要重置stage_idx，让它继续增长，这样进度不会回退
-            
-            heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
-            heartbeat_thread.start()
-            
-            try:
-                with yt_dlp.YoutubeDL(ydl_opts_flat) as ydl:
-                    # 如果需要日期，使用 process=True 来获取完整信息
-                    # 如果不需要日期，使用 process=False 配合 extract_flat
-                    info = ydl.extract_info(upload_url, download=False, process=process_mode)
-            finally:
-                heartbeat_active[0] = False  # 停止心跳
-                
-                if not info:
-                    logger.error("无法获取频道信息")
-                    return []
-                
-                # 提取视频条目
-                entries = info.get('entries', [])
-                
-                # 如果 entries 是生成器，转换为列表
-                if hasattr(entries, '__iter__') and not isinstance(entries, (list, tuple)):
-                    logger.info("检测到生成器，正在转换为列表...")
-                    update_progress('parsing', 25, '正在解析视频列表...', 0, 0)
-                    entries = list(entries)
-                
-                logger.info(f"获取到 {len(entries)} 个视频条目")
-                total_entries = min(len(entries), self.max_videos)
-                update_progress('parsing', 30, f'已解析 {total_entries} 个视频条目', 0, total_entries)
-                
-                # 如果数量不足，尝试重新获取（可能是分页问题）
-                if len(entries) < self.min_videos:
-                    logger.warning(f"⚠️ 只获取到 {len(entries)} 条（目标：{self.min_videos}-{self.max_videos} 条）")
-                    logger.info("尝试使用备用方法重新获取...")
-                    
-                    # 备用方法：使用不同的配置重新获取
-                    ydl_opts_full = {
-                        'quiet': False,
-                        'no_warnings': False,
-                        'ignoreerrors': True,
-                        'playlistend': self.max_videos,
-                        'playlistreverse': False,
-                        'skip_download': True,
-                        'writesubtitles': False,
-                        'writeautomaticsub': False,
-                        'writethumbnail': False,
-                        'writedescription': False,
-                        'writeinfojson': False,
-                        'extract_flat': False,
-                        'extractor_args': {
-                            'youtube': {
-                                'skip': ['dash', 'hls'],
-                            }
-                        }
-                    }
-                    
-                    with yt_dlp.YoutubeDL(ydl_opts_full) as ydl_full:
-                        logger.info("使用备用方法重新获取（可能需要更长时间）...")
-                        info_full = ydl_full.extract_info(upload_url, download=False, process=True)
-                        
-                        if info_full:
-                            entries_full = info_full.get('entries', [])
-                            if hasattr(entries_full, '__iter__') and not isinstance(entries_full, (list, tuple)):
-                                logger.info("正在处理播放列表条目...")
-                                entries_full = list(entries_full)
-                            
-                            if len(entries_full) > len(entries):
-                                entries = entries_full
-                                logger.info(f"✅ 备用方法获取到 {len(entries)} 个视频条目")
-                            else:
-                                logger.info(f"备用方法获取到 {len(entries_full)} 个视频条目（与之前相同）")
+        state = {'position': 0, 'listed': 0, 'window_skipped': 0, 'older_streak': 0,
+                 'reached_watermark': False, 'reached_window_end': False, 'listing_done': False,
+                 'newest_ids': []}
+        tracker = ProgressTracker(update_progress, self.max_videos, include_date=include_date,
+                                  stall_timeout=YOUTUBE_CONFIG["stall_timeout"], cancel_event=cancel_event)
+        # 水位只从未过滤、未截断上端的列表更新：设置了 until 或排重时产出的是较早或筛选过的视频，
+        # 记录下来的“最新视频”可能是旧视频，下次增量抓取会停得过晚或漏掉其间的新视频
+        track_newest = 0 if (window.until or exclude_file or exclude_seen) else watermark_store.history_size
+        excluded_count = 0
+        
+        def iter_records():
+            """列表条目 -> 规范化视频信息（排重在获取发布时间之前完成）"""
+            nonlocal excluded_count
+            for entry in self._iter_entries(upload_url, update_progress, state, tracker, watermark_ids,
+                                            approximate_date=approximate or bool(window),
+                                            window=window or None, track_newest=track_newest):
+                # 跳过 None 条目
+                if entry is None:
+                    logger.warning(f"第 {state['listed']} 条视频条目为空，跳过")
+                    continue
                 
-                if not entries:
-                    logger.warning("未找到视频条目")
-                    return []
+                record = self._entry_to_record(entry)
+                if record is None:
+                    continue
                 
-                # 提取视频 URL 和发布时间
-                # YouTube 频道的上传列表默认就是按时间从近到远排序的（Newest First）
-                total_to_process = min(len(entries), self.max_videos)
-                processed_count = 0
+                # 排重检查：如果视频 ID 已存在（排重文件或已抓取视频索引），跳过
+                if (existing_video_ids and record['video_id'] in existing_video_ids) or \
+                        (seen_video_ids and record['video_id'] in seen_video_ids):
+                    logger.debug(f"跳过已存在的视频：{record['video_id']}")
+                    excluded_count += 1
+                    tracker.skipped()
+                    continue
                 
-                for idx, entry in enumerate(entries, 1):
-                    if idx > self.max_videos:
-                        break
-                    
-                    # 跳过 None 条目
-                    if entry is None:
-                        logger.warning(f"第 {idx} 条视频条目为空，跳过")
-                        continue
-                    
-                    # 更新进度（每处理一个视频）
-                    processed_count += 1
-                    if include_date:
-                        # 如果需要日期，进度从 30% 到 85%
-                        progress = 30 + int((processed_count / total_to_process) * 55)
-                        stage_msg = '正在提取视频信息和发布时间'
+                if approximate:
+                    # 精度足够的近似日期直接使用；否则由线程池获取精确日期（失败时仍退回近似日期）
+                    upload_date, precision = self._approximate_upload_date(entry)
+                    if upload_date and DATE_PRECISIONS.index(precision) <= max_rank:
+                        record['upload_date'] = upload_date
+                        record['date_precision'] = precision
                     else:
-                        # 如果不需要日期，进度从 30% 到 85%
-                        progress = 30 + int((processed_count / total_to_process) * 55)
-                        stage_msg = '正在提取视频链接'
-                    
-                    # 计算预计剩余时间（基于实际处理速度）
-                    estimated_remaining = None
-                    if processed_count >= 5:  # 至少处理5个后才估算
-                        # 使用实际处理速度估算（如果之前有记录）
-                        if not hasattr(update_progress, 'start_time'):
-                            import time
-                            update_progress.start_time = time.time()
-                            update_progress.last_count = 0
-                        
-                        if processed_count > update_progress.last_count:
-                            import time
-                            elapsed = time.time() - update_progress.start_time
-                            if elapsed > 0:
-                                avg_time_per_video = elapsed / processed_count
-                                remaining_videos = total_to_process - processed_count
-                                estimated_remaining = int(remaining_videos * avg_time_per_video)
-                                update_progress.last_count = processed_count
-                    
-                    # 优先使用 id 字段构建完整 URL
-                    video_id = entry.get('id') if entry else None
-                    video_url = None
-                    
-                    if video_id:
-                        video_url = f"https://www.youtube.com/watch?v={video_id}"
-                    else:
-                        # 尝试从 url 字段获取
-                        url = entry.get('url')
-                        if url:
-                            video_url = url
-                        else:
-                            # 尝试从 webpage_url 获取
-                            webpage_url = entry.get('webpage_url')
-                            if webpage_url:
-                                video_url = webpage_url
-                            else:
-                                # 尝试从 video_id 字段获取
-                                vid_id = entry.get('video_id')
-                                if vid_id:
-                                    video_url = f"https://www.youtube.com/watch?v={vid_id}"
-                    
-                    if not video_url:
+                        record['upload_date'] = None
+                        record['date_precision'] = None
+                        if upload_date:
+                            record['approximate_date'] = (upload_date, precision)
+                elif window:
+                    # 列表开启了近似日期（用于时间窗口），只直接使用精确的发布时间
+                    upload_date, precision = self._approximate_upload_date(entry)
+                    record['upload_date'] = upload_date if precision == 'exact' else None
+                elif include_date:
+                    # 列表元数据中如果已有发布时间则直接使用，否则由线程池获取
+                    record['upload_date'] = self._parse_upload_date(entry)
+                yield record
+        
+        journal = ScrapeJournal(job_key) if (include_date and job_key) else None
+        if include_date and self.shard_processes > 1:
+            stream = self._iter_sharded(iter_records(), journal, tracker)
+        elif include_date:
+            stream = self._iter_with_dates(iter_records(), journal, tracker)
+        else:
+            stream = iter_records()
+        
+        result_count = 0
+        older_streak = 0
+        start_time = time.time()
+        try:
+            for record in stream:
+                if window:
+                    # 按获取到的发布时间过滤（近似日期模式下按近似日期）；列表从新到旧，连续早于 since 即可结束
+                    position = window.classify(record['upload_date'])
+                    older_streak = older_streak + 1 if position == OLDER else 0
+                    if older_streak >= WINDOW_STOP_AFTER:
+                        state['reached_window_end'] = True
+                        break
+                    if position in (OLDER, NEWER):
+                        state['window_skipped'] += 1
+                        tracker.skipped()
                         continue
-                    
-                    # 排重检查：如果视频 ID 已存在，跳过
-                    if existing_video_ids and video_id:
-                        if video_id in existing_video_ids:
-                            logger.debug(f"跳过已存在的视频：{video_id}")
-                            continue
-                    
-                    # 提取发布时间
-                    upload_date = None
-                    if include_date:
-                        # 尝试多种方式获取发布时间
-                        # 优先从播放列表元数据中获取（如果可用）
-                        upload_date = (
-                            entry.get('upload_date') or 
-                            entry.get('release_date') or
-                            entry.get('timestamp') or
-                            entry.get('published') or  # 播放列表可能包含此字段
-                            entry.get('published_time') or
-                            None
-                        )
-                        
-                        # 如果 upload_date 是时间戳，转换为日期格式
-                        if upload_date and isinstance(upload_date, (int, float)):
-                            from datetime import datetime
-                            try:
-                                upload_date = datetime.fromtimestamp(upload_date).strftime('%Y%m%d')
-                            except:
-                                upload_date = None
-                        elif upload_date and isinstance(upload_date, str) and len(upload_date) > 8:
-                            # 如果是其他格式，尝试提取日期部分
-                            try:
-                                from datetime import datetime
-                                dt = datetime.fromisoformat(upload_date.replace('Z', '+00:00'))
-                                upload_date = dt.strftime('%Y%m%d')
-                            except:
-                                upload_date = upload_date[:8] if len(upload_date) >= 8 else upload_date
-                        
-                    
-                    # 保存数据（这里才是真正"已抓取"的数量）
-                    if include_date:
-                        video_data.append({
-                            'url': video_url,
-                            'upload_date': upload_date or 'N/A',
-                            'video_id': video_id or entry.get('video_id', 'N/A')
-                        })
-                        actual_saved = len(video_data)  # 实际保存的数量
-                    else:
-                        video_urls.append(video_url)
-                        actual_saved = len(video_urls)
-                    
-                    # 每5个视频更新一次进度（更频繁的更新，让用户看到进度）
-                    # 使用实际保存的数量，而不是处理的数量
-                    if actual_saved % 5 == 0 or actual_saved == total_to_process or actual_saved <= 10:
-                        update_progress(
-                            'extracting',
-                            progress,
-                            f'{stage_msg}... (已抓取 {actual_saved}/{total_to_process})',
-                            actual_saved,  # 使用实际保存的数量
-                            total_to_process,
-                            estimated_remaining
-                        )
-                    
-                    # 每 50 条输出一次日志
-                    if idx % 50 == 0:
-                        logger.info(f"已处理 {idx}/{min(len(entries), self.max_videos)} 条视频链接...")
+                result_count += 1
+                # 进度、速率和预计剩余时间由跟踪器根据实际事件计算（回调有最短间隔）
+                tracker.emitted()
                 
-                result_count = len(video_data) if include_date else len(video_urls)
-                update_progress('extracting', 85, f'已完成提取，共 {result_count} 条视频', result_count, result_count)
-                
-                # 如果有排重，显示排重信息
-                if existing_video_ids:
-                    excluded_count = sum(1 for e in entries[:self.max_videos] if e and e.get('id') in existing_video_ids)
-                    logger.info(f"成功抓取 {result_count} 条视频链接（已排除 {excluded_count} 条已存在的视频）")
-                else:
-                    logger.info(f"成功抓取 {result_count} 条视频链接")
-                
-                # 检查是否满足最少数量要求
-                if result_count < self.min_videos:
-                    logger.warning(
-                        f"⚠️ 抓取到的视频数量 ({result_count}) 少于最少要求 ({self.min_videos})"
+                # 每 50 条输出一次日志
+                if result_count % 50 == 0:
+                    stats = tracker.stats()
+                    logger.info(
+                        f"已处理 {tracker.processed}/{tracker.total} 条视频链接"
+                        f"（{stats['videos_per_second']:.1f} 条/秒，翻页 {stats['pages']} 次）..."
                     )
-                    logger.info("可能的原因：")
-                    logger.info("  1. 频道实际视频数量少于预期")
-                    logger.info("  2. YouTube 访问限制")
-                    logger.info("  3. 频道有部分视频为私有或已删除")
-                else:
-                    logger.info(f"✅ 成功抓取 {result_count} 条视频链接（目标：{self.min_videos}-{self.max_videos} 条）")
                 
+                # 抓取流程内部使用字典（在途条数有限），产出时转换为紧凑的 VideoRecord
+                yield VideoRecord.from_dict(record)
+        except ScrapeStalledError as e:
+            logger.error(str(e))
+            raise
+        except ScrapeCancelledError:
+            logger.info(f"抓取已取消（已产出 {result_count} 条）：{upload_url}")
+            raise
         except Exception as e:
             logger.error(f"抓取过程中发生错误：{str(e)}", exc_info=True)
             raise
+        finally:
+            # 提前结束（时间窗口、异常）时立即停止翻页和尚未完成的发布时间获取
+            stream.close()
+            if journal is not None:
+                journal.close()
+            if seen_video_ids is not None:
+                seen_video_ids.close()
+            STAGE_SECONDS.observe(time.time() - start_time, stage='extraction')
+            VIDEOS_SCRAPED.inc(result_count, mode='approximate' if approximate else 'date' if include_date else 'flat')
+            VIDEOS_EXCLUDED.inc(excluded_count)
+        
+        # 列表完整读取后才更新水位和清理任务日志（调用方提前停止时保留，以免漏抓）
+        if state['newest_ids']:
+            watermark_store.update(upload_url, state['newest_ids'])
+        if journal is not None:
+            journal.complete()
+        
+        if state['reached_watermark'] and not state['listed']:
+            logger.info("增量模式：没有新视频")
+            update_progress('extracting', 85, '没有新视频', 0, 0)
+            return
+        if window and not result_count and (state['listed'] or state['window_skipped']):
+            logger.info(f"时间窗口 {window} 内没有视频")
+            update_progress('extracting', 85, '时间窗口内没有视频', 0, 0)
+            return
+        if not state['listed']:
+            logger.warning("未找到视频条目")
+            return
         
-        return video_data if include_date else video_urls
+        update_progress('extracting', 85, f'已完成提取，共 {result_count} 条视频', result_count, result_count)
+        
+        # 如果有排重，显示排重信息
+        if existing_video_ids or exclude_seen:
+            logger.info(f"成功抓取 {result_count} 条视频链接（已排除 {excluded_count} 条已存在的视频）")
+        else:
+            logger.info(f"成功抓取 {result_count} 条视频链接")
+        
+        # 检查是否满足最少数量要求（增量模式命中水位时只有新视频，不做检查）
+        if state['reached_watermark']:
+            logger.info(f"✅ 增量抓取完成，共 {result_count} 条新视频")
+        elif window:
+            logger.info(f"✅ 时间窗口 {window} 内共 {result_count} 条视频（跳过窗口外的 {state['window_skipped']} 条）")
+        elif result_count < self.min_videos:
+            logger.warning(
+                f"⚠️ 抓取到的视频数量 ({result_count}) 少于最少要求 ({self.min_videos})"
+            )
+            logger.info("可能的原因：")
+            logger.info("  1. 频道实际视频数量少于预期")
+            logger.info("  2. YouTube 访问限制")
+            logger.info("  3. 频道有部分视频为私有或已删除")
+        else:
+            logger.info(f"✅ 成功抓取 {result_count} 条视频链接（目标：{self.min_videos}-{self.max_videos} 条）")
     
-    def save_urls(self, video_data, filename: Optional[str] = None, channel_url: Optional[str] = None, file_format: str = 'excel') -> Path:
+    def scrape_channel(self, channel_url: str, include_date: bool = False, exclude_file: Optional[str] = None, progress_callback=None,
+                       incremental: bool = False, job_key: Optional[str] = None,
+                       exclude_seen: Optional[str] = None, date_precision: Optional[str] = None,
+                       since: Optional[str] = None, until: Optional[str] = None,
+                       cancel_event: Optional[threading.Event] = None) -> VideoRecords:
         """
-        保存视频 URL 列表到文件（支持 Excel 和 TXT 格式）
+        抓取频道视频 URL 列表（一次性返回全部结果，流式版本见 iter_channel）
+        
+        需要发布时间时，先用极速模式获取频道列表，再通过有界线程池
+        并发获取每个视频的发布时间（并发数见 date_workers）。
         
         Args:
-            video_data: 视频数据（可以是 URL 字符串列表或包含 URL 和日期的字典列表）
+            channel_url: YouTube 频道 URL
+            include_date: 是否包含发布时间
+            exclude_file: 已存在视频的排重文件路径（Excel、CSV、TXT 或 JSONL）
+            progress_callback: 进度回调函数 (stage, progress, message, current, total, estimated_time)
+            incremental: 增量模式，只返回上次抓取之后的新视频（遇到上次的最新视频即停止翻页）
+            job_key: 任务标识（断点续传），相同标识的任务重新运行时跳过已完成的视频
+            exclude_seen: 排除之前保存过的视频（无需排重文件）：'channel' 只看该频道的记录，'global' 看所有频道
+            date_precision: 近似日期模式可接受的最粗精度（见 iter_channel），隐含 include_date
+            since: 只要该日期及之后发布的视频（见 iter_channel），隐含 include_date
+            until: 只要该日期及之前发布的视频
+            cancel_event: 取消信号（见 iter_channel），异步程序中使用 AsyncYouTubeScraper
+        
+        Returns:
+            按列保存的视频信息 VideoRecords（按发布时间从近到远排序，可直接传给 save_urls），
+            迭代得到 VideoRecord；只需要 URL 时使用 records.urls()
+        """
+        records = self.iter_channel(
+            channel_url,
+            include_date=include_date,
+            exclude_file=exclude_file,
+            progress_callback=progress_callback,
+            incremental=incremental,
+            job_key=job_key,
+            exclude_seen=exclude_seen,
+            date_precision=date_precision,
+            since=since,
+            until=until,
+            cancel_event=cancel_event
+        )
+        approximate = date_precision not in (None, 'exact')
+        return VideoRecords(include_date or approximate or bool(since or until), approximate, records)
+    
+    def save_urls(self, video_data, filename: Optional[str] = None, channel_url: Optional[str] = None, file_format: str = 'excel',
+                  output_dir: Optional[Path] = None, include_date: Optional[bool] = None,
+                  include_precision: Optional[bool] = None) -> Optional[Path]:
+        """
+        保存视频 URL 列表到文件（支持 Excel、TXT、CSV、TSV、JSONL 和 Parquet 格式）
+        
+        逐条写入临时文件，完成后再改名，内存占用与数据量无关；video_data 可以是生成器
+        （例如 iter_channel 的结果），边抓取边写入。
+        
+        Args:
+            video_data: 视频数据：scrape_channel 返回的 VideoRecords，或 VideoRecord 的可迭代对象
+                （也接受 URL 字符串和视频信息字典）
             filename: 文件名，如果为 None 则自动生成（使用频道名称）
             channel_url: 频道 URL（用于提取频道名称）
-            file_format: 保存格式，'excel' 或 'txt'，默认为 'excel'
+            file_format: 保存格式，'excel'、'txt'、'csv'、'tsv'、'jsonl' 或 'parquet'，默认为 'excel'
+            output_dir: 输出目录，默认为 OUTPUT_DIR
+            include_date: 是否输出发布时间和视频 ID 列，默认取 VideoRecords 的设置，
+                其他数据按第一条判断（有发布时间或日期精度）
+            include_precision: 是否输出日期精度列（近似日期模式），默认同上
             
         Returns:
-            保存的文件路径
+            保存的文件路径；没有任何数据时不创建文件，返回 None
         """
-        from datetime import datetime
-        import pandas as pd
+        if file_format not in FORMAT_EXTENSIONS:
+            raise ValueError(f"不支持的输出格式：{file_format}（可选：{', '.join(FORMAT_EXTENSIONS)}）")
         
         # 提取频道名称用于文件命名
         channel_name = "youtube_channel"
@@ -533,45 +1279,87 @@ class YouTubeScraper:
         
         if filename is None:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            if file_format == 'excel':
-                filename = f"{channel_name}_{timestamp}.xlsx"
-            else:
-                filename = f"{channel_name}_{timestamp}.txt"
-        
-        filepath = OUTPUT_DIR / filename
-        
-        # 判断数据格式并准备数据
-        if video_data and isinstance(video_data[0], dict):
-            # 包含日期的格式
-            data_list = []
-            for item in video_data:
-                data_list.append({
-                    'URL': item.get('url', ''),
-                    '发布时间': item.get('upload_date', 'N/A'),
-                    '视频ID': item.get('video_id', 'N/A')
-                })
-            
-            df = pd.DataFrame(data_list)
-            
-            if file_format == 'excel':
-                # 保存为 Excel 格式
-                df.to_excel(filepath, index=False, engine='openpyxl')
-                logger.info(f"已保存 {len(video_data)} 条数据到 Excel 文件：{filepath}")
-            else:
-                # 保存为 TXT 格式（制表符分隔）
-                df.to_csv(filepath, sep='\t', index=False, encoding='utf-8')
-                logger.info(f"已保存 {len(video_data)} 条数据到文本文件：{filepath}")
+            filename = f"{channel_name}_{timestamp}.{FORMAT_EXTENSIONS[file_format]}"
+        
+        filepath = Path(output_dir or OUTPUT_DIR) / filename
+        
+        items = iter(video_data)
+        first = next(items, None)
+        if first is None:
+            logger.warning("没有需要保存的数据")
+            return None
+        # 未指定输出列时：VideoRecords 自带设置；其他数据按第一条判断（旧格式的字典包含发布时间，字符串只有 URL）
+        if isinstance(video_data, VideoRecords):
+            columns = (video_data.include_date, video_data.include_precision)
+        elif isinstance(first, dict):
+            columns = (True, 'date_precision' in first)
         else:
-            # 纯 URL 格式
-            if file_format == 'excel':
-                df = pd.DataFrame({'URL': video_data})
-                df.to_excel(filepath, index=False, engine='openpyxl')
-                logger.info(f"已保存 {len(video_data)} 条 URL 到 Excel 文件：{filepath}")
-            else:
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    for url in video_data:
-                        f.write(url + '\n')
-                logger.info(f"已保存 {len(video_data)} 条 URL 到文本文件：{filepath}")
+            first = as_record(first)
+            columns = (first.upload_date is not None or first.date_precision is not None, first.date_precision is not None)
+        include_date = columns[0] if include_date is None else include_date
+        include_precision = columns[1] if include_precision is None else include_precision
+        include_precision = include_date and include_precision
+        
+        # 保存耗时只统计写入本身（数据是边抓取边产出的，不计入等待抓取的时间）
+        video_ids = []
+        save_elapsed = 0.0
+        with open_writer(filepath, file_format, include_date, include_precision) as writer:
+            for item in map(as_record, itertools.chain([first], items)):
+                write_start = time.perf_counter()
+                writer.write(item)
+                save_elapsed += time.perf_counter() - write_start
+                if self.seen_index is not None:
+                    if item.video_id != 'N/A':
+                        video_ids.append(item.video_id)
+                    else:
+                        video_ids.extend(extract_video_ids([item.url]))
+            write_start = time.perf_counter()
+        save_elapsed += time.perf_counter() - write_start
+        STAGE_SECONDS.observe(save_elapsed, stage='save')
+        BYTES_WRITTEN.inc(filepath.stat().st_size, format=file_format)
+        RECORDS_WRITTEN.inc(writer.count, format=file_format)
+        
+        unit = '条数据' if include_date else '条 URL'
+        logger.info(f"已保存 {writer.count} {unit}到{FORMAT_NAMES[file_format]}：{filepath}")
         
+        self._record_seen(video_ids, channel_url)
         return filepath
+    
+    def _record_seen(self, video_ids: List[str], channel_url: Optional[str] = None) -> None:
+        """
+        把已保存的视频记录到已抓取视频索引（失败不影响保存结果）
+        
+        Args:
+            video_ids: 视频 ID 列表
+            channel_url: 频道 URL，为 None 时只记录到全局索引
+        """
+        if self.seen_index is None or not video_ids:
+            return
+        try:
+            channel_key = self._get_channel_upload_url(channel_url) if channel_url else None
+            added = self.seen_index.add(video_ids, channel_key)
+            logger.info(f"已记录到已抓取视频索引：新增 {added} 个视频")
+        except Exception as e:
+            logger.warning(f"更新已抓取视频索引失败：{str(e)}")
+
 
+
+def warm_up() -> float:
+    """
+    预加载 yt-dlp 和 YouTube 提取器，让第一次抓取不再承担导入开销
+    
+    可在 gunicorn preload_app 的主进程中调用（fork 出的 worker 直接共享已导入的模块），
+    也可在单进程模式下放到后台线程执行。只导入模块、不创建网络连接和数据库连接，fork 前调用是安全的。
+    
+    Returns:
+        耗时（秒）
+    """
+    start_time = time.time()
+    import yt_dlp
+    
+    with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}) as ydl:
+        for ie_key in ('YoutubeTab', 'Youtube'):
+            ydl.get_info_extractor(ie_key)
+    elapsed = time.time() - start_time
+    logger.info(f"已预加载 yt-dlp（{yt_dlp.version.__version__}），耗时 {elapsed:.2f} 秒")
+    return elapsed
@@ -0,0 +1,354 @@
+"""
+已抓取视频索引模块
+记录服务输出过的所有视频 ID（按频道和全局），下次抓取无需上传文件即可排重
+
+视频 ID 为 11 位 base64url 字符：前 10 位各 6 bit，最后一位只有 16 种取值（4 bit），正好压缩为一个 64 位整数。
+每个索引文件是排好序的 uint64 数组，通过内存映射读取，二分查找，不需要把整个索引载入内存。
+
+新增的 ID 先合并进同名的增量文件（*.delta.u64，同样有序），每次保存只重写这个小文件；
+增量文件超过 seen_delta_max 条时再整体合并进主文件。
+"""
+import bisect
+import hashlib
+import mmap
+import os
+import threading
+from array import array
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows 上没有 fcntl，只保证进程内的写入互斥
+    fcntl = None
+
+from core.config import CACHE_CONFIG
+from core.logger import setup_logger
+from .exclude import URL_ID_PATTERN
+
+logger = setup_logger("youtube_seen_index")
+
+ID_ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_'
+ID_CHAR_VALUES = {ch: i for i, ch in enumerate(ID_ALPHABET)}
+
+SCOPE_CHANNEL = 'channel'
+SCOPE_GLOBAL = 'global'
+
+
+def encode_video_id(video_id: str) -> Optional[int]:
+    """
+    视频 ID -> 64 位整数
+
+    Args:
+        video_id: 11 位视频 ID
+
+    Returns:
+        整数编码；不是合法的视频 ID 时返回 None
+    """
+    if not video_id or len(video_id) != 11:
+        return None
+    value = 0
+    try:
+        for ch in video_id[:10]:
+            value = (value << 6) | ID_CHAR_VALUES[ch]
+        last = ID_CHAR_VALUES[video_id[10]]
+    except KeyError:
+        return None
+    if last & 3:
+        return None
+    return (value << 4) | (last >> 2)
+
+
+def decode_video_id(value: int) -> str:
+    """
+    64 位整数 -> 视频 ID
+
+    Args:
+        value: encode_video_id() 的结果
+
+    Returns:
+        11 位视频 ID
+    """
+    chars = [ID_ALPHABET[(value & 0xF) << 2]]
+    value >>= 4
+    for _ in range(10):
+        chars.append(ID_ALPHABET[value & 0x3F])
+        value >>= 6
+    return ''.join(reversed(chars))
+
+
+def _delta_path(path: Path) -> Path:
+    """主索引文件对应的增量文件"""
+    return path.with_suffix('.delta.u64')
+
+
+def _map_file(path: Path) -> tuple:
+    """
+    以只读内存映射打开索引文件
+
+    Returns:
+        (mmap, uint64 视图)；文件不存在或为空时为 (None, ())
+    """
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < 8:
+                return None, ()
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except FileNotFoundError:
+        return None, ()
+    return mapped, memoryview(mapped).cast('Q')
+
+
+def _sorted_contains(values, value: int) -> bool:
+    """在有序数组中二分查找"""
+    i = bisect.bisect_left(values, value)
+    return i < len(values) and values[i] == value
+
+
+class SeenIdSet:
+    """
+    索引文件的只读快照（支持 in 和 len，可直接替代视频 ID 集合用于排重）
+
+    快照创建后不再变化；其他进程更新索引时会替换文件，不影响已打开的快照。
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        # 先打开增量文件再打开主文件：合并时先替换主文件再删除增量文件，任何时刻打开都不会漏掉 ID
+        self._segments = [_map_file(_delta_path(path)), _map_file(path)]
+
+    def __len__(self) -> int:
+        return sum(len(values) for _, values in self._segments)
+
+    def __contains__(self, video_id) -> bool:
+        value = encode_video_id(video_id) if isinstance(video_id, str) else None
+        if value is None:
+            return False
+        return any(_sorted_contains(values, value) for _, values in self._segments)
+
+    def close(self) -> None:
+        """释放内存映射"""
+        for mapped, values in self._segments:
+            if mapped is not None:
+                values.release()
+                mapped.close()
+        self._segments = []
+
+
+class SeenVideoIndex:
+    """已抓取视频索引（全局一个文件，每个频道一个文件；多线程 / 多进程安全）"""
+
+    def __init__(self, index_dir: Optional[str] = None, delta_max: Optional[int] = None):
+        """
+        初始化索引
+
+        Args:
+            index_dir: 索引目录，默认使用配置文件中的值
+            delta_max: 增量文件超过多少条时合并进主文件，默认使用配置文件中的值
+        """
+        self.index_dir = Path(index_dir or CACHE_CONFIG["seen_dir"])
+        self.delta_max = delta_max if delta_max is not None else CACHE_CONFIG["seen_delta_max"]
+        (self.index_dir / 'channels').mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, channel_key: Optional[str]) -> Path:
+        if channel_key is None:
+            return self.index_dir / 'all.u64'
+        digest = hashlib.sha1(channel_key.encode('utf-8')).hexdigest()
+        return self.index_dir / 'channels' / f"{digest}.u64"
+
+    @contextmanager
+    def _write_lock(self):
+        """写入锁：进程内用线程锁，进程间用文件锁"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.index_dir / '.lock', 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _read(path: Path) -> array:
+        """读取整个索引文件"""
+        values = array('Q')
+        try:
+            with open(path, 'rb') as f:
+                values.frombytes(f.read())
+        except FileNotFoundError:
+            pass
+        return values
+
+    @staticmethod
+    def _write(path: Path, values: array) -> None:
+        """写入索引文件（先写临时文件再改名，读取方不会看到半个文件）"""
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            values.tofile(f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _merge_sorted(existing, values: List[int]) -> tuple:
+        """
+        把排好序的新值合并进有序数组（只对新值二分查找插入位置，已有部分按片段整体复制）
+
+        Returns:
+            (合并后的数组, 实际新增的数量)
+        """
+        merged = array('Q')
+        added = 0
+        start = 0
+        for value in values:
+            i = bisect.bisect_left(existing, value, start)
+            if i < len(existing) and existing[i] == value:
+                continue
+            merged.extend(existing[start:i])
+            merged.append(value)
+            start = i
+            added += 1
+        merged.extend(existing[start:])
+        return merged, added
+
+    def _merge(self, path: Path, values: List[int]) -> int:
+        """
+        把排好序的新值合并进索引（调用方需持有写入锁）
+
+        主文件只做内存映射二分查找，新值写入增量文件；增量文件超过 delta_max 条时才重写主文件。
+
+        Returns:
+            实际新增的数量
+        """
+        mapped, base = _map_file(path)
+        try:
+            values = [value for value in values if not _sorted_contains(base, value)]
+        finally:
+            if mapped is not None:
+                base.release()
+                mapped.close()
+        if not values:
+            return 0
+
+        delta_path = _delta_path(path)
+        delta, added = self._merge_sorted(self._read(delta_path), values)
+        if not added:
+            return 0
+        if len(delta) <= self.delta_max:
+            self._write(delta_path, delta)
+            return added
+
+        # 合并进主文件：先替换主文件再删除增量文件
+        merged, _ = self._merge_sorted(self._read(path), delta.tolist())
+        self._write(path, merged)
+        delta_path.unlink(missing_ok=True)
+        logger.debug(f"索引已合并：{path.name}，共 {len(merged)} 条")
+        return added
+
+    def add(self, video_ids: Iterable[str], channel_key: Optional[str] = None) -> int:
+        """
+        记录视频 ID（同时写入全局索引和频道索引）
+
+        Args:
+            video_ids: 视频 ID 列表
+            channel_key: 频道标识（上传列表 URL），为 None 时只写入全局索引
+
+        Returns:
+            全局索引中新增的数量
+        """
+        values = sorted({v for v in map(encode_video_id, video_ids) if v is not None})
+        if not values:
+            return 0
+        with self._write_lock():
+            added = self._merge(self._path(None), values)
+            if channel_key is not None:
+                self._merge(self._path(channel_key), values)
+        return added
+
+    def snapshot(self, channel_key: Optional[str] = None) -> SeenIdSet:
+        """
+        打开索引的只读快照
+
+        Args:
+            channel_key: 频道标识（上传列表 URL），为 None 时返回全局索引
+
+        Returns:
+            支持 in 和 len 的视频 ID 集合
+        """
+        return SeenIdSet(self._path(channel_key))
+
+    def contains(self, video_id: str, channel_key: Optional[str] = None) -> bool:
+        """
+        查询视频是否已经输出过
+
+        Args:
+            video_id: 视频 ID
+            channel_key: 频道标识（上传列表 URL），为 None 时查询全局索引
+
+        Returns:
+            是否已输出过
+        """
+        seen = self.snapshot(channel_key)
+        try:
+            return video_id in seen
+        finally:
+            seen.close()
+
+    def reset(self, channel_key: Optional[str] = None) -> None:
+        """
+        清除频道索引（channel_key 为 None 时清除全局索引）
+
+        Args:
+            channel_key: 频道标识（上传列表 URL）
+        """
+        with self._write_lock():
+            path = self._path(channel_key)
+            _delta_path(path).unlink(missing_ok=True)
+            path.unlink(missing_ok=True)
+
+
+def extract_video_ids(video_data) -> List[str]:
+    """
+    从抓取结果中取出视频 ID
+
+    Args:
+        video_data: URL 字符串列表或包含 video_id / url 的字典列表
+
+    Returns:
+        视频 ID 列表
+    """
+    ids = []
+    for item in video_data:
+        if isinstance(item, dict):
+            video_id = item.get('video_id')
+            if not video_id or video_id == 'N/A':
+                match = URL_ID_PATTERN.search(item.get('url', '') or '')
+                video_id = match.group(1) if match else None
+        else:
+            match = URL_ID_PATTERN.search(str(item))
+            video_id = match.group(1) if match else None
+        if video_id:
+            ids.append(video_id)
+    return ids
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_seen_index() -> Optional[SeenVideoIndex]:
+    """
+    获取进程内共享的已抓取视频索引
+
+    Returns:
+        索引实例；配置中禁用时返回 None
+    """
+    global _default_index
+    if not CACHE_CONFIG["seen_enabled"]:
+        return None
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = SeenVideoIndex()
+        return _default_index
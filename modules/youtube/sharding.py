@@ -0,0 +1,192 @@
+"""
+分片模式
+获取发布时间时把频道列表按位置分成多段（每段 shard_size 个视频），在进程池中并行处理，
+结果按频道顺序合并；yt-dlp 解析视频页面的 CPU 开销分散到多个核心上
+"""
+import multiprocessing
+import queue
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional
+
+from core.config import YOUTUBE_CONFIG
+from core.logger import setup_logger
+from .journal import ScrapeJournal
+from .progress import REPORT_INTERVAL, ProgressTracker
+
+logger = setup_logger("youtube_sharding")
+
+# 工作进程的状态（进程池初始化时设置）
+_worker = {}
+
+
+def _init_worker(options: dict, progress_queue, cancel_event) -> None:
+    _worker.update(options=options, queue=progress_queue, cancel=cancel_event, scraper=None)
+
+
+def _worker_scraper():
+    """工作进程内的抓取器（每个进程一个，复用元数据缓存、限速器和 YoutubeDL 实例池）"""
+    if _worker['scraper'] is None:
+        from .cache import VideoMetadataCache
+        from .rate_limiter import AdaptiveRateLimiter
+        from .scraper import YouTubeScraper
+
+        options = dict(_worker['options'])
+        limiter_options = options.pop('rate_limiter')
+        cache_path = options.pop('metadata_cache_path')
+        _worker['scraper'] = YouTubeScraper(
+            metadata_cache=VideoMetadataCache(cache_path) if cache_path else None,
+            use_cache=cache_path is not None,
+            rate_limiter=AdaptiveRateLimiter(**limiter_options) if limiter_options else None,
+            use_rate_limit=limiter_options is not None,
+            use_seen_index=False,
+            **options
+        )
+    return _worker['scraper']
+
+
+def _enrich_shard(index: int, records: List[dict]) -> List[dict]:
+    """
+    工作进程：获取一段视频的发布时间（与单进程模式相同的 _iter_with_dates）
+
+    完成进度以 (段序号, 已完成数) 定期发回主进程；主进程取消时在下一次网络请求处终止。
+
+    Args:
+        index: 段序号
+        records: 该段的视频信息（按频道顺序）
+
+    Returns:
+        包含 upload_date 的视频信息（顺序不变）
+    """
+    scraper = _worker_scraper()
+    progress_queue = _worker['queue']
+    tracker = ProgressTracker(lambda *args: None, len(records), include_date=True,
+                              stall_timeout=YOUTUBE_CONFIG["stall_timeout"], cancel_event=_worker['cancel'])
+    results = []
+    last_report = 0.0
+    for record in scraper._iter_with_dates(iter(records), None, tracker):
+        results.append(record)
+        now = time.monotonic()
+        if now - last_report >= REPORT_INTERVAL or len(results) == len(records):
+            last_report = now
+            progress_queue.put((index, len(results)))
+    return results
+
+
+def iter_shards(records: Iterable[dict], options: dict, processes: int, shard_size: int,
+                journal: Optional[ScrapeJournal] = None,
+                tracker: Optional[ProgressTracker] = None) -> Iterator[dict]:
+    """
+    分片获取发布时间，按频道顺序产出
+
+    列表条目边到达边分段提交（列表翻页与各段的处理同时进行），同时在途的段数有上限；
+    各段完成后按段序号依次产出。列表翻页期间有新视频上传时同一视频可能出现在相邻两页，
+    按视频 ID 去重，重复的只保留第一次出现。
+
+    Args:
+        records: 视频信息（见 YouTubeScraper._iter_with_dates）
+        options: 工作进程抓取器的参数（见 YouTubeScraper._shard_worker_options，必须可以 pickle）
+        processes: 进程数
+        shard_size: 每段的视频数
+        journal: 任务日志（断点续传）：提交前跳过已完成的视频，每段完成后追加
+        tracker: 进度跟踪器，接收各段的完成进度；在这里检查是否停滞或已取消
+
+    Yields:
+        包含 upload_date 的视频信息（获取失败时为 'N/A'）
+    """
+    records = iter(records)
+    resumed = journal.load() if journal is not None else {}
+    context = multiprocessing.get_context('spawn')
+    progress_queue = context.Queue()
+    cancel_event = context.Event()
+    executor = ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=_init_worker,
+                                   initargs=(options, progress_queue, cancel_event))
+    max_inflight = processes * 2
+    window = deque()  # (段序号, Future)，保持频道顺序
+    seen_ids = set()
+    stats = {'shards': 0, 'duplicates': 0, 'resumed': 0}
+
+    def drain(timeout: float = 0.0) -> None:
+        """把工作进程发回的进度交给跟踪器"""
+        while True:
+            try:
+                index, done = progress_queue.get(timeout=timeout) if timeout else progress_queue.get_nowait()
+            except queue.Empty:
+                return
+            timeout = 0.0
+            if tracker is not None:
+                tracker.shard_progress(index, done, shard_totals[index])
+
+    def wait(index: int, future) -> List[dict]:
+        while not future.done():
+            drain(0.2)
+            if tracker is not None:
+                tracker.check()
+        drain()
+        results = future.result()
+        if tracker is not None:
+            tracker.shard_progress(index, len(results), len(results))
+        return results
+
+    def finish(index: int, future) -> Iterator[dict]:
+        for record in wait(index, future):
+            if journal is not None and record['upload_date'] != 'N/A' and \
+                    record.get('date_precision') in (None, 'exact') and record['video_id'] not in resumed:
+                journal.append(record)
+            yield record
+
+    shard_totals = {}
+    start_time = time.time()
+    logger.info(f"分片模式获取发布时间：{processes} 个进程，每段 {shard_size} 个视频")
+    try:
+        while True:
+            chunk = []
+            for item in records:
+                video_id = item.get('video_id')
+                # 只按真实的视频 ID 去重：没有 ID（None / 'N/A'）的记录各自保留
+                if video_id and video_id != 'N/A':
+                    if video_id in seen_ids:
+                        stats['duplicates'] += 1
+                        if tracker is not None:
+                            tracker.skipped()
+                        continue
+                    seen_ids.add(video_id)
+                record = resumed.get(item['video_id'])
+                if record and record.get('upload_date') and \
+                        (not item.get('upload_date') or item.get('date_precision') not in (None, 'exact')):
+                    item['upload_date'] = record['upload_date']
+                    if 'date_precision' in item:
+                        item['date_precision'] = 'exact'
+                    item.pop('approximate_date', None)
+                    stats['resumed'] += 1
+                chunk.append(item)
+                if len(chunk) >= shard_size:
+                    break
+            if not chunk:
+                break
+
+            index = stats['shards']
+            stats['shards'] += 1
+            shard_totals[index] = len(chunk)
+            if tracker is not None:
+                tracker.shard_progress(index, 0, len(chunk))
+            window.append((index, executor.submit(_enrich_shard, index, chunk)))
+
+            # 产出已完成的队首段；在途段数超过上限时等待队首完成
+            while window and (window[0][1].done() or len(window) > max_inflight):
+                yield from finish(*window.popleft())
+            drain()
+
+        while window:
+            yield from finish(*window.popleft())
+    finally:
+        # 提前停止（调用方停止迭代、停滞、取消）时通知正在运行的段在下一次网络请求处终止
+        cancel_event.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+        progress_queue.close()
+
+    logger.info(
+        f"分片获取发布时间完成：{stats['shards']} 段，断点恢复 {stats['resumed']} 条，"
+        f"跨段重复 {stats['duplicates']} 条，耗时 {time.time() - start_time:.1f} 秒"
+    )
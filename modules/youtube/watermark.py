@@ -0,0 +1,116 @@
+"""
+频道增量同步水位模块
+记录每个频道最近一次抓取到的最新视频 ID，下次抓取遇到这些视频即停止翻页
+"""
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from core.config import CACHE_CONFIG
+from core.logger import setup_logger
+
+logger = setup_logger("youtube_watermark")
+
+
+class ChannelWatermarkStore:
+    """频道水位存储（SQLite）"""
+
+    def __init__(self, db_path: Optional[str] = None, history_size: Optional[int] = None):
+        """
+        初始化水位存储
+
+        Args:
+            db_path: SQLite 文件路径，默认使用配置文件中的值
+            history_size: 每个频道保留的最新视频 ID 数量（最新视频被删除时仍能命中较早的 ID）
+        """
+        self.db_path = Path(db_path or CACHE_CONFIG["watermark_path"])
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.history_size = history_size or CACHE_CONFIG["watermark_history"]
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS channel_watermark (
+                    channel_key TEXT PRIMARY KEY,
+                    recent_ids TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.commit()
+
+    def get(self, channel_key: str) -> List[str]:
+        """
+        获取频道的水位（最新视频 ID 列表，从新到旧）
+
+        Args:
+            channel_key: 频道标识（上传列表 URL）
+
+        Returns:
+            视频 ID 列表，没有记录时返回空列表
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT recent_ids FROM channel_watermark WHERE channel_key = ?", (channel_key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def update(self, channel_key: str, newest_ids: List[str]) -> None:
+        """
+        更新频道水位：新抓取到的 ID 排在前面，与旧水位合并后截断
+
+        Args:
+            channel_key: 频道标识（上传列表 URL）
+            newest_ids: 本次列表中从新到旧的视频 ID
+        """
+        merged = list(dict.fromkeys([vid for vid in newest_ids if vid] + self.get(channel_key)))
+        merged = merged[:self.history_size]
+        if not merged:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO channel_watermark (channel_key, recent_ids, updated_at) VALUES (?, ?, ?)",
+                (channel_key, json.dumps(merged), time.time())
+            )
+            self._conn.commit()
+        logger.info(f"已更新频道水位：{channel_key} -> {merged[0]}")
+
+    def reset(self, channel_key: str) -> None:
+        """
+        清除频道水位（下次抓取将重新完整抓取）
+
+        Args:
+            channel_key: 频道标识（上传列表 URL）
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM channel_watermark WHERE channel_key = ?", (channel_key,))
+            self._conn.commit()
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_watermark_store() -> ChannelWatermarkStore:
+    """
+    获取进程内共享的默认水位存储
+
+    Returns:
+        水位存储实例
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ChannelWatermarkStore()
+        return _default_store
@@ -0,0 +1,257 @@
+"""
+结果文件写入模块
+逐条写入、内存占用固定的输出格式（Excel、TXT、CSV/TSV、JSONL、Parquet）；先写临时文件，完成后再改名
+"""
+import csv
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import List
+
+# 输出格式 -> 文件扩展名
+FORMAT_EXTENSIONS = {
+    'excel': 'xlsx',
+    'txt': 'txt',
+    'csv': 'csv',
+    'tsv': 'tsv',
+    'jsonl': 'jsonl',
+    'parquet': 'parquet',
+}
+
+# 输出格式 -> 中文名称（用于日志）
+FORMAT_NAMES = {
+    'excel': 'Excel 文件',
+    'txt': '文本文件',
+    'csv': 'CSV 文件',
+    'tsv': 'TSV 文件',
+    'jsonl': 'JSONL 文件',
+    'parquet': 'Parquet 文件',
+}
+
+# 包含发布时间的结果列（与之前 DataFrame 输出的列名一致）
+DATE_COLUMNS = ['URL', '发布时间', '视频ID']
+# 近似日期模式多一列日期精度（exact、day、week、month、year）
+PRECISION_COLUMNS = DATE_COLUMNS + ['日期精度']
+URL_COLUMNS = ['URL']
+
+
+def record_to_row(record, columns: List[str]) -> list:
+    """
+    视频信息 -> 一行数据
+
+    Args:
+        record: VideoRecord（见 records.as_record）
+        columns: 输出列
+
+    Returns:
+        与 columns 对应的值列表
+    """
+    if len(columns) == 1:
+        return [record.url]
+    row = [record.url, record.upload_date or 'N/A', record.video_id, record.date_precision or 'N/A']
+    return row[:len(columns)]
+
+
+class RecordWriter:
+    """
+    结果写入器基类（上下文管理器）
+
+    数据先写入同目录下的临时文件，close() 时改名为目标文件；出错时 abort() 删除临时文件，
+    目标文件要么不存在，要么是完整的。
+    """
+
+    def __init__(self, path: Path, columns: List[str]):
+        """
+        Args:
+            path: 目标文件路径
+            columns: 输出列（PRECISION_COLUMNS、DATE_COLUMNS 或 URL_COLUMNS）
+        """
+        self.path = Path(path)
+        self.columns = columns
+        self.count = 0
+        self.tmp_path = self.path.with_name(f".{self.path.name}.{uuid.uuid4().hex}.tmp")
+        self._closed = False
+
+    def write(self, record) -> None:
+        """写入一条视频信息"""
+        self._write_row(record_to_row(record, self.columns))
+        self.count += 1
+
+    def _write_row(self, row: list) -> None:
+        raise NotImplementedError
+
+    def _finish(self) -> None:
+        """写完剩余数据并关闭临时文件"""
+        raise NotImplementedError
+
+    def close(self) -> Path:
+        """
+        完成写入并改名为目标文件
+
+        Returns:
+            目标文件路径
+        """
+        if not self._closed:
+            self._closed = True
+            self._finish()
+            os.replace(self.tmp_path, self.path)
+        return self.path
+
+    def abort(self) -> None:
+        """放弃写入，删除临时文件"""
+        if not self._closed:
+            self._closed = True
+            try:
+                self._discard()
+            except Exception:
+                pass
+            self.tmp_path.unlink(missing_ok=True)
+
+    def _discard(self) -> None:
+        """放弃写入时释放资源（默认与 _finish 相同）"""
+        self._finish()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+class ExcelWriter(RecordWriter):
+    """Excel 写入器（openpyxl 只写模式，逐行写入磁盘）"""
+
+    def __init__(self, path: Path, columns: List[str]):
+        super().__init__(path, columns)
+        from openpyxl import Workbook
+
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet('Sheet1')
+        self._sheet.append(columns)
+
+    def _write_row(self, row: list) -> None:
+        self._sheet.append(row)
+
+    def _finish(self) -> None:
+        # 文件扩展名决定 openpyxl 的保存格式，临时文件名不影响
+        # 放弃写入时同样保存到临时文件再删除：只写模式的行数据在 openpyxl 自己的临时文件中，保存时才会清理
+        self._workbook.save(self.tmp_path)
+
+
+class DelimitedWriter(RecordWriter):
+    """CSV / TSV 写入器（带表头）"""
+
+    def __init__(self, path: Path, columns: List[str], delimiter: str = ','):
+        super().__init__(path, columns)
+        self._file = open(self.tmp_path, 'w', encoding='utf-8', newline='')
+        self._writer = csv.writer(self._file, delimiter=delimiter)
+        self._writer.writerow(columns)
+
+    def _write_row(self, row: list) -> None:
+        self._writer.writerow(row)
+
+    def _finish(self) -> None:
+        self._file.close()
+
+
+class TextWriter(RecordWriter):
+    """TXT 写入器：只有 URL 时每行一个 URL，包含发布时间时为制表符分隔（带表头）"""
+
+    def __init__(self, path: Path, columns: List[str]):
+        super().__init__(path, columns)
+        self._file = open(self.tmp_path, 'w', encoding='utf-8')
+        if len(columns) > 1:
+            self._file.write('\t'.join(columns) + '\n')
+
+    def _write_row(self, row: list) -> None:
+        self._file.write('\t'.join(str(v) for v in row) + '\n')
+
+    def _finish(self) -> None:
+        self._file.close()
+
+
+class JsonlWriter(RecordWriter):
+    """JSONL 写入器（每行一个 JSON 对象，键为列名）"""
+
+    def __init__(self, path: Path, columns: List[str]):
+        super().__init__(path, columns)
+        self._file = open(self.tmp_path, 'w', encoding='utf-8')
+
+    def _write_row(self, row: list) -> None:
+        self._file.write(json.dumps(dict(zip(self.columns, row)), ensure_ascii=False) + '\n')
+
+    def _finish(self) -> None:
+        self._file.close()
+
+
+class ParquetWriter(RecordWriter):
+    """Parquet 写入器（需要安装 pyarrow；按行组写入，内存中最多保留一个行组）"""
+
+    ROW_GROUP_SIZE = 10000
+
+    def __init__(self, path: Path, columns: List[str]):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("输出 Parquet 格式需要安装 pyarrow：pip install pyarrow")
+        super().__init__(path, columns)
+        self._pa = pa
+        self._schema = pa.schema([(name, pa.string()) for name in columns])
+        self._writer = pq.ParquetWriter(str(self.tmp_path), self._schema)
+        self._buffer = [[] for _ in columns]
+
+    def _write_row(self, row: list) -> None:
+        for column, value in zip(self._buffer, row):
+            column.append(None if value is None else str(value))
+        if len(self._buffer[0]) >= self.ROW_GROUP_SIZE:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._buffer[0]:
+            self._writer.write_table(self._pa.Table.from_arrays(
+                [self._pa.array(column, type=self._pa.string()) for column in self._buffer],
+                schema=self._schema
+            ))
+            self._buffer = [[] for _ in self.columns]
+
+    def _finish(self) -> None:
+        self._flush()
+        self._writer.close()
+
+
+def open_writer(path: Path, file_format: str, include_date: bool, include_precision: bool = False) -> RecordWriter:
+    """
+    按格式创建写入器
+
+    Args:
+        path: 目标文件路径
+        file_format: 'excel'、'txt'、'csv'、'tsv'、'jsonl' 或 'parquet'
+        include_date: 是否包含发布时间列（否则只有 URL 列）
+        include_precision: 是否包含日期精度列（近似日期模式）
+
+    Returns:
+        写入器
+    """
+    if include_date:
+        columns = PRECISION_COLUMNS if include_precision else DATE_COLUMNS
+    else:
+        columns = URL_COLUMNS
+    if file_format == 'excel':
+        return ExcelWriter(path, columns)
+    if file_format == 'txt':
+        return TextWriter(path, columns)
+    if file_format == 'csv':
+        return DelimitedWriter(path, columns)
+    if file_format == 'tsv':
+        return DelimitedWriter(path, columns, delimiter='\t')
+    if file_format == 'jsonl':
+        return JsonlWriter(path, columns)
+    if file_format == 'parquet':
+        return ParquetWriter(path, columns)
+    raise ValueError(f"不支持的输出格式：{file_format}（可选：{', '.join(FORMAT_EXTENSIONS)}）")
@@ -0,0 +1,265 @@
+"""
+YoutubeDL 实例池
+进程内按 yt-dlp 配置复用 YoutubeDL 实例：已初始化的提取器、cookie 和 HTTP 连接（requests 处理器的 keep-alive）
+在多次抓取之间保留，不再每个频道、每个获取发布时间的线程都重新创建
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+from core.config import YDL_POOL_CONFIG
+from core.logger import setup_logger
+from core.metrics import registry
+
+logger = setup_logger("youtube_ydl_pool")
+
+POOL_CHECKOUTS = registry.counter(
+    'tube2lm_ydl_pool_checkouts_total', 'YoutubeDL 实例池借出次数（result: reused 复用、created 新建、overflow 池满临时创建）',
+    ['profile', 'result']
+)
+POOL_WAIT_SECONDS = registry.histogram(
+    'tube2lm_ydl_pool_wait_seconds', '实例全部在使用时等待空闲实例的时间（秒）', ['profile']
+)
+
+
+def _profile_key(opts: dict) -> str:
+    """yt-dlp 配置的比较键（不含 logger，logger 在借出时替换）"""
+    return json.dumps({k: v for k, v in opts.items() if k != 'logger'}, sort_keys=True, default=repr)
+
+
+class _Profile:
+    """同一种配置的实例"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.idle = deque()  # (实例, 放回时间, 已借出次数)
+        self.in_use = 0
+        self.stats = {'created': 0, 'reused': 0, 'overflow': 0, 'retired': 0, 'waits': 0, 'wait_seconds': 0.0}
+
+    @property
+    def size(self) -> int:
+        return len(self.idle) + self.in_use
+
+
+class YdlPool:
+    """
+    YoutubeDL 实例池（线程安全）
+
+    实例按 yt-dlp 配置分组，借出期间只被一个线程使用（YoutubeDL 不是线程安全的）。
+    借出时把实例的 logger 换成调用方的 logger（yt-dlp 每次输出时才读取 params['logger']），
+    用完放回池中而不关闭。某种配置的实例数达到 max_size 时等待其他线程放回，
+    超过 wait_timeout 秒仍没有空闲实例就临时创建一个，用完即关闭。
+    空闲超过 idle_timeout 秒（服务端可能已断开连接）或借出超过 max_uses 次的实例会被关闭并重新创建。
+    """
+
+    def __init__(self, factory: Optional[Callable[[dict], object]] = None, max_size: Optional[int] = None,
+                 wait_timeout: Optional[float] = None, idle_timeout: Optional[float] = None,
+                 max_uses: Optional[int] = None):
+        """
+        Args:
+            factory: 创建 YoutubeDL 的函数（参数为 yt-dlp 配置字典），默认使用 yt_dlp.YoutubeDL
+            max_size: 每种配置最多的实例数（使用中 + 空闲），默认使用配置文件中的值
+            wait_timeout: 实例全部在使用时最多等待的秒数
+            idle_timeout: 空闲实例的最长保留秒数，0 表示不限制
+            max_uses: 单个实例最多借出的次数，0 表示不限制
+        """
+        self.factory = factory
+        self.max_size = max(1, max_size or YDL_POOL_CONFIG["max_size"])
+        self.wait_timeout = YDL_POOL_CONFIG["wait_timeout"] if wait_timeout is None else wait_timeout
+        self.idle_timeout = YDL_POOL_CONFIG["idle_timeout"] if idle_timeout is None else idle_timeout
+        self.max_uses = YDL_POOL_CONFIG["max_uses"] if max_uses is None else max_uses
+        self._profiles: Dict[str, _Profile] = {}
+        self._pid = os.getpid()
+        self._cond = threading.Condition()
+
+    def _create(self, opts: dict):
+        if self.factory is not None:
+            return self.factory(opts)
+
+        # yt-dlp 导入较慢，只在第一次借出时导入
+        import yt_dlp
+
+        return yt_dlp.YoutubeDL(opts)
+
+    @staticmethod
+    def _close(ydl) -> None:
+        try:
+            ydl.close()
+        except Exception as e:
+            logger.debug(f"关闭 YoutubeDL 实例失败：{str(e)}")
+
+    def _check_fork(self) -> None:
+        """fork 出的子进程不使用父进程的实例（连接是共享的），直接丢弃，不关闭（调用时已持有锁）"""
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._profiles = {}
+
+    @contextmanager
+    def checkout(self, opts: dict, ydl_logger=None, name: str = 'default') -> Iterator:
+        """
+        借出一个指定配置的 YoutubeDL 实例，退出时放回池中
+
+        不要对借出的实例使用 with（YoutubeDL.__exit__ 会关闭实例）。
+
+        Args:
+            opts: yt-dlp 配置字典（不含 logger）
+            ydl_logger: 借出期间使用的 logger
+            name: 配置名称（用于统计和指标，例如 'listing'、'video'）
+
+        Yields:
+            YoutubeDL 实例
+        """
+        key = _profile_key(opts)
+        ydl, uses, overflow = None, 0, False
+        expired = []
+        wait_start = None
+        with self._cond:
+            self._check_fork()
+            profile = self._profiles.get(key)
+            if profile is None:
+                profile = self._profiles[key] = _Profile(name)
+            deadline = None
+            while True:
+                now = time.monotonic()
+                while profile.idle:
+                    candidate, returned_at, candidate_uses = profile.idle.pop()
+                    if self.idle_timeout and now - returned_at > self.idle_timeout:
+                        expired.append(candidate)
+                        continue
+                    ydl, uses = candidate, candidate_uses
+                    break
+                if ydl is not None or profile.size < self.max_size:
+                    break
+                if deadline is None:
+                    wait_start = now
+                    deadline = now + self.wait_timeout
+                remaining = deadline - now
+                if remaining <= 0:
+                    overflow = True
+                    break
+                self._cond.wait(remaining)
+            if wait_start is not None:
+                waited = time.monotonic() - wait_start
+                profile.stats['waits'] += 1
+                profile.stats['wait_seconds'] += waited
+                POOL_WAIT_SECONDS.observe(waited, profile=name)
+            if not overflow:
+                profile.in_use += 1
+            profile.stats['retired'] += len(expired)
+            if ydl is not None:
+                profile.stats['reused'] += 1
+            else:
+                profile.stats['overflow' if overflow else 'created'] += 1
+        POOL_CHECKOUTS.inc(profile=name, result='reused' if ydl is not None else ('overflow' if overflow else 'created'))
+
+        for candidate in expired:
+            self._close(candidate)
+        try:
+            if ydl is None:
+                ydl = self._create({**opts, 'logger': ydl_logger})
+            else:
+                ydl.params['logger'] = ydl_logger
+        except BaseException:
+            if not overflow:
+                with self._cond:
+                    profile.in_use -= 1
+                    self._cond.notify()
+            raise
+
+        try:
+            yield ydl
+        finally:
+            self._release(key, profile, ydl, uses + 1, overflow)
+
+    def _release(self, key: str, profile: _Profile, ydl, uses: int, overflow: bool) -> None:
+        # 放回后不再引用调用方的 logger（其中可能持有进度跟踪器）
+        try:
+            ydl.params['logger'] = None
+        except Exception:
+            pass
+        retire = overflow or (self.max_uses and uses >= self.max_uses)
+        with self._cond:
+            if not overflow:
+                profile.in_use -= 1
+                # fork 后或 clear() 之后借出的实例不再放回
+                if self._profiles.get(key) is not profile:
+                    retire = True
+                elif not retire:
+                    profile.idle.append((ydl, time.monotonic(), uses))
+                if retire:
+                    profile.stats['retired'] += 1
+                self._cond.notify()
+        if retire:
+            self._close(ydl)
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            按配置名称汇总的实例数（size、idle、in_use）、借出统计（created、reused、overflow、retired）、
+            等待次数和等待总秒数
+        """
+        result = {}
+        with self._cond:
+            for profile in self._profiles.values():
+                item = result.setdefault(profile.name, {
+                    'size': 0, 'idle': 0, 'in_use': 0,
+                    'created': 0, 'reused': 0, 'overflow': 0, 'retired': 0, 'waits': 0, 'wait_seconds': 0.0,
+                })
+                item['size'] += profile.size
+                item['idle'] += len(profile.idle)
+                item['in_use'] += profile.in_use
+                for name, value in profile.stats.items():
+                    item[name] += value
+        for item in result.values():
+            item['wait_seconds'] = round(item['wait_seconds'], 3)
+        return result
+
+    def clear(self) -> None:
+        """关闭所有空闲实例（使用中的实例放回时关闭）"""
+        with self._cond:
+            idle = [ydl for profile in self._profiles.values() for ydl, _, _ in profile.idle]
+            self._profiles = {}
+            self._cond.notify_all()
+        for ydl in idle:
+            self._close(ydl)
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_ydl_pool() -> Optional[YdlPool]:
+    """
+    获取进程内共享的 YoutubeDL 实例池
+
+    Returns:
+        实例池；配置中禁用时返回 None
+    """
+    global _default_pool
+    if not YDL_POOL_CONFIG["enabled"]:
+        return None
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = YdlPool()
+        return _default_pool
+
+
+def _pool_instances() -> dict:
+    """当前各配置的实例数（供 /metrics 采集时读取）"""
+    pool = _default_pool
+    if pool is None:
+        return {}
+    samples = {}
+    for name, item in pool.stats().items():
+        samples[(name, 'idle')] = item['idle']
+        samples[(name, 'in_use')] = item['in_use']
+    return samples
+
+
+registry.gauge('tube2lm_ydl_pool_instances', 'YoutubeDL 实例池中的实例数', ['profile', 'state']).set_function(
+    _pool_instances
+)
@@ -2,15 +2,26 @@
 YouTube 视频 URL 抓取工具 - Web 界面
 在浏览器中打开 http://localhost:5000 即可使用
 """
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, Response, stream_with_context
 import os
-import uuid
+import json
 import threading
+import time
+import uuid
 from pathlib import Path
 from werkzeug.utils import secure_filename
-from modules.youtube.scraper import YouTubeScraper
+from modules.youtube.date_window import DateWindow
+from modules.youtube.records import DATE_PRECISIONS, VideoRecords
+from modules.youtube.scraper import YouTubeScraper, warm_up
+from modules.youtube.result_cache import ResultCache, get_result_cache
+from modules.youtube.exclude import EXCLUDE_EXTENSIONS, file_sha1
+from modules.youtube.rate_limiter import get_rate_limiter
+from modules.youtube.writers import FORMAT_EXTENSIONS
 from core.logger import setup_logger
-from core.config import OUTPUT_DIR
+from core.config import METRICS_CONFIG, OUTPUT_DIR, WEB_CONFIG, YOUTUBE_CONFIG
+from core.jobs import JobScheduler, QueueFullError
+from core import metrics
+from core.task_store import create_task_store
 
 BASE_DIR = Path(__file__).parent
 
@@ -22,11 +33,80 @@ app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0  # 禁用静态文件缓存
 
 logger = setup_logger("web_app")
 
-ALLOWED_EXTENSIONS = {'xlsx', 'xls'}
+ALLOWED_EXTENSIONS = EXCLUDE_EXTENSIONS
+
+# 任务状态存储（进度和部分结果），多个 gunicorn worker 共享，超过 TTL 未更新的任务自动过期
+task_store = create_task_store()
+
+# 部分结果每积累多少条或每隔多少秒写入一次任务状态存储
+RESULTS_FLUSH_SIZE = 50
+RESULTS_FLUSH_SECONDS = 1.0
+
+# SSE 连接名额：每个连接占用一个 gthread 线程，同时保持的连接数有上限，其余线程留给普通请求
+sse_slots = threading.BoundedSemaphore(max(1, WEB_CONFIG['sse_max_streams']))
+
+def publish_queue_positions(lane, job_ids):
+    """排队位置写入任务状态存储（任务所在的 worker 调用，其他 worker 的进度查询和 SSE 推送都能读到）"""
+    for position, job_id in enumerate(job_ids):
+        task_store.set_progress(job_id, {
+            'stage': 'queued',
+            'progress': 0,
+            'message': f'排队中，前面还有 {position} 个任务...',
+            'current_count': 0,
+            'total_count': 0,
+            'estimated_time': None,
+            'queue_position': position
+        })
+
+
+def stored_queue_position(task_id):
+    """从任务状态存储读取排队位置（任务不在排队中时返回 None）"""
+    current = task_store.get_progress(task_id)
+    if current is None or current[0].get('stage') != 'queued':
+        return None
+    return current[0].get('queue_position')
+
+
+# 任务调度器：只获取 URL 的任务走 fast 通道，获取发布时间的任务走 slow 通道
+# （调度器在每个 worker 进程内；跨 worker 的任务合并和排队位置通过共享的任务状态存储）
+scheduler = JobScheduler(
+    {'fast': WEB_CONFIG['fast_workers'], 'slow': WEB_CONFIG['slow_workers']},
+    WEB_CONFIG['max_queue'],
+    on_queue_change=publish_queue_positions
+)
 
-# 全局进度存储（任务ID -> 进度信息）
-progress_store = {}
-progress_lock = threading.Lock()
+
+def _lane_stats(field):
+    """调度器各通道的统计值 -> 指标样本"""
+    return lambda: {(lane, ): info[field] for lane, info in scheduler.stats()['lanes'].items()}
+
+
+def _rate_limiter_stat(field):
+    """限速器的统计值 -> 指标样本（限速关闭时没有样本）"""
+    def collect():
+        limiter = get_rate_limiter()
+        return {(): limiter.stats()[field]} if limiter is not None else {}
+    return collect
+
+
+# 调度器和限速器的状态在采集时读取（用于设置自动扩缩容目标）
+metrics.registry.gauge('tube2lm_queue_depth', '排队中的任务数', ['lane']).set_function(_lane_stats('queued'))
+metrics.registry.gauge('tube2lm_active_jobs', '执行中的任务数', ['lane']).set_function(_lane_stats('running'))
+metrics.registry.gauge('tube2lm_lane_workers', '通道的工作线程数', ['lane']).set_function(_lane_stats('workers'))
+metrics.registry.counter('tube2lm_jobs_total', '任务调度计数', ['event']).set_function(
+    lambda: {(event, ): scheduler.stats()[event] for event in ('submitted', 'coalesced', 'rejected', 'completed', 'failed')}
+)
+metrics.registry.gauge('tube2lm_rate_limit_rps', '自适应限速器当前的请求速率').set_function(_rate_limiter_stat('rate'))
+metrics.registry.gauge('tube2lm_rate_limit_concurrency', '自适应限速器当前的并发数').set_function(
+    _rate_limiter_stat('concurrency')
+)
+
+
+@app.before_request
+def start_metrics_exporter():
+    """每个 worker 处理第一个请求时启动指标快照写入线程（供 /metrics 汇总多个 worker）"""
+    if METRICS_CONFIG['enabled']:
+        metrics.exporter.ensure_started()
 
 
 @app.route('/')
@@ -40,22 +120,42 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def update_progress(task_id, stage, progress, message, current_count=0, total_count=0, estimated_time=None):
-    """更新进度信息"""
-    with progress_lock:
-        progress_store[task_id] = {
-            'stage': stage,
-            'progress': progress,
-            'message': message,
-            'current_count': current_count,
-            'total_count': total_count,
-            'estimated_time': estimated_time
-        }
+def update_progress(task_id, stage, progress, message, current_count=0, total_count=0, estimated_time=None, result=None,
+                    stats=None):
+    """更新进度信息（最终结果与完成状态一起写入，SSE 推送随之唤醒；stats 为抓取速率等统计）"""
+    info = {
+        'stage': stage,
+        'progress': progress,
+        'message': message,
+        'current_count': current_count,
+        'total_count': total_count,
+        'estimated_time': estimated_time
+    }
+    if result is not None:
+        info['result'] = result
+    if stats is not None:
+        info['stats'] = stats
+    task_store.set_progress(task_id, info)
     # 添加调试日志（每10%或重要阶段记录）
     if progress % 10 == 0 or stage in ['init', 'starting', 'completed', 'error']:
         logger.info(f"进度更新 [任务 {task_id[:8]}...]: {stage} {progress}% - {message}")
 
 
+def remove_upload(exclude_file_path):
+    """删除上传的排重文件"""
+    if exclude_file_path and Path(exclude_file_path).exists():
+        try:
+            Path(exclude_file_path).unlink()
+        except OSError:
+            pass
+
+
+def discard_task(task_id, exclude_file_path=None):
+    """丢弃未执行的任务（删除进度信息和上传的排重文件）"""
+    task_store.delete(task_id)
+    remove_upload(exclude_file_path)
+
+
 @app.route('/api/scrape', methods=['POST'])
 def scrape():
     """抓取视频 URL 的 API 接口（支持文件上传排重和进度跟踪）"""
@@ -67,14 +167,17 @@ def scrape():
         
         # 检查是否有文件上传
         exclude_file_path = None
+        exclude_hash = ''
         if 'exclude_file' in request.files:
             file = request.files['exclude_file']
             if file and file.filename and allowed_file(file.filename):
                 update_progress(task_id, 'reading_exclude', 2, '正在读取排重文件...', 0, 0)
                 filename = secure_filename(file.filename)
-                filepath = app.config['UPLOAD_FOLDER'] / filename
+                # 文件名加任务ID前缀，避免同名文件的并发请求互相覆盖
+                filepath = app.config['UPLOAD_FOLDER'] / f"{task_id}_{filename}"
                 file.save(filepath)
                 exclude_file_path = str(filepath)
+                exclude_hash = file_sha1(filepath)
                 logger.info(f"已上传排重文件：{filename}")
                 update_progress(task_id, 'reading_exclude', 5, f'已读取排重文件：{filename}', 0, 0)
         
@@ -83,26 +186,110 @@ def scrape():
             data = request.json
             channel_url = data.get('channel_url', '').strip()
             include_date = data.get('include_date', True)
+            incremental = bool(data.get('incremental', False))
+            job_key = (data.get('job_key') or '').strip()
+            refresh = bool(data.get('refresh', False))
+            exclude_seen = data.get('exclude_seen') or ''
+            file_format = data.get('file_format') or 'excel'
+            date_precision = data.get('date_precision') or 'exact'
+            since = data.get('since') or ''
+            until = data.get('until') or ''
+            if exclude_seen is True:
+                exclude_seen = 'channel'
         else:
             channel_url = request.form.get('channel_url', '').strip()
             include_date = request.form.get('include_date', 'true').lower() == 'true'
+            incremental = request.form.get('incremental', 'false').lower() == 'true'
+            job_key = request.form.get('job_key', '').strip()
+            refresh = request.form.get('refresh', 'false').lower() == 'true'
+            exclude_seen = request.form.get('exclude_seen', '').strip()
+            file_format = request.form.get('file_format', '').strip() or 'excel'
+            date_precision = request.form.get('date_precision', '').strip() or 'exact'
+            since = request.form.get('since', '').strip()
+            until = request.form.get('until', '').strip()
         
         if not channel_url:
-            with progress_lock:
-                if task_id in progress_store:
-                    del progress_store[task_id]
+            task_store.delete(task_id)
             return jsonify({
                 'success': False,
                 'error': '请提供频道 URL'
             }), 400
         
+        if file_format not in FORMAT_EXTENSIONS:
+            discard_task(task_id, exclude_file_path)
+            return jsonify({
+                'success': False,
+                'error': f"不支持的输出格式：{file_format}（可选：{', '.join(FORMAT_EXTENSIONS)}）"
+            }), 400
+        
+        if exclude_seen not in ('', 'channel', 'global'):
+            discard_task(task_id, exclude_file_path)
+            return jsonify({
+                'success': False,
+                'error': "exclude_seen 只能是 'channel' 或 'global'"
+            }), 400
+        
+        if date_precision not in DATE_PRECISIONS:
+            discard_task(task_id, exclude_file_path)
+            return jsonify({
+                'success': False,
+                'error': f"date_precision 只能是 {', '.join(DATE_PRECISIONS)}"
+            }), 400
+        # 时间窗口：相对日期（如 90d）在这里换算为具体日期，结果缓存和任务合并按具体日期区分
+        try:
+            window = DateWindow(since, until)
+        except ValueError as e:
+            discard_task(task_id, exclude_file_path)
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        # 近似日期模式：发布时间取自列表，只有精度不够的视频才逐个提取
+        approximate_date = date_precision != 'exact'
+        include_date = include_date or approximate_date or bool(window)
+        
         logger.info(f"收到抓取请求：{channel_url}")
         if exclude_file_path:
             logger.info(f"使用排重文件：{exclude_file_path}")
         
+        # 结果缓存：相同频道和参数在有效期内直接返回已生成的文件
+        # （增量模式和排除已抓取视频的结果依赖之前的运行，不使用缓存）
+        result_cache = get_result_cache() if not (incremental or exclude_seen) else None
+        result_key = ResultCache.make_key(
+            YouTubeScraper._get_channel_upload_url(channel_url),
+            include_date,
+            YOUTUBE_CONFIG['max_videos'],
+            exclude_hash,
+            file_format,
+            date_precision if include_date else 'exact',
+            window.since,
+            window.until
+        )
+        cached = result_cache.get(result_key) if result_cache is not None and not refresh else None
+        if cached is not None:
+            remove_upload(exclude_file_path)
+            count = cached['result']['count']
+            # 先写入结果再标记完成（任务保留，不经过调度器直接完成）：
+            # 看到 completed 的客户端立即获取 /api/results 时结果已完整
+            task_store.append_results(task_id, cached['records'])
+            update_progress(task_id, 'completed', 100, '抓取完成！（使用最近的抓取结果）', count, count, 0, result={
+                **cached['result'],
+                'cached': True,
+                'cached_at': cached['created_at']
+            })
+            logger.info(f"命中结果缓存，直接返回：{cached['result']['filename']}")
+            return jsonify({
+                'success': True,
+                'task_id': task_id,
+                'coalesced': False,
+                'cached': True,
+                'queue_position': None
+            })
+        
         # 创建进度回调函数
-        def progress_callback(stage, progress, message, current_count=0, total_count=0, estimated_time=None):
-            update_progress(task_id, stage, progress, message, current_count, total_count, estimated_time)
+        def progress_callback(stage, progress, message, current_count=0, total_count=0, estimated_time=None, stats=None):
+            update_progress(task_id, stage, progress, message, current_count, total_count, estimated_time,
+                            stats=stats)
         
         # 创建抓取器并执行抓取（在后台线程中执行）
         def scrape_task():
@@ -111,27 +298,55 @@ def scrape():
                 update_progress(task_id, 'starting', 1, '正在启动抓取任务...', 0, 0)
                 
                 scraper = YouTubeScraper()
-                video_data = scraper.scrape_channel(
-                    channel_url, 
-                    include_date=include_date,
-                    exclude_file=exclude_file_path,
-                    progress_callback=progress_callback
-                )
+                records = VideoRecords(include_date, approximate_date)
                 
-                if not video_data:
-                    update_progress(task_id, 'error', 0, '未抓取到任何视频链接', 0, 0)
-                    return
+                def stream_records():
+                    """流式抓取：每产出一条就放入部分结果，前端可通过 /api/results/<task_id> 提前获取"""
+                    pending = []
+                    last_flush = time.time()
+                    # 未指定任务标识时按频道和参数生成，实例被回收后重新提交同一任务即可断点续传
+                    for record in scraper.iter_channel(
+                        channel_url, 
+                        include_date=include_date,
+                        exclude_file=exclude_file_path,
+                        progress_callback=progress_callback,
+                        incremental=incremental,
+                        job_key=job_key or scraper.make_job_key(
+                            channel_url, include_date, date_precision, window.since, window.until,
+                            exclude_hash, exclude_seen or None, incremental, file_format
+                        ),
+                        exclude_seen=exclude_seen or None,
+                        date_precision=date_precision,
+                        since=window.since,
+                        until=window.until
+                    ):
+                        records.append(record)
+                        pending.append(record.to_dict(include_date, approximate_date))
+                        if len(pending) >= RESULTS_FLUSH_SIZE or time.time() - last_flush >= RESULTS_FLUSH_SECONDS:
+                            task_store.append_results(task_id, pending)
+                            pending = []
+                            last_flush = time.time()
+                        yield record
+                    task_store.append_results(task_id, pending)
+                    if records:
+                        update_progress(task_id, 'saving', 90, '正在保存文件...', len(records), len(records))
                 
-                # 保存到文件（Excel 格式）
-                update_progress(task_id, 'saving', 90, '正在保存文件...', len(video_data), len(video_data))
+                # 边抓取边写入文件（逐条写入临时文件，完成后改名；没有结果时不创建文件）
                 output_file = scraper.save_urls(
-                    video_data, 
+                    stream_records(), 
                     channel_url=channel_url, 
-                    file_format='excel'
+                    file_format=file_format,
+                    include_date=include_date,
+                    include_precision=approximate_date
                 )
                 
+                if output_file is None:
+                    update_progress(task_id, 'error', 0, '未抓取到任何视频链接', 0, 0,
+                                    result={'success': False, 'error': '未抓取到任何视频链接'})
+                    return
+                
                 # 返回结果，包含实际抓取数量
-                actual_count = len(video_data)
+                actual_count = len(records)
                 logger.info(f"抓取完成，实际数量：{actual_count} 条")
                 
                 # 清理上传的临时文件
@@ -141,47 +356,83 @@ def scrape():
                     except:
                         pass
                 
-                # 更新最终进度
-                update_progress(task_id, 'completed', 100, '抓取完成！', actual_count, actual_count, 0)
+                result = {
+                    'success': True,
+                    'count': actual_count,
+                    'target_min': 200,
+                    'target_max': 300,
+                    'filename': output_file.name,
+                    'filepath': str(output_file),
+                    'urls': [record.url for record in records[:10]]
+                }
+                if result_cache is not None:
+                    result_cache.put(result_key, result, records.to_dicts())
                 
-                # 保存结果到进度中
-                with progress_lock:
-                    if task_id in progress_store:
-                        progress_store[task_id]['result'] = {
-                            'success': True,
-                            'count': actual_count,
-                            'target_min': 200,
-                            'target_max': 300,
-                            'filename': output_file.name,
-                            'filepath': str(output_file),
-                            'urls': [item.get('url', '') if isinstance(item, dict) else item for item in video_data[:10]]
-                        }
+                # 更新最终进度（同时保存结果）
+                update_progress(task_id, 'completed', 100, '抓取完成！', actual_count, actual_count, 0, result=result)
             except Exception as e:
                 logger.error(f"抓取失败：{str(e)}", exc_info=True)
-                update_progress(task_id, 'error', 0, f'抓取失败：{str(e)}', 0, 0)
-                with progress_lock:
-                    if task_id in progress_store:
-                        progress_store[task_id]['result'] = {
-                            'success': False,
-                            'error': str(e)
-                        }
+                update_progress(task_id, 'error', 0, f'抓取失败：{str(e)}', 0, 0, result={
+                    'success': False,
+                    'error': str(e)
+                })
+            finally:
+                task_store.release(coalesce_key, task_id)
+        
+        # 相同频道和参数的任务在执行期间合并为一个（未命中缓存的并发请求共用一次抓取）
+        coalesce_key = '|'.join([
+            result_key,
+            f"incremental={incremental}",
+            f"exclude_seen={exclude_seen}",
+            f"job_key={job_key}",
+        ])
+        # 逐个提取发布时间的任务走慢速通道（近似日期模式大部分日期取自列表，仍走快速通道）
+        lane = 'slow' if include_date and not approximate_date else 'fast'
+        update_progress(task_id, 'queued', 0, '排队中...', 0, 0)
+        # 合并键登记在共享的任务状态存储中：其他 worker 正在执行的相同任务也能合并
+        owner = task_store.claim(coalesce_key, task_id)
+        if owner != task_id:
+            discard_task(task_id, exclude_file_path)
+            logger.info(f"相同任务正在进行，已合并到任务 {owner[:8]}...")
+            scheduler.note_coalesced()
+            return jsonify({
+                'success': True,
+                'task_id': owner,
+                'coalesced': True,
+                'cached': False,
+                'queue_position': stored_queue_position(owner)
+            })
+        try:
+            job, coalesced = scheduler.submit(task_id, scrape_task, lane=lane, key=coalesce_key)
+        except QueueFullError as e:
+            task_store.release(coalesce_key, task_id)
+            discard_task(task_id, exclude_file_path)
+            logger.warning(f"任务队列已满，拒绝请求：{channel_url}")
+            response = jsonify({
+                'success': False,
+                'error': '服务器繁忙，任务队列已满，请稍后重试'
+            })
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response, 429
         
-        # 在后台线程中执行抓取任务
-        thread = threading.Thread(target=scrape_task)
-        thread.daemon = True
-        thread.start()
+        if coalesced:
+            # 合并到本 worker 中刚结束的相同任务：返回已有任务的ID，丢弃本次请求的登记、进度和上传文件
+            task_store.release(coalesce_key, task_id)
+            discard_task(task_id, exclude_file_path)
+            logger.info(f"相同任务正在进行，已合并到任务 {job.job_id[:8]}...")
         
         # 立即返回任务ID
         return jsonify({
             'success': True,
-            'task_id': task_id
+            'task_id': job.job_id,
+            'coalesced': coalesced,
+            'cached': False,
+            'queue_position': stored_queue_position(job.job_id)
         })
         
     except Exception as e:
         logger.error(f"创建抓取任务失败：{str(e)}", exc_info=True)
-        with progress_lock:
-            if task_id in progress_store:
-                del progress_store[task_id]
+        task_store.delete(task_id)
         return jsonify({
             'success': False,
             'error': f'创建抓取任务失败：{str(e)}'
@@ -191,29 +442,118 @@ def scrape():
 @app.route('/api/progress/<task_id>')
 def get_progress(task_id):
     """获取抓取进度"""
-    with progress_lock:
-        if task_id not in progress_store:
-            return jsonify({
-                'success': False,
-                'error': '任务不存在或已过期'
-            }), 404
-        
-        progress_info = progress_store[task_id].copy()
-        
-        # 如果任务完成或出错，返回结果并清理
-        if progress_info.get('stage') in ['completed', 'error']:
-            result = progress_info.get('result')
-            # 延迟清理，给前端一些时间获取结果
-            return jsonify({
-                'success': True,
-                **progress_info,
-                'result': result
-            })
-        
+    current = task_store.get_progress(task_id)
+    if current is None:
+        return jsonify({
+            'success': False,
+            'error': '任务不存在或已过期'
+        }), 404
+    
+    progress_info = current[0]
+    
+    # 距上一次抓取进展的秒数（进度停滞时不会再有更新，这里按当前时间计算，用于区分慢任务和卡住的任务）
+    stats = progress_info.get('stats')
+    if stats and progress_info.get('stage') not in ['completed', 'error']:
+        progress_info['idle_seconds'] = round(max(0.0, time.time() - stats['last_progress_at']), 1)
+    
+    # 如果任务完成或出错，返回结果（任务过期后由存储自动清理）
+    if progress_info.get('stage') in ['completed', 'error']:
+        result = progress_info.get('result')
         return jsonify({
             'success': True,
-            **progress_info
+            **progress_info,
+            'result': result
         })
+    
+    return jsonify({
+        'success': True,
+        **progress_info
+    })
+
+
+@app.route('/api/progress/<task_id>/stream')
+def stream_progress(task_id):
+    """
+    推送抓取进度（Server-Sent Events）
+    
+    进度变化时推送，短时间内的多次变化合并为一次；任务完成或出错时推送最终结果后结束。
+    每个连接占用一个 gthread 线程：连接超过 sse_max_seconds（几秒）后主动断开，浏览器的 EventSource
+    按 retry 间隔自动重连；本 worker 的连接数达到 sse_max_streams 时返回 503，前端改用轮询。
+    任务可以由其他 worker 执行，进度从共享的任务状态存储中读取。
+    """
+    current = task_store.get_progress(task_id)
+    if current is None:
+        return jsonify({
+            'success': False,
+            'error': '任务不存在或已过期'
+        }), 404
+    if not sse_slots.acquire(blocking=False):
+        response = jsonify({
+            'success': False,
+            'error': '进度推送连接数已满，请改用 /api/progress 轮询'
+        })
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    
+    def generate():
+        last_version = None
+        deadline = time.time() + WEB_CONFIG['sse_max_seconds']
+        yield f"retry: {WEB_CONFIG['sse_retry_ms']}\n\n"
+        
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return
+            # 只在进度变化时唤醒（排队位置变化也写入进度），不超过连接的剩余时间
+            latest = task_store.wait_for_change(task_id, last_version, min(15, remaining))
+            if latest is None:
+                yield f"event: gone\ndata: {json.dumps({'success': False, 'error': '任务不存在或已过期'}, ensure_ascii=False)}\n\n"
+                return
+            progress_info, version = latest
+            if version == last_version:
+                yield ': keepalive\n\n'
+                continue
+            last_version = version
+            yield f"data: {json.dumps({'success': True, **progress_info}, ensure_ascii=False)}\n\n"
+            
+            if progress_info.get('stage') in ['completed', 'error'] and 'result' in progress_info:
+                return
+            # 合并推送：间隔期内的多次进度变化只推送最新一次
+            time.sleep(WEB_CONFIG['sse_interval'])
+    
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # 连接结束（包括客户端提前断开）时归还名额
+    response.call_on_close(sse_slots.release)
+    return response
+
+
+@app.route('/api/results/<task_id>')
+def get_partial_results(task_id):
+    """获取已抓取的部分结果（任务运行中即可获取，支持 offset/limit 增量拉取）"""
+    offset = request.args.get('offset', 0, type=int)
+    limit = request.args.get('limit', 500, type=int)
+    current = task_store.get_progress(task_id)
+    results = task_store.get_results(task_id, offset, limit) if current is not None else None
+    if results is None:
+        return jsonify({
+            'success': False,
+            'error': '任务不存在或已过期'
+        }), 404
+    records, total = results
+    stage = current[0].get('stage')
+    
+    return jsonify({
+        'success': True,
+        'records': records,
+        'offset': offset,
+        'next_offset': offset + len(records),
+        'total': total,
+        'done': stage in ['completed', 'error']
+    })
 
 
 @app.route('/api/download/<filename>')
@@ -225,8 +565,7 @@ def download(filename):
             return send_file(
                 filepath,
                 as_attachment=True,
-                download_name=filename,
-                mimetype='text/plain'
+                download_name=filename
             )
         else:
             return jsonify({'error': '文件不存在'}), 404
@@ -235,6 +574,15 @@ def download(filename):
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus 指标（汇总所有 worker）"""
+    if not METRICS_CONFIG['enabled']:
+        return jsonify({'error': '指标未启用'}), 404
+    body = metrics.render_prometheus(metrics.exporter.collect())
+    return Response(body, mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
 @app.route('/api/files')
 def list_files():
     """列出所有输出文件"""
@@ -281,6 +629,10 @@ if __name__ == '__main__':
     print("按 Ctrl+C 停止服务器")
     print("=" * 60)
     
+    # 后台预加载 yt-dlp，首页立即可用，第一次抓取也不必等待导入
+    if WEB_CONFIG['warm_up']:
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    
     try:
         app.run(debug=False, host=HOST, port=PORT, use_reloader=False)
         print("\n✅ 服务器已启动")